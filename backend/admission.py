@@ -0,0 +1,148 @@
+"""
+Admission control for the LLM stages of the query pipeline.
+
+Caps how many requests may be in their LLM stages at once. The pipeline holds a
+slot only around its LLM calls; cache hits, templated answers and SQL execution
+run without one. Extra requests wait
+in a bounded queue for at most ADMISSION_QUEUE_TIMEOUT seconds; when the queue
+is full (or the wait runs out) the request is rejected immediately so the API
+can answer 503 + Retry-After instead of letting every request time out upstream.
+"""
+
+import contextvars
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+import metrics
+from cancellation import QueryCancelled, is_cancelled, on_cancel
+
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "8"))
+ADMISSION_MAX_QUEUE = int(os.getenv("ADMISSION_MAX_QUEUE", "16"))
+ADMISSION_QUEUE_TIMEOUT = float(os.getenv("ADMISSION_QUEUE_TIMEOUT", "10"))
+ADMISSION_RETRY_AFTER = int(os.getenv("ADMISSION_RETRY_AFTER", "5"))
+
+
+class Overloaded(Exception):
+    """Raised when a request can't be admitted to the LLM stages."""
+
+    def __init__(self, reason: str, retry_after: int = ADMISSION_RETRY_AFTER):
+        super().__init__(reason)
+        self.retry_after = retry_after
+
+
+class AdmissionController:
+    """Concurrency limit with a bounded, deadline-aware wait queue."""
+
+    def __init__(
+        self,
+        max_concurrent: int = LLM_MAX_CONCURRENCY,
+        max_queue: int = ADMISSION_MAX_QUEUE,
+        queue_timeout: float = ADMISSION_QUEUE_TIMEOUT
+    ):
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self._active = 0
+        self._waiting = 0
+        self._cond = threading.Condition()
+        # Set while the current context holds a slot from admit()
+        self._held = contextvars.ContextVar(f"admission_held_{id(self)}", default=False)
+
+    def _publish(self) -> None:
+        metrics.set_gauge("admission.in_flight", self._active)
+        metrics.set_gauge("admission.queue_depth", self._waiting)
+
+    def acquire(self) -> None:
+        """
+        Take a slot, waiting in the queue if necessary.
+
+        Raises:
+            Overloaded if the queue is full or the queue deadline passes
+            QueryCancelled if the request is cancelled while queued
+        """
+        start = time.perf_counter()
+        deadline = start + self.queue_timeout
+        with self._cond:
+            if self._active >= self.max_concurrent:
+                if self._waiting >= self.max_queue:
+                    metrics.increment("admission.rejected.queue_full")
+                    raise Overloaded("LLM queue is full")
+
+                self._waiting += 1
+                self._publish()
+                try:
+                    with on_cancel(self._wake_all):
+                        while self._active >= self.max_concurrent:
+                            if is_cancelled():
+                                # The client left while queued - give the place to a live request
+                                metrics.increment("cancel.queued")
+                                self._cond.notify()  # pass on any wake-up meant for this waiter
+                                raise QueryCancelled("Cancelled while waiting for LLM capacity")
+                            remaining = deadline - time.perf_counter()
+                            if remaining <= 0:
+                                metrics.increment("admission.rejected.timeout")
+                                raise Overloaded("Timed out waiting for LLM capacity")
+                            self._cond.wait(remaining)
+                finally:
+                    self._waiting -= 1
+                    self._publish()
+
+            self._active += 1
+            self._publish()
+
+        metrics.increment("admission.admitted")
+        metrics.observe("admission.wait", (time.perf_counter() - start) * 1000)
+
+    def try_acquire(self, count: int) -> int:
+        """
+        Take up to count more slots without waiting (none while requests are queued).
+
+        Returns:
+            Number of slots taken; give them back with release(n)
+        """
+        with self._cond:
+            if self._waiting:
+                return 0
+            taken = max(0, min(count, self.max_concurrent - self._active))
+            self._active += taken
+            self._publish()
+        return taken
+
+    def _wake_all(self) -> None:
+        with self._cond:
+            self._cond.notify_all()
+
+    def release(self, count: int = 1) -> None:
+        """Give slots back and wake a waiter for each."""
+        if count <= 0:
+            return
+        with self._cond:
+            self._active -= count
+            self._publish()
+            self._cond.notify(count)
+
+    @contextmanager
+    def admit(self):
+        """
+        Hold a slot for the duration of the block.
+
+        Nested use is free: inside a block that already holds a slot (including
+        work running in a copy of its context, like the parts of a decomposed
+        question), admit() takes no second slot.
+        """
+        if self._held.get():
+            yield
+            return
+        self.acquire()
+        reset = self._held.set(True)
+        try:
+            yield
+        finally:
+            self._held.reset(reset)
+            self.release()
+
+
+# Shared by all requests in this worker process
+llm_admission = AdmissionController()
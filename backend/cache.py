@@ -0,0 +1,314 @@
+"""
+Cache backends shared by the query pipeline's question, SQL and result caches.
+
+The default backend is a single SQLite file in WAL mode, so every uvicorn
+worker on the host reads and writes the same entries - a question answered by
+one worker is a cache hit for all the others. No external service is needed.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+import metrics
+
+# Backend selection: "sqlite" (shared across workers), "memory" (per process) or "none"
+CACHE_BACKEND = os.getenv("CACHE_BACKEND", "sqlite")
+CACHE_PATH = Path(os.getenv("CACHE_PATH", str(Path(__file__).parent.parent / "data" / "cache.db")))
+
+# Total size bound for all cached values; least recently used entries are evicted first
+CACHE_MAX_BYTES = int(os.getenv("CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+
+# Only refresh an entry's access time if it is older than this, to keep hits read-mostly
+TOUCH_INTERVAL_SECONDS = 60
+
+logger = logging.getLogger(__name__)
+
+
+def make_key(*parts: str) -> str:
+    """Build a fixed-length cache key from arbitrary string parts."""
+    return hashlib.sha256("\x1f".join(parts).encode("utf-8")).hexdigest()
+
+
+class CacheBackend:
+    """Interface for namespaced key/value caches with per-entry TTL."""
+
+    def get(self, namespace: str, key: str) -> Optional[Any]:
+        """Return the cached value, or None if missing or expired."""
+        raise NotImplementedError
+
+    def set(self, namespace: str, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        """Store a JSON-serializable value, expiring after ttl seconds (None = never)."""
+        raise NotImplementedError
+
+    def delete(self, namespace: str, key: str) -> None:
+        """Remove a single entry."""
+        raise NotImplementedError
+
+    def clear(self, namespace: Optional[str] = None) -> None:
+        """Remove every entry, or every entry in one namespace."""
+        raise NotImplementedError
+
+    def stats(self) -> Dict[str, Any]:
+        """Entry count and size information for the /metrics endpoint."""
+        return {}
+
+
+class NullCache(CacheBackend):
+    """Cache that stores nothing (CACHE_BACKEND=none)."""
+
+    def get(self, namespace, key):
+        return None
+
+    def set(self, namespace, key, value, ttl=None):
+        pass
+
+    def delete(self, namespace, key):
+        pass
+
+    def clear(self, namespace=None):
+        pass
+
+
+class MemoryCache(CacheBackend):
+    """Per-process LRU cache. Useful for development and single-worker deployments."""
+
+    def __init__(self, max_bytes: int = CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[str, Optional[float]]]" = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def get(self, namespace, key):
+        with self._lock:
+            entry = self._entries.get((namespace, key))
+            if entry is None:
+                return None
+            payload, expires_at = entry
+            if expires_at is not None and expires_at <= time.time():
+                self._remove((namespace, key))
+                return None
+            self._entries.move_to_end((namespace, key))
+        return json.loads(payload)
+
+    def set(self, namespace, key, value, ttl=None):
+        payload = json.dumps(value, default=str)
+        expires_at = time.time() + ttl if ttl is not None else None
+        with self._lock:
+            self._remove((namespace, key))
+            self._entries[(namespace, key)] = (payload, expires_at)
+            self._size += len(payload)
+            while self._size > self.max_bytes and self._entries:
+                self._remove(next(iter(self._entries)))
+
+    def delete(self, namespace, key):
+        with self._lock:
+            self._remove((namespace, key))
+
+    def clear(self, namespace=None):
+        with self._lock:
+            for entry_key in [k for k in self._entries if namespace is None or k[0] == namespace]:
+                self._remove(entry_key)
+
+    def stats(self):
+        with self._lock:
+            return {"backend": "memory", "entries": len(self._entries), "bytes": self._size}
+
+    def _remove(self, entry_key):
+        entry = self._entries.pop(entry_key, None)
+        if entry is not None:
+            self._size -= len(entry[0])
+
+
+class SQLiteCache(CacheBackend):
+    """
+    Cache stored in a WAL-mode SQLite file shared by all worker processes.
+
+    Writes are single transactions (atomic across processes). Entries carry
+    their own expiry time, and the store is kept under max_bytes by evicting
+    the least recently accessed entries after each write. The total size is
+    maintained by triggers in cache_size, so checking it doesn't scan the table.
+    """
+
+    SCHEMA = """
+    BEGIN IMMEDIATE;
+    CREATE TABLE IF NOT EXISTS cache_entries (
+        namespace TEXT NOT NULL,
+        key TEXT NOT NULL,
+        value TEXT NOT NULL,
+        size INTEGER NOT NULL,
+        expires_at REAL,
+        accessed_at REAL NOT NULL,
+        PRIMARY KEY (namespace, key)
+    ) WITHOUT ROWID;
+    CREATE INDEX IF NOT EXISTS idx_cache_entries_accessed ON cache_entries(accessed_at);
+    CREATE INDEX IF NOT EXISTS idx_cache_entries_expires ON cache_entries(expires_at);
+    CREATE TABLE IF NOT EXISTS cache_size (id INTEGER PRIMARY KEY CHECK (id = 0), bytes INTEGER NOT NULL);
+    INSERT OR IGNORE INTO cache_size (id, bytes) SELECT 0, COALESCE(SUM(size), 0) FROM cache_entries;
+    CREATE TRIGGER IF NOT EXISTS cache_entries_size_insert AFTER INSERT ON cache_entries
+    BEGIN UPDATE cache_size SET bytes = bytes + NEW.size; END;
+    CREATE TRIGGER IF NOT EXISTS cache_entries_size_delete AFTER DELETE ON cache_entries
+    BEGIN UPDATE cache_size SET bytes = bytes - OLD.size; END;
+    CREATE TRIGGER IF NOT EXISTS cache_entries_size_update AFTER UPDATE OF size ON cache_entries
+    BEGIN UPDATE cache_size SET bytes = bytes + NEW.size - OLD.size; END;
+    COMMIT;
+    """
+
+    def __init__(self, path: Path = CACHE_PATH, max_bytes: int = CACHE_MAX_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._local = threading.local()
+        path.parent.mkdir(parents=True, exist_ok=True)
+        conn = self._connection()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.executescript(self.SCHEMA)
+
+    def _connection(self) -> sqlite3.Connection:
+        """One connection per thread; sqlite3 connections can't be shared across threads."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, namespace, key):
+        now = time.time()
+        try:
+            conn = self._connection()
+            row = conn.execute(
+                "SELECT value, expires_at, accessed_at FROM cache_entries WHERE namespace = ? AND key = ?",
+                (namespace, key)
+            ).fetchone()
+            if row is None:
+                return None
+            value, expires_at, accessed_at = row
+            if expires_at is not None and expires_at <= now:
+                conn.execute("DELETE FROM cache_entries WHERE namespace = ? AND key = ?", (namespace, key))
+                return None
+            if now - accessed_at > TOUCH_INTERVAL_SECONDS:
+                conn.execute(
+                    "UPDATE cache_entries SET accessed_at = ? WHERE namespace = ? AND key = ?",
+                    (now, namespace, key)
+                )
+            return json.loads(value)
+        except sqlite3.Error:
+            # A busy or broken cache must never fail the request
+            return None
+
+    def set(self, namespace, key, value, ttl=None):
+        payload = json.dumps(value, default=str)
+        now = time.time()
+        expires_at = now + ttl if ttl is not None else None
+        try:
+            conn = self._connection()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                # An upsert rather than INSERT OR REPLACE: REPLACE's implicit delete
+                # doesn't fire the size triggers
+                conn.execute(
+                    "INSERT INTO cache_entries "
+                    "(namespace, key, value, size, expires_at, accessed_at) VALUES (?, ?, ?, ?, ?, ?) "
+                    "ON CONFLICT (namespace, key) DO UPDATE SET value = excluded.value, size = excluded.size, "
+                    "expires_at = excluded.expires_at, accessed_at = excluded.accessed_at",
+                    (namespace, key, payload, len(payload), expires_at, now)
+                )
+                self._evict(conn, now)
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        except sqlite3.Error:
+            pass
+
+    def _evict(self, conn: sqlite3.Connection, now: float) -> None:
+        """Drop expired entries, then least recently used ones until under max_bytes."""
+        conn.execute("DELETE FROM cache_entries WHERE expires_at IS NOT NULL AND expires_at <= ?", (now,))
+        total = conn.execute("SELECT bytes FROM cache_size").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        excess = total - self.max_bytes
+        freed = 0
+        victims = []
+        for namespace, key, size in conn.execute(
+            "SELECT namespace, key, size FROM cache_entries ORDER BY accessed_at"
+        ):
+            victims.append((namespace, key))
+            freed += size
+            if freed >= excess:
+                break
+        conn.executemany("DELETE FROM cache_entries WHERE namespace = ? AND key = ?", victims)
+        metrics.increment("cache.evictions", len(victims))
+
+    def delete(self, namespace, key):
+        try:
+            self._connection().execute(
+                "DELETE FROM cache_entries WHERE namespace = ? AND key = ?", (namespace, key)
+            )
+        except sqlite3.Error:
+            pass
+
+    def clear(self, namespace=None):
+        try:
+            conn = self._connection()
+            if namespace is None:
+                conn.execute("DELETE FROM cache_entries")
+            else:
+                conn.execute("DELETE FROM cache_entries WHERE namespace = ?", (namespace,))
+        except sqlite3.Error:
+            pass
+
+    def stats(self):
+        try:
+            rows = self._connection().execute(
+                "SELECT namespace, COUNT(*), COALESCE(SUM(size), 0) FROM cache_entries GROUP BY namespace"
+            ).fetchall()
+        except sqlite3.Error:
+            rows = []
+        return {
+            "backend": "sqlite",
+            "path": str(self.path),
+            "namespaces": {ns: {"entries": count, "bytes": size} for ns, count, size in rows},
+        }
+
+
+_cache: Optional[CacheBackend] = None
+_cache_lock = threading.Lock()
+
+
+def get_cache() -> CacheBackend:
+    """Return the process-wide cache backend selected by CACHE_BACKEND."""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                if CACHE_BACKEND == "memory":
+                    _cache = MemoryCache()
+                elif CACHE_BACKEND == "none":
+                    _cache = NullCache()
+                else:
+                    try:
+                        _cache = SQLiteCache()
+                    except (sqlite3.Error, OSError) as e:
+                        # e.g. read-only data directory or a file locked at startup - fall back to
+                        # per-process caching, loudly: workers no longer share answers
+                        logger.warning(
+                            "SQLite cache %s unavailable (%s); using a per-process memory cache", CACHE_PATH, e
+                        )
+                        metrics.increment("cache.fallback")
+                        _cache = MemoryCache()
+    return _cache
+
+
+def cached_get(namespace: str, key: str) -> Optional[Any]:
+    """Look up an entry and record a hit or miss for the namespace."""
+    value = get_cache().get(namespace, key)
+    metrics.increment(f"cache.{namespace}.{'hit' if value is not None else 'miss'}")
+    return value
@@ -0,0 +1,122 @@
+"""
+Cancellation of queries whose client has gone away.
+
+main.py polls each /query request for a client disconnect and cancels the
+request's CancelToken. The pipeline runs in a worker thread with that token
+installed as the current token. Blocking stages register how to abort
+themselves while they run:
+- the admission queue wakes its waiters;
+- LLM calls close their response stream;
+- SQL execution interrupts the running statement (SQLite or DuckDB).
+Each stage then raises QueryCancelled. An abandoned question stops using LLM
+rate limit and worker capacity instead of running to completion.
+"""
+
+import contextvars
+import threading
+from contextlib import contextmanager
+from typing import Callable, List, Optional
+
+
+class QueryCancelled(BaseException):
+    """
+    Raised in the pipeline thread once its request has been cancelled.
+
+    Derives from BaseException (like asyncio.CancelledError) so the pipeline's
+    `except Exception` fallbacks don't turn it into an error answer.
+    """
+
+
+class CancelToken:
+    """Thread-safe cancellation flag with callbacks that abort blocking work."""
+
+    def __init__(self):
+        self.reason: Optional[str] = None
+        self._event = threading.Event()
+        self._lock = threading.Lock()
+        self._callbacks: List[Callable[[], None]] = []
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+    def cancel(self, reason: str = "cancelled") -> None:
+        """Mark the token cancelled and run the registered abort callbacks (from the calling thread)."""
+        with self._lock:
+            if self._event.is_set():
+                return
+            self.reason = reason
+            self._event.set()
+            callbacks = list(self._callbacks)
+        for callback in callbacks:
+            _run_callback(callback)
+
+    def add_callback(self, callback: Callable[[], None]) -> None:
+        """Register an abort callback; runs it immediately if already cancelled."""
+        with self._lock:
+            if not self._event.is_set():
+                self._callbacks.append(callback)
+                return
+        _run_callback(callback)
+
+    def remove_callback(self, callback: Callable[[], None]) -> None:
+        with self._lock:
+            if callback in self._callbacks:
+                self._callbacks.remove(callback)
+
+    def check(self) -> None:
+        """Raise QueryCancelled if the token has been cancelled."""
+        if self._event.is_set():
+            raise QueryCancelled(self.reason)
+
+
+def _run_callback(callback: Callable[[], None]) -> None:
+    # Abort callbacks race with the work finishing (e.g. interrupting a closed
+    # connection); a failed abort must not break the cancelling thread
+    try:
+        callback()
+    except Exception:
+        pass
+
+
+_current_token: contextvars.ContextVar = contextvars.ContextVar("cancel_token", default=None)
+
+
+@contextmanager
+def use_token(token: Optional[CancelToken]):
+    """Make token the current token for the block (None disables cancellation)."""
+    reset = _current_token.set(token)
+    try:
+        yield
+    finally:
+        _current_token.reset(reset)
+
+
+def current_token() -> Optional[CancelToken]:
+    return _current_token.get()
+
+
+def is_cancelled() -> bool:
+    token = _current_token.get()
+    return token is not None and token.cancelled
+
+
+def check_cancelled() -> None:
+    """Raise QueryCancelled if the current request has been cancelled."""
+    token = _current_token.get()
+    if token is not None:
+        token.check()
+
+
+@contextmanager
+def on_cancel(callback: Callable[[], None]):
+    """Call callback if the current request is cancelled while the block runs."""
+    token = _current_token.get()
+    if token is None:
+        yield
+        return
+    token.add_callback(callback)
+    try:
+        yield
+    finally:
+        token.remove_callback(callback)
@@ -1,16 +1,235 @@
 """
-Database connection and query execution for SQLite.
+Database connection and query execution.
+
+Statements run on SQLite by default. With ANALYTICS_ENGINE=duckdb, scan-heavy
+aggregates (GROUP BY / COUNT / AVG over whole tables) are routed to an embedded
+columnar engine (DuckDB) reading the Parquet export of the database written by
+scripts/export_parquet.py; point lookups and anything using SQLite-specific
+functions stay on SQLite.
 """
 
+import json
+import os
+import re
 import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from decimal import Decimal
 from pathlib import Path
 from contextlib import contextmanager
-from typing import Any, List, Dict, Tuple
+from functools import lru_cache
+from typing import Any, FrozenSet, List, Dict, Optional, Sequence, Tuple
+
+import metrics
+from cancellation import QueryCancelled, check_cancelled, is_cancelled, on_cancel
+from query_log import record_query
 
 # Database path - full database for deployment
 # Note: Database not included in git repo - download from Kaggle or run scripts/create_database.py
 DB_PATH = Path(__file__).parent.parent / "data" / "linkedin_jobs.db"
 
+# Engine for analytic statements: "sqlite" (everything on SQLite) or "duckdb"
+ANALYTICS_ENGINE = os.getenv("ANALYTICS_ENGINE", "sqlite")
+
+# Parquet export of DB_PATH (one file per table plus manifest.json), written by scripts/export_parquet.py
+PARQUET_DIR = Path(os.getenv("PARQUET_DIR", str(DB_PATH.parent / "parquet")))
+
+# Rows fetched per statement (for safety)
+MAX_RESULT_ROWS = 100
+
+# Schema documentation for the LLM prompt: one for databases built by the current
+# scripts/create_database.py, one for builds that predate the derived columns
+SCHEMA_DOCS_PATH = Path(__file__).parent.parent / "data" / "schema_docs.txt"
+LEGACY_SCHEMA_DOCS_PATH = Path(__file__).parent.parent / "data" / "schema_docs_legacy.txt"
+
+# Columns and lookup tables scripts/create_database.py derives at ingest
+DERIVED_POSTINGS_COLUMNS = (
+    "annual_salary", "annual_min_salary", "annual_med_salary", "annual_max_salary",
+    "normalized_title", "title_family_id", "experience_level_code", "work_type_code",
+)
+LOOKUP_TABLES = ("title_families", "experience_levels", "work_types")
+
+STRING_LITERAL_RE = re.compile(r"'(?:[^']|'')*'")
+
+# Aggregating statements scan whole tables - the columnar engine's strength
+AGGREGATE_RE = re.compile(r"\bGROUP\s+BY\b|\b(?:COUNT|SUM|AVG|MIN|MAX|TOTAL)\s*\(", re.IGNORECASE)
+
+# An equality on a key column (job_id = 123) is a point lookup SQLite answers from an index
+KEY_LOOKUP_RE = re.compile(r"\b\w*_id\s*=\s*(?:\d+|\?|'')", re.IGNORECASE)
+
+# SQLite functions and casts the columnar engine lacks or evaluates differently
+# (date helpers, printf; CAST AS INTEGER truncates in SQLite but rounds in DuckDB)
+SQLITE_ONLY_RE = re.compile(
+    r"\b(?:strftime|julianday|datetime|date|time|unixepoch|printf|typeof|glob)\s*\(|\bAS\s+INT(?:EGER)?\b",
+    re.IGNORECASE
+)
+
+
+@dataclass
+class Execution:
+    """Rows fetched by an execution backend."""
+    results: List[Dict[str, Any]]
+    columns: List[str]
+    latency_ms: float
+
+
+class ExecutionBackend:
+    """Interface for engines that run validated, read-only SELECT statements."""
+
+    name = "base"
+
+    def execute(self, sql: str, params: Sequence[Any], max_rows: int) -> Execution:
+        """
+        Run a statement and fetch up to max_rows rows.
+
+        Must abort the running statement if the current request is cancelled
+        (see cancellation.on_cancel).
+        """
+        raise NotImplementedError
+
+
+class SQLiteBackend(ExecutionBackend):
+    """Row-oriented SQLite over DB_PATH; runs every statement the LLM can produce."""
+
+    name = "sqlite"
+
+    def execute(self, sql, params, max_rows):
+        with get_connection() as conn:
+            start = time.perf_counter()
+            with on_cancel(conn.interrupt):
+                check_cancelled()
+                cursor = conn.cursor()
+                cursor.execute(sql, params)
+
+                # Get column names
+                columns = [description[0] for description in cursor.description] if cursor.description else []
+
+                rows = cursor.fetchmany(max_rows)
+            latency_ms = (time.perf_counter() - start) * 1000
+
+        # Convert to list of dicts
+        return Execution([dict(zip(columns, row)) for row in rows], columns, latency_ms)
+
+
+class DuckDBBackend(ExecutionBackend):
+    """
+    Embedded columnar engine over the Parquet export, using all cores per query.
+
+    Each exported table is a view over its Parquet file. Settings make DuckDB
+    follow SQLite where they differ: integer division, NULLs sorting first in
+    ascending order, case-insensitive LIKE and 64-bit REAL (see to_duckdb_sql).
+    """
+
+    name = "duckdb"
+
+    def __init__(self, parquet_dir: Path):
+        import duckdb
+
+        self._db = duckdb.connect(":memory:")
+        self._db.execute("SET GLOBAL integer_division = true")
+        self._db.execute("SET GLOBAL default_null_order = 'nulls_first_on_asc_last_on_desc'")
+        for path in sorted(parquet_dir.glob("*.parquet")):
+            self._db.execute(f'CREATE VIEW "{path.stem}" AS SELECT * FROM read_parquet(\'{path.as_posix()}\')')
+
+    def execute(self, sql, params, max_rows):
+        # One cursor (connection to the shared in-memory database) per statement, for thread safety
+        cursor = self._db.cursor()
+        try:
+            start = time.perf_counter()
+            with on_cancel(cursor.interrupt):
+                check_cancelled()
+                cursor.execute(to_duckdb_sql(sql), list(params))
+                columns = [description[0] for description in cursor.description] if cursor.description else []
+                rows = cursor.fetchmany(max_rows)
+            latency_ms = (time.perf_counter() - start) * 1000
+        finally:
+            cursor.close()
+        return Execution([dict(zip(columns, map(_plain_value, row))) for row in rows], columns, latency_ms)
+
+
+def _plain_value(value: Any) -> Any:
+    # DuckDB types decimal literals (100.0 * COUNT(*)) as DECIMAL; SQLite returns floats
+    return float(value) if isinstance(value, Decimal) else value
+
+
+def to_duckdb_sql(sql: str) -> str:
+    """
+    Adapt SQLite SQL for DuckDB: LIKE is case-insensitive in SQLite (ILIKE in
+    DuckDB), and REAL/FLOAT are 64-bit in SQLite but 32-bit in DuckDB (DOUBLE).
+    """
+    def replace(match: re.Match) -> str:
+        text = match.group(0)
+        if text.startswith("'"):
+            return text
+        if text.upper() == "LIKE":
+            return "ILIKE"
+        return "AS DOUBLE"
+
+    return re.sub(r"'(?:[^']|'')*'|\bLIKE\b|\bAS\s+(?:REAL|FLOAT)\b", replace, sql, flags=re.IGNORECASE)
+
+
+def is_analytic(sql: str) -> bool:
+    """
+    Whether a statement is a scan-heavy aggregate worth running on the columnar engine.
+
+    Aggregates (GROUP BY, COUNT/AVG/...) qualify unless they look up a key
+    (WHERE job_id = 123), which SQLite answers from an index, or use functions
+    only SQLite evaluates correctly.
+    """
+    text = STRING_LITERAL_RE.sub("''", sql)
+    return bool(AGGREGATE_RE.search(text)) and not KEY_LOOKUP_RE.search(text) and not SQLITE_ONLY_RE.search(text)
+
+
+def read_export_manifest(parquet_dir: Path) -> Optional[Dict[str, Any]]:
+    """The manifest of a Parquet export, or None if there is no (readable) export."""
+    try:
+        return json.loads((parquet_dir / "manifest.json").read_text())
+    except (OSError, ValueError):
+        return None
+
+
+sqlite_backend = SQLiteBackend()
+
+_analytics: Optional[Tuple[str, Optional[ExecutionBackend]]] = None
+_analytics_lock = threading.Lock()
+
+
+def get_analytics_backend() -> Optional[ExecutionBackend]:
+    """
+    The columnar engine, or None if it is disabled, not installed, or its
+    Parquet export wasn't made from the current database build (stale data
+    would give different answers than SQLite).
+    """
+    global _analytics
+    if ANALYTICS_ENGINE != "duckdb":
+        return None
+    fingerprint = get_db_fingerprint()
+    current = _analytics
+    if current is not None and current[0] == fingerprint:
+        return current[1]
+
+    with _analytics_lock:
+        if _analytics is None or _analytics[0] != fingerprint:
+            backend = None
+            manifest = read_export_manifest(PARQUET_DIR)
+            if manifest is not None and manifest.get("source_fingerprint") == fingerprint:
+                try:
+                    backend = DuckDBBackend(PARQUET_DIR)
+                except Exception:
+                    backend = None  # duckdb not installed, or unreadable files
+            metrics.set_gauge("engine.duckdb.available", 1 if backend is not None else 0)
+            _analytics = (fingerprint, backend)
+        return _analytics[1]
+
+
+def route_query(sql: str) -> ExecutionBackend:
+    """Pick the backend for a statement by its shape."""
+    analytics = get_analytics_backend()
+    if analytics is not None and is_analytic(sql):
+        return analytics
+    return sqlite_backend
+
 
 @contextmanager
 def get_connection():
@@ -23,34 +242,66 @@ def get_connection():
         conn.close()
 
 
-def execute_query(sql: str, timeout_seconds: int = 30) -> Tuple[List[Dict[str, Any]], List[str]]:
+def execute_query(
+    sql: str,
+    timeout_seconds: int = 30,
+    params: Sequence[Any] = ()
+) -> Tuple[List[Dict[str, Any]], List[str]]:
     """
     Execute a SQL query and return results.
 
+    Analytic statements go to the columnar engine when it is enabled; if it
+    can't run one, the statement is retried on SQLite.
+
     Args:
         sql: The SQL query to execute
         timeout_seconds: Maximum execution time
+        params: Values for ? placeholders (templated queries run as prepared statements)
 
     Returns:
         Tuple of (list of row dicts, list of column names)
 
     Raises:
         Exception if query fails or times out
+        QueryCancelled if the request is cancelled (the running statement is interrupted)
     """
-    with get_connection() as conn:
-        cursor = conn.cursor()
-        cursor.execute(sql)
+    backend = route_query(sql)
+    backends = [backend] if backend is sqlite_backend else [backend, sqlite_backend]
+    for backend in backends:
+        start = time.perf_counter()
+        try:
+            execution = backend.execute(sql, params, MAX_RESULT_ROWS)
+            break
+        except Exception as e:
+            if is_cancelled():
+                record_query(sql, (time.perf_counter() - start) * 1000, error=str(e), params=params, db_path=DB_PATH)
+                metrics.increment("cancel.sql")
+                raise QueryCancelled("SQL interrupted") from e
+            if backend is not sqlite_backend:
+                metrics.increment(f"engine.{backend.name}.fallback")
+                continue
+            record_query(sql, (time.perf_counter() - start) * 1000, error=str(e), params=params, db_path=DB_PATH)
+            raise
 
-        # Get column names
-        columns = [description[0] for description in cursor.description] if cursor.description else []
+    metrics.observe("db.execute", execution.latency_ms)
+    metrics.observe(f"db.execute.{backend.name}", execution.latency_ms)
+    record_query(sql, execution.latency_ms, row_count=len(execution.results), params=params, db_path=DB_PATH)
 
-        # Fetch results (limit to 100 rows for safety)
-        rows = cursor.fetchmany(100)
+    return execution.results, execution.columns
 
-        # Convert to list of dicts
-        results = [dict(zip(columns, row)) for row in rows]
 
-        return results, columns
+def get_db_fingerprint() -> str:
+    """
+    Identify the current database build.
+
+    Changes whenever the database file is rebuilt or replaced, so it can be
+    mixed into cache keys to invalidate answers computed from older data.
+    """
+    try:
+        stat = Path(DB_PATH).stat()
+    except OSError:
+        return "missing"
+    return f"{stat.st_size:x}-{stat.st_mtime_ns:x}"
 
 
 def validate_sql(sql: str) -> Tuple[bool, str]:
@@ -75,9 +326,49 @@ def validate_sql(sql: str) -> Tuple[bool, str]:
     return True, ""
 
 
+@dataclass(frozen=True)
+class SchemaFeatures:
+    """Which optional parts of the ingest schema a database build has."""
+    tables: FrozenSet[str]              # tables and views
+    postings_columns: FrozenSet[str]
+
+    @property
+    def derived_columns(self) -> bool:
+        """Whether postings has the derived salary/title/code columns and their lookup tables."""
+        return (set(DERIVED_POSTINGS_COLUMNS) <= self.postings_columns
+                and set(LOOKUP_TABLES) <= self.tables)
+
+
+def get_schema_features() -> SchemaFeatures:
+    """Describe the schema of the current database build (read once per build)."""
+    return _read_schema_features(get_db_fingerprint())
+
+
+@lru_cache(maxsize=1)
+def _read_schema_features(fingerprint: str) -> SchemaFeatures:
+    if fingerprint == "missing":
+        return SchemaFeatures(frozenset(), frozenset())
+    with get_connection() as conn:
+        tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type IN ('table', 'view')")}
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(postings)")}
+    return SchemaFeatures(frozenset(tables), frozenset(columns))
+
+
 def get_schema_info() -> str:
-    """Get the schema documentation for LLM prompt."""
-    schema_path = Path(__file__).parent.parent / "data" / "schema_docs.txt"
-    if schema_path.exists():
-        return schema_path.read_text()
+    """
+    Get the schema documentation for LLM prompt.
+
+    Databases built before the derived columns existed (such as the prebuilt
+    release scripts/setup_data.py downloads) are described by the legacy docs,
+    so the model is never told about columns the database doesn't have.
+    """
+    if get_schema_features().derived_columns:
+        return _read_schema_docs(SCHEMA_DOCS_PATH)
+    return _read_schema_docs(LEGACY_SCHEMA_DOCS_PATH)
+
+
+@lru_cache(maxsize=2)
+def _read_schema_docs(path: Path) -> str:
+    if path.exists():
+        return path.read_text()
     return "Schema documentation not found."
@@ -0,0 +1,207 @@
+"""
+Planning for comparison questions: split into independent parts, merge results.
+Purely local - no LLM calls.
+
+"Compare salaries for data scientists vs software engineers in remote vs onsite
+roles" would otherwise become one large SQL with OR'ed LIKEs and conditional
+aggregates. Instead each "A vs B" chain is expanded into its alternatives and
+the question is split into one simple sub-question per combination:
+
+    salaries for data scientists in remote roles
+    salaries for data scientists in onsite roles
+    salaries for software engineers in remote roles
+    salaries for software engineers in onsite roles
+
+The pipeline answers the parts in parallel and merges their rows into one
+result set, labelled by a "segment" column, for charting and formatting.
+"""
+
+import itertools
+import os
+import re
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+# Questions that would expand into more parts than this are answered with one SQL
+MAX_SUBQUERIES = int(os.getenv("MAX_SUBQUERIES", "6"))
+
+# Merged results are capped like a single query's (see execute_query), split
+# evenly between the parts so every segment is represented
+MAX_MERGED_ROWS = 100
+
+SEGMENT_COLUMN = "segment"
+
+SEPARATORS = {"vs", "vs.", "versus"}
+
+# Words that end an alternative when scanning outwards from a "vs"
+BOUNDARY_WORDS = {
+    "for", "of", "in", "at", "with", "across", "among", "between", "on", "by", "from", "to",
+    "and", "or", "than", "compare", "comparing", "contrast",
+    "what", "which", "how", "who", "where", "when", "why",
+    "do", "does", "did", "is", "are", "was", "were", "has", "have", "get", "gets",
+    "the", "a", "an", "many", "much", "more", "less", "pay", "paid", "offer", "offers",
+}
+
+PUNCTUATION = {",", ";", ":", "(", ")"}
+
+LEADING_COMPARE_RE = re.compile(r"^(?:please\s+)?(?:compare|comparing|contrast)\s+(?:the\s+)?", re.IGNORECASE)
+COMPARED_TO_RE = re.compile(r"\bcompared (?:to|with)\b", re.IGNORECASE)
+TOKEN_RE = re.compile(r"[^\s,;:()]+|[,;:()]")
+
+
+@dataclass
+class SubQuestion:
+    """One independent part of a decomposed question."""
+    question: str
+    labels: List[str]
+
+    @property
+    def segment(self) -> str:
+        return " / ".join(self.labels)
+
+
+def _is_boundary(token: str) -> bool:
+    return token.lower() in BOUNDARY_WORDS or token in PUNCTUATION or token.lower() in SEPARATORS
+
+
+def _find_chains(tokens: List[str]) -> Optional[List[Tuple[int, int, List[List[str]]]]]:
+    """
+    Find "A vs B [vs C ...]" chains as (start, end, alternatives) over the token list.
+
+    Returns None if a left alternative runs back to the start of the question or
+    of a clause ("Top 10 companies hiring remote vs onsite", "Which pays more,
+    nurses vs teachers"): it can't be told apart from the rest of the question.
+    """
+    chains = []
+    i = 0
+    while i < len(tokens):
+        if tokens[i].lower() not in SEPARATORS:
+            i += 1
+            continue
+
+        # Left alternative: scan back to a boundary word
+        start = i
+        while start > 0 and not _is_boundary(tokens[start - 1]):
+            start -= 1
+        if chains and start < chains[-1][1]:
+            start = chains[-1][1]
+        elif start == 0 or tokens[start - 1] in PUNCTUATION:
+            return None
+        alternatives = [tokens[start:i]]
+
+        # Middle and right alternatives: up to the next separator, or a boundary after the last one
+        j = i + 1
+        while True:
+            end = j
+            while end < len(tokens) and not _is_boundary(tokens[end]):
+                end += 1
+            alternatives.append(tokens[j:end])
+            if end < len(tokens) and tokens[end].lower() in SEPARATORS:
+                j = end + 1
+                continue
+            break
+
+        if all(alternatives):
+            chains.append((start, end, _share_suffix(alternatives)))
+        i = end
+    return chains
+
+
+def _share_suffix(alternatives: List[List[str]]) -> List[List[str]]:
+    """
+    "remote vs onsite roles" -> "remote roles" / "onsite roles".
+
+    Only when every alternative is a single modifier and the last one is
+    followed by a lowercase head noun - "California vs New York" is two
+    places, not two kinds of York.
+    """
+    last = alternatives[-1]
+    if len(last) == 2 and all(len(alt) == 1 for alt in alternatives[:-1]) and last[1].islower():
+        return [alt + last[1:] for alt in alternatives[:-1]] + [last]
+    return alternatives
+
+
+def _join(tokens: Sequence[str]) -> str:
+    text = " ".join(tokens)
+    return re.sub(r"\s+([,;:)])", r"\1", text).replace("( ", "(")
+
+
+def decompose_question(question: str, max_parts: int = MAX_SUBQUERIES) -> Optional[List[SubQuestion]]:
+    """
+    Split a comparison question into independent sub-questions.
+
+    Args:
+        question: User's natural language question
+        max_parts: Largest number of parts worth running in parallel
+
+    Returns:
+        One SubQuestion per combination of compared alternatives, or None if the
+        question has no "vs" comparison (or would expand into too many parts)
+    """
+    text = COMPARED_TO_RE.sub("vs", question.strip().rstrip("?.! "))
+    tokens = TOKEN_RE.findall(text)
+    chains = _find_chains(tokens)
+    if not chains:
+        return None
+
+    # Each part needs something besides the compared case to ask about ("Remote?" is no question)
+    covered = {k for start, end, _ in chains for k in range(start, end)}
+    if all(_is_boundary(token) for k, token in enumerate(tokens) if k not in covered):
+        return None
+
+    combinations = 1
+    for _, _, alternatives in chains:
+        combinations *= len(alternatives)
+    if combinations < 2 or combinations > max_parts:
+        return None
+
+    parts = []
+    for choice in itertools.product(*(alternatives for _, _, alternatives in chains)):
+        words, position = [], 0
+        for (start, end, _), alternative in zip(chains, choice):
+            words += tokens[position:start] + alternative
+            position = end
+        words += tokens[position:]
+        sub_question = LEADING_COMPARE_RE.sub("", _join(words)).strip()
+        if not sub_question:
+            return None
+        parts.append(SubQuestion(
+            question=sub_question[0].upper() + sub_question[1:] + "?",
+            labels=[_join(alternative) for alternative in choice]
+        ))
+    return parts
+
+
+def merge_part_results(
+    parts: List[SubQuestion],
+    outcomes: List[Tuple[List[Dict[str, Any]], List[str]]]
+) -> Optional[Tuple[List[Dict[str, Any]], List[str]]]:
+    """
+    Merge the parts' result sets into one, with a leading segment column.
+
+    Parts are generated independently, so they may return different columns
+    (or the same figure under another alias). Rows are only merged when every
+    part returned the same column names, matched by name; anything else could
+    put a figure under the wrong label.
+
+    Each part keeps at most MAX_MERGED_ROWS // len(parts) rows (its first
+    ones, so a part's own ORDER BY ... LIMIT ranking survives).
+
+    Args:
+        parts: The sub-questions, in plan order
+        outcomes: (results, columns) for each part, in the same order
+
+    Returns:
+        Tuple of (merged row dicts, merged column names), or None if the parts'
+        columns differ
+    """
+    names = [n for n in outcomes[0][1] if n != SEGMENT_COLUMN]
+    if any(sorted(columns) != sorted(outcomes[0][1]) for _, columns in outcomes):
+        return None
+
+    per_part = MAX_MERGED_ROWS // len(parts)
+    merged = []
+    for part, (results, _) in zip(parts, outcomes):
+        for row in results[:per_part]:
+            merged.append({SEGMENT_COLUMN: part.segment, **{n: row.get(n) for n in names}})
+    return merged, [SEGMENT_COLUMN] + names
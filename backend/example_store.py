@@ -0,0 +1,199 @@
+"""
+Store of verified question -> SQL examples for few-shot prompting.
+
+Questions whose SQL ran successfully are saved to a small SQLite store shared
+by all workers. On each new question the most similar stored examples are
+retrieved with a local TF-IDF index over character n-grams (no embedding
+service) and shown to the model, so recurring question families reuse joins
+that already worked.
+"""
+
+import math
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import Counter, defaultdict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import metrics
+
+EXAMPLE_STORE_PATH = Path(
+    os.getenv("EXAMPLE_STORE_PATH", str(Path(__file__).parent.parent / "data" / "examples.db"))
+)
+
+# Oldest examples are dropped beyond this many
+MAX_EXAMPLES = int(os.getenv("MAX_EXAMPLES", "500"))
+
+# Examples injected per prompt, and how similar they must be to count
+EXAMPLES_PER_PROMPT = 3
+MIN_SIMILARITY = 0.3
+
+# A new example this similar to a stored one (with the same SQL) is a duplicate
+DUPLICATE_SIMILARITY = 0.9
+
+NGRAM_SIZES = (3, 4)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS examples (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    question TEXT NOT NULL,
+    normalized TEXT NOT NULL UNIQUE,
+    sql TEXT NOT NULL,
+    created_at REAL NOT NULL
+)
+"""
+
+
+@dataclass
+class Example:
+    """A verified question/SQL pair and its similarity to the current question."""
+    question: str
+    sql: str
+    similarity: float = 0.0
+
+
+def _normalize(question: str) -> str:
+    return " ".join(re.findall(r"[a-z0-9]+", question.lower()))
+
+
+def _features(normalized: str) -> Counter:
+    """Character n-grams (word-boundary padded) plus whole words."""
+    features = Counter(f"w:{word}" for word in normalized.split())
+    padded = f" {normalized} "
+    for n in NGRAM_SIZES:
+        features.update(padded[i:i + n] for i in range(len(padded) - n + 1))
+    return features
+
+
+class ExampleIndex:
+    """In-memory TF-IDF index with an inverted list per feature."""
+
+    def __init__(self, rows: List[Tuple[int, str, str, str]]):
+        self.examples = [Example(question=q, sql=s) for _, q, _, s in rows]
+        features = [_features(n) for _, _, n, _ in rows]
+        doc_freq = Counter(f for doc in features for f in doc)
+        total = len(rows)
+        self.idf = {f: math.log((1 + total) / (1 + df)) + 1 for f, df in doc_freq.items()}
+        self.postings: Dict[str, List[Tuple[int, float]]] = defaultdict(list)
+        for doc_id, doc in enumerate(features):
+            for feature, weight in self._vector(doc).items():
+                self.postings[feature].append((doc_id, weight))
+
+    def _vector(self, features: Counter) -> Dict[str, float]:
+        """L2-normalized (1 + log tf) * idf weights; unseen features get the maximum idf."""
+        default_idf = max(self.idf.values(), default=1.0)
+        weights = {f: (1 + math.log(tf)) * self.idf.get(f, default_idf) for f, tf in features.items()}
+        norm = math.sqrt(sum(w * w for w in weights.values())) or 1.0
+        return {f: w / norm for f, w in weights.items()}
+
+    def search(self, question: str, k: int) -> List[Example]:
+        """Return the k most similar examples by cosine similarity."""
+        scores: Dict[int, float] = defaultdict(float)
+        for feature, weight in self._vector(_features(_normalize(question))).items():
+            for doc_id, doc_weight in self.postings.get(feature, ()):
+                scores[doc_id] += weight * doc_weight
+        best = sorted(scores.items(), key=lambda item: item[1], reverse=True)[:k]
+        return [
+            Example(question=self.examples[i].question, sql=self.examples[i].sql, similarity=score)
+            for i, score in best
+        ]
+
+
+class ExampleStore:
+    """SQLite-backed example store with a lazily rebuilt in-process index."""
+
+    def __init__(self, path: Path = EXAMPLE_STORE_PATH, max_examples: int = MAX_EXAMPLES):
+        self.path = path
+        self.max_examples = max_examples
+        self._index: Optional[ExampleIndex] = None
+        self._version: Optional[Tuple[int, int]] = None
+        self._lock = threading.Lock()
+        path.parent.mkdir(parents=True, exist_ok=True)
+        conn = self._connect()
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(SCHEMA)
+        finally:
+            conn.close()
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path, timeout=5)
+
+    def _current_index(self) -> ExampleIndex:
+        """Rebuild the index if any worker has added or removed examples since the last build."""
+        conn = self._connect()
+        try:
+            version = conn.execute("SELECT COUNT(*), COALESCE(MAX(id), 0) FROM examples").fetchone()
+            with self._lock:
+                if self._index is None or version != self._version:
+                    rows = conn.execute("SELECT id, question, normalized, sql FROM examples").fetchall()
+                    self._index = ExampleIndex(rows)
+                    self._version = version
+                return self._index
+        finally:
+            conn.close()
+
+    def find(self, question: str, k: int = EXAMPLES_PER_PROMPT, min_similarity: float = MIN_SIMILARITY) -> List[Example]:
+        """Return up to k stored examples similar enough to the question."""
+        try:
+            matches = self._current_index().search(question, k)
+        except sqlite3.Error:
+            return []
+        found = [m for m in matches if m.similarity >= min_similarity]
+        metrics.increment("examples.retrieved", len(found))
+        return found
+
+    def add(self, question: str, sql: str) -> None:
+        """
+        Save a question whose SQL succeeded.
+
+        The same question replaces its earlier SQL; a near-identical question
+        with the same SQL is skipped. The oldest examples are dropped once the
+        store exceeds max_examples.
+        """
+        normalized = _normalize(question)
+        if not normalized:
+            return
+        try:
+            for match in self._current_index().search(question, 1):
+                if match.similarity >= DUPLICATE_SIMILARITY and match.sql.strip() == sql.strip():
+                    return
+
+            conn = self._connect()
+            try:
+                with conn:
+                    conn.execute(
+                        "INSERT OR REPLACE INTO examples (question, normalized, sql, created_at) VALUES (?, ?, ?, ?)",
+                        (question.strip(), normalized, sql.strip(), time.time())
+                    )
+                    conn.execute(
+                        "DELETE FROM examples WHERE id NOT IN "
+                        "(SELECT id FROM examples ORDER BY created_at DESC LIMIT ?)",
+                        (self.max_examples,)
+                    )
+            finally:
+                conn.close()
+            metrics.increment("examples.added")
+        except sqlite3.Error:
+            pass
+
+
+_store: Optional[ExampleStore] = None
+_store_lock = threading.Lock()
+
+
+def get_example_store() -> Optional[ExampleStore]:
+    """Return the process-wide example store, or None if it can't be opened."""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                try:
+                    _store = ExampleStore()
+                except (sqlite3.Error, OSError):
+                    return None
+    return _store
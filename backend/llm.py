@@ -3,31 +3,181 @@ OpenAI LLM integration for SQL generation and response formatting.
 """
 
 import os
-from typing import List, Dict
-from openai import OpenAI
+import threading
+import time
+from dataclasses import dataclass
+from typing import List, Dict, Optional, Set, Tuple
 
-# Initialize client (API key from environment)
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+import metrics
+from cancellation import QueryCancelled, check_cancelled, is_cancelled, on_cancel
+from database import get_schema_features
+from routing import FAST_TIER, REASONING_TIER
+from summarize import summarize_results
 
-MODEL = "gpt-5-mini-2025-08-07"
+# The openai package is slow to import, so the client is built on first use
+# rather than at import time (see get_client)
+_client = None
+_client_lock = threading.Lock()
+
+MODEL = os.getenv("LLM_REASONING_MODEL", "gpt-5-mini-2025-08-07")
+FAST_MODEL = os.getenv("LLM_FAST_MODEL", "gpt-4.1-mini")
 
 # Token limits for reasoning model - needs higher limits to account for
 # internal reasoning tokens that are consumed before generating visible output
 SQL_GENERATION_TOKENS = 1500
 RESPONSE_FORMATTING_TOKENS = 2500
 
+# The fast model has no hidden reasoning, so visible output is all it needs
+FAST_SQL_GENERATION_TOKENS = 400
+FAST_RESPONSE_FORMATTING_TOKENS = 600
+
+# Stream completions so a call can be abandoned mid-generation when the client
+# disconnects (closing the stream stops generation). A model whose streaming
+# requests are rejected (e.g. an account not verified to stream it) is called
+# without streaming from then on; those calls are only cancelled between stages.
+LLM_STREAMING = os.getenv("LLM_STREAMING", "1") == "1"
+
+_non_streaming_models: Set[str] = set()
+
+
+@dataclass
+class ModelTier:
+    """A model and its token budgets in the cascade."""
+    model: str
+    sql_tokens: int
+    format_tokens: int
+
+
+MODEL_TIERS = {
+    FAST_TIER: ModelTier(FAST_MODEL, FAST_SQL_GENERATION_TOKENS, FAST_RESPONSE_FORMATTING_TOKENS),
+    REASONING_TIER: ModelTier(MODEL, SQL_GENERATION_TOKENS, RESPONSE_FORMATTING_TOKENS),
+}
+
+# Title, salary and experience rules (7, 8, 10) for databases with the derived
+# columns, and for older builds that only have the raw ones
+DERIVED_COLUMN_RULES = (
+    "7. For job titles, prefer title_family_id (join title_families) or normalized_title (lowercase); fall back to LIKE with wildcards (e.g., normalized_title LIKE '%data scientist%') when no family fits",
+    "8. For salary questions use the annualized columns (annual_salary, annual_min_salary, annual_med_salary, annual_max_salary) - they are already yearly, so never mix pay periods by hand",
+    "10. Experience levels are in formatted_experience_level column; experience_level_code orders them by seniority (1 Internship ... 6 Executive)",
+)
+RAW_COLUMN_RULES = (
+    "7. Use LIKE with wildcards for text searches on job titles (e.g., title LIKE '%data scientist%')",
+    "8. The postings table has salary info (max_salary, med_salary, min_salary) - use these for salary questions",
+    "10. Experience levels are in formatted_experience_level column",
+)
+
+
+def get_client():
+    """Return the shared OpenAI client, importing openai and building it on first call."""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                from openai import OpenAI
+
+                # API key from environment
+                _client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+    return _client
+
+
+def _chat(tier: str, stage: str, messages: List[Dict[str, str]], max_tokens: int) -> Optional[str]:
+    """
+    Call the chat completions API on a tier's model and return the reply text.
 
-def generate_sql(question: str, schema: str) -> str:
+    Records latency and token usage per tier. Raises QueryCancelled if the
+    request is cancelled before or during the call.
+    """
+    check_cancelled()
+    client = get_client()
+    model = MODEL_TIERS[tier].model
+    start = time.perf_counter()
+    if LLM_STREAMING and model not in _non_streaming_models:
+        try:
+            content, usage = _stream_chat(client, tier, messages, max_tokens)
+        except Exception as e:
+            if not _streaming_rejected(e):
+                raise
+            _non_streaming_models.add(model)
+            metrics.increment("llm.streaming_rejected")
+            content, usage = _complete_chat(client, tier, messages, max_tokens)
+    else:
+        content, usage = _complete_chat(client, tier, messages, max_tokens)
+    metrics.observe(f"llm.{tier}.{stage}", (time.perf_counter() - start) * 1000)
+    metrics.increment(f"llm.{tier}.calls")
+    if usage is not None:
+        metrics.increment(f"llm.{tier}.tokens", usage.total_tokens)
+    return content
+
+
+def _streaming_rejected(error: Exception) -> bool:
+    """Whether the API refused a request because it asked to stream."""
+    from openai import BadRequestError
+
+    return isinstance(error, BadRequestError) and "stream" in str(error).lower()
+
+
+def _complete_chat(client, tier: str, messages: List[Dict[str, str]], max_tokens: int):
+    """Request a completion without streaming. Returns (content, usage)."""
+    response = client.chat.completions.create(
+        model=MODEL_TIERS[tier].model,
+        messages=messages,
+        max_completion_tokens=max_tokens
+    )
+    check_cancelled()
+    return response.choices[0].message.content, getattr(response, "usage", None)
+
+
+def _stream_chat(client, tier: str, messages: List[Dict[str, str]], max_tokens: int):
+    """Stream a completion, closing the stream if the request is cancelled. Returns (content, usage)."""
+    stream = client.chat.completions.create(
+        model=MODEL_TIERS[tier].model,
+        messages=messages,
+        max_completion_tokens=max_tokens,
+        stream=True,
+        stream_options={"include_usage": True}
+    )
+    parts, usage = [], None
+    try:
+        with on_cancel(stream.close):
+            for chunk in stream:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    parts.append(chunk.choices[0].delta.content)
+                if getattr(chunk, "usage", None) is not None:
+                    usage = chunk.usage
+    except Exception:
+        # Closing the stream from another thread surfaces as a read error here
+        if not is_cancelled():
+            raise
+    finally:
+        stream.close()
+
+    if is_cancelled():
+        metrics.increment("cancel.llm_calls")
+        raise QueryCancelled("LLM call cancelled")
+    return "".join(parts), usage
+
+
+def generate_sql(
+    question: str,
+    schema: str,
+    tier: str = REASONING_TIER,
+    examples: Optional[List[Tuple[str, str]]] = None
+) -> str:
     """
     Generate SQL query from natural language question.
 
     Args:
         question: User's natural language question
         schema: Database schema documentation
+        tier: Model tier to use (FAST_TIER or REASONING_TIER)
+        examples: Similar (question, sql) pairs that ran successfully before, used as few-shot examples
 
     Returns:
         Generated SQL query string
     """
+    title_rule, salary_rule, experience_rule = (
+        DERIVED_COLUMN_RULES if get_schema_features().derived_columns else RAW_COLUMN_RULES
+    )
     system_prompt = f"""You are an expert SQL query generator. Your task is to convert natural language questions into valid SQLite queries.
 
 {schema}
@@ -39,24 +189,31 @@ IMPORTANT RULES:
 4. Use appropriate JOINs when data spans multiple tables
 5. CRITICAL: The "skills" table contains JOB FUNCTIONS (like "Information Technology", "Sales", "Management"), NOT technical skills (like "Python", "SQL"). When users ask about "skills", query the skills table but the results are job function categories.
 6. For industry lookups, join job_industries with industries table using industry_id
-7. Use LIKE with wildcards for text searches on job titles (e.g., title LIKE '%data scientist%')
-8. The postings table has salary info (max_salary, med_salary, min_salary) - use these for salary questions
+{title_rule}
+{salary_rule}
 9. For remote jobs, check remote_allowed = 1
-10. Experience levels are in formatted_experience_level column
+{experience_rule}
 
 If the question cannot be answered with the available data, return:
 SELECT 'This question cannot be answered with the available data.' as message"""
 
-    response = client.chat.completions.create(
-        model=MODEL,
-        messages=[
+    if examples:
+        examples_text = "\n\n".join(f"Question: {q}\nSQL: {s}" for q, s in examples)
+        system_prompt += f"""
+
+VERIFIED EXAMPLES (similar questions and SQL that ran successfully - reuse their joins and filters where they fit):
+{examples_text}"""
+
+    sql = _chat(
+        tier,
+        "generate_sql",
+        [
             {"role": "system", "content": system_prompt},
             {"role": "user", "content": question}
         ],
-        max_completion_tokens=SQL_GENERATION_TOKENS
+        MODEL_TIERS[tier].sql_tokens
     )
 
-    sql = response.choices[0].message.content
     if not sql:
         raise ValueError("LLM returned empty SQL response")
 
@@ -74,6 +231,8 @@ def generate_sql_with_error_retry(question: str, schema: str, error_sql: str, er
     """
     Retry SQL generation with error context.
 
+    Always uses the reasoning tier - this is the escalation path of the cascade.
+
     Args:
         question: Original question
         schema: Database schema
@@ -95,16 +254,16 @@ ERROR MESSAGE:
 
 Generate a corrected SQL query that fixes this error. Return ONLY the SQL query - no explanations."""
 
-    response = client.chat.completions.create(
-        model=MODEL,
-        messages=[
+    sql = _chat(
+        REASONING_TIER,
+        "retry_sql",
+        [
             {"role": "system", "content": system_prompt},
             {"role": "user", "content": question}
         ],
-        max_completion_tokens=SQL_GENERATION_TOKENS
+        MODEL_TIERS[REASONING_TIER].sql_tokens
     )
 
-    sql = response.choices[0].message.content
     if not sql:
         raise ValueError("LLM returned empty SQL response on retry")
 
@@ -118,7 +277,7 @@ Generate a corrected SQL query that fixes this error. Return ONLY the SQL query
     return sql
 
 
-def format_response(question: str, results: List[Dict], columns: List[str]) -> str:
+def format_response(question: str, results: List[Dict], columns: List[str], tier: str = REASONING_TIER) -> str:
     """
     Convert SQL results into natural language response.
 
@@ -126,6 +285,7 @@ def format_response(question: str, results: List[Dict], columns: List[str]) -> s
         question: Original question
         results: Query results as list of dicts
         columns: Column names
+        tier: Model tier to use (FAST_TIER or REASONING_TIER)
 
     Returns:
         Natural language response
@@ -137,17 +297,9 @@ def format_response(question: str, results: List[Dict], columns: List[str]) -> s
     if len(results) == 1 and "message" in results[0]:
         return results[0]["message"]
 
-    # Truncate results for prompt if too many
-    results_for_prompt = results[:50]
-
-    # Format results as readable text
-    results_text = f"Columns: {', '.join(columns)}\n\nResults ({len(results)} rows):\n"
-    for i, row in enumerate(results_for_prompt, 1):
-        row_text = ", ".join(f"{k}: {v}" for k, v in row.items())
-        results_text += f"{i}. {row_text}\n"
-
-    if len(results) > 50:
-        results_text += f"... and {len(results) - 50} more rows"
+    # Send a fixed-size digest (column statistics + leading rows) rather than every row,
+    # so prompt size doesn't grow with result width or row count
+    results_text = summarize_results(results, columns)
 
     system_prompt = """You are a helpful data analyst assistant. Convert these SQL query results into a clear, conversational response.
 
@@ -157,7 +309,8 @@ RULES:
 3. Format lists nicely when appropriate
 4. Don't mention SQL or databases - just present the insights naturally
 5. If showing rankings or top items, format them as a numbered list
-6. IMPORTANT: If the results contain skill_name data, these are actually JOB FUNCTION CATEGORIES (like "Information Technology", "Sales"), not technical skills. Refer to them as "job functions" or "job categories" rather than "skills"."""
+6. IMPORTANT: If the results contain skill_name data, these are actually JOB FUNCTION CATEGORIES (like "Information Technology", "Sales"), not technical skills. Refer to them as "job functions" or "job categories" rather than "skills".
+7. The results are given as a digest: column statistics over ALL rows plus the leading rows. Quote exact numbers from it; don't invent values for rows that aren't listed."""
 
     user_prompt = f"""Question: {question}
 
@@ -165,16 +318,16 @@ RULES:
 
 Provide a natural language response summarizing these results."""
 
-    response = client.chat.completions.create(
-        model=MODEL,
-        messages=[
+    content = _chat(
+        tier,
+        "format_response",
+        [
             {"role": "system", "content": system_prompt},
             {"role": "user", "content": user_prompt}
         ],
-        max_completion_tokens=RESPONSE_FORMATTING_TOKENS
+        MODEL_TIERS[tier].format_tokens
     )
 
-    content = response.choices[0].message.content
     if not content:
         # Fallback if LLM returns empty content
         return f"Found {len(results)} results for your query."
@@ -2,23 +2,75 @@
 FastAPI application for NL-to-SQL job market insights.
 """
 
+import asyncio
 import os
+import threading
+import time
+from contextlib import asynccontextmanager
 from typing import Optional, List, Dict, Any
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Query, Request, Response
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import RedirectResponse
 from pydantic import BaseModel
 from dotenv import load_dotenv
 
 # Load environment variables
 load_dotenv()
 
-from query_pipeline import process_query
-from visualization import detect_visualization
+import metrics
+
+# The query pipeline (openai client, cache, example store) is imported on first
+# use, not here, so a cold instance answers its health check without paying for
+# it. Check the import cost with scripts/profile_startup.py.
+
+# How long browsers and shared caches may reuse a GET /query answer without
+# revalidating. After that they revalidate with If-None-Match; the ETag changes
+# when the database is rebuilt.
+QUERY_CACHE_MAX_AGE = int(os.getenv("QUERY_CACHE_MAX_AGE", "3600"))
+
+# How often a running /query checks whether its client has disconnected
+DISCONNECT_POLL_SECONDS = float(os.getenv("DISCONNECT_POLL_SECONDS", "0.5"))
+
+# Status logged for requests abandoned by the client (nginx convention; never received)
+CLIENT_CLOSED_REQUEST = 499
+
+# Import the pipeline in a background thread right after startup, so the first
+# query usually doesn't pay for it either
+WARM_START = os.getenv("WARM_START", "1") == "1"
+
+
+def warm_up():
+    """Import the query pipeline and build the LLM client, schema and entity vocabulary ahead of the first query."""
+    start = time.perf_counter()
+    try:
+        import query_pipeline  # noqa: F401
+        import visualization  # noqa: F401
+        from database import get_schema_info
+        from llm import get_client
+        from sql_templates import load_vocabulary
+
+        get_schema_info()
+        get_client()
+        load_vocabulary()
+    except Exception:
+        # The first query will surface the real error
+        return
+    metrics.observe("startup.warm_up", (time.perf_counter() - start) * 1000)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if WARM_START:
+        threading.Thread(target=warm_up, name="warm-up", daemon=True).start()
+    yield
+
 
 app = FastAPI(
     title="Job Market Insights API",
     description="Natural language interface for querying LinkedIn job market data",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # CORS configuration for frontend
@@ -38,7 +90,7 @@ class QueryRequest(BaseModel):
 
 class VisualizationConfigModel(BaseModel):
     """Configuration for data visualization."""
-    type: str  # "bar", "pie", "table", "none"
+    type: str  # "bar", "pie", "line", "table", "none"
     x_key: Optional[str] = None
     y_key: Optional[str] = None
     label_key: Optional[str] = None
@@ -53,6 +105,7 @@ class QueryResponse(BaseModel):
     data: Optional[List[Dict[str, Any]]] = None
     columns: Optional[List[str]] = None
     visualization: Optional[VisualizationConfigModel] = None
+    chart_data: Optional[List[Dict[str, Any]]] = None  # reduced rows for the chart, when data is too large to plot
 
 
 class ExampleQuery(BaseModel):
@@ -96,45 +149,171 @@ async def root():
     return {"status": "healthy", "service": "Job Market Insights API"}
 
 
-@app.post("/query", response_model=QueryResponse)
-async def query(request: QueryRequest):
+def validate_question(question: str):
+    """Reject empty or overlong questions with a 400."""
+    if not question.strip():
+        raise HTTPException(status_code=400, detail="Question cannot be empty")
+
+    if len(question) > 500:
+        raise HTTPException(status_code=400, detail="Question too long (max 500 characters)")
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """If-None-Match comparison (weak, per RFC 9110): any listed tag, W/ prefix ignored, or *."""
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*" or candidate.removeprefix("W/") == etag:
+            return True
+    return False
+
+
+class ClientDisconnected(Exception):
+    """The client went away before its answer was ready."""
+
+
+async def run_until_disconnect(http_request: Request, question: str):
     """
-    Process a natural language question about job market data.
+    Run the pipeline in the threadpool, cancelling it if the client disconnects.
 
-    The system will:
-    1. Convert your question to SQL
-    2. Execute the query against the database
-    3. Return insights in natural language
+    Cancellation closes the pipeline's pending LLM stream and interrupts its
+    running SQL statement, so the worker thread and admission slot are freed
+    for live requests instead of finishing an answer nobody will read.
     """
-    if not request.question.strip():
-        raise HTTPException(status_code=400, detail="Question cannot be empty")
+    from cancellation import CancelToken, QueryCancelled
+    from query_pipeline import process_query
 
-    if len(request.question) > 500:
-        raise HTTPException(status_code=400, detail="Question too long (max 500 characters)")
+    token = CancelToken()
+    task = asyncio.ensure_future(run_in_threadpool(process_query, question, cancel_token=token))
+    while True:
+        done, _ = await asyncio.wait({task}, timeout=DISCONNECT_POLL_SECONDS)
+        if done:
+            return task.result()
+        if await http_request.is_disconnected():
+            break
 
-    result = process_query(request.question)
+    metrics.increment("cancel.requests")
+    # The abort callbacks (closing an LLM stream, interrupting SQLite, waking the
+    # admission queue) can block, so they run off the event loop
+    await run_in_threadpool(token.cancel, "client disconnected")
+    try:
+        await task
+    except QueryCancelled:
+        pass
+    raise ClientDisconnected()
 
-    # Detect visualization type (may transform data for pivoted single-row results)
-    viz_result = detect_visualization(result.raw_results, result.columns)
 
-    # Use transformed data if available, otherwise use original
-    chart_data = viz_result.data if viz_result.data is not None else result.raw_results
-    chart_columns = viz_result.columns if viz_result.columns is not None else result.columns
+async def answer_question(
+    http_request: Request,
+    question: str,
+    response: Optional[Response] = None,
+    cache_headers: Optional[Dict[str, str]] = None
+):
+    """
+    Run the pipeline for a validated question and attach the chart config.
 
-    return QueryResponse(
+    With cache_headers (GET), they are set on response for answers that may be
+    reused; failed or degraded answers, 503s and cancelled requests get
+    Cache-Control: no-store instead.
+    """
+    from admission import Overloaded
+    from visualization import detect_visualization
+
+    # Run the blocking pipeline off the event loop; admission control inside it
+    # limits how many requests are in their LLM stages at once
+    no_store = {"Cache-Control": "no-store"} if cache_headers is not None else {}
+    start = time.perf_counter()
+    try:
+        result = await run_until_disconnect(http_request, question)
+    except ClientDisconnected:
+        return Response(status_code=CLIENT_CLOSED_REQUEST, headers=no_store)
+    except Overloaded as e:
+        raise HTTPException(
+            status_code=503,
+            detail=f"Service is busy ({e}). Please retry shortly.",
+            headers={"Retry-After": str(e.retry_after), **no_store}
+        )
+    metrics.observe("query.pipeline", (time.perf_counter() - start) * 1000)
+
+    # Detect visualization type (large results also get reduced, chart-sized data)
+    viz_result = detect_visualization(result.raw_results, result.columns)
+
+    body = QueryResponse(
         success=result.success,
         response=result.response,
         sql=result.sql,
         error=result.error,
-        data=chart_data,
-        columns=chart_columns,
+        data=result.raw_results,
+        columns=result.columns,
         visualization=VisualizationConfigModel(
             type=viz_result.config.type,
             x_key=viz_result.config.x_key,
             y_key=viz_result.config.y_key,
             label_key=viz_result.config.label_key
-        )
+        ),
+        chart_data=viz_result.data
     )
+    if response is not None and cache_headers is not None:
+        if result.success and result.cacheable:
+            response.headers.update(cache_headers)
+        else:
+            response.headers.update(no_store)
+    return body
+
+
+@app.post("/query", response_model=QueryResponse)
+async def query(request: QueryRequest, http_request: Request):
+    """
+    Process a natural language question about job market data.
+
+    The system will:
+    1. Convert your question to SQL
+    2. Execute the query against the database
+    3. Return insights in natural language
+    """
+    validate_question(request.question)
+    return await answer_question(http_request, request.question)
+
+
+@app.get("/query", response_model=QueryResponse)
+async def query_get(
+    request: Request,
+    response: Response,
+    question: str = Query(..., description="Natural language question")
+):
+    """
+    Cacheable variant of POST /query.
+
+    The URL is keyed on the normalized question: other spellings of it ("What
+    are...?" vs "what are...") are redirected to the normalized URL, so
+    browsers and proxies hold one copy per question. Answers carry a strong
+    ETag derived from the normalized question and the database fingerprint,
+    plus Cache-Control. A request whose If-None-Match matches gets 304 Not
+    Modified without running the pipeline. Failed answers, and answers whose
+    formatting failed, are not cacheable.
+    """
+    validate_question(question)
+
+    from query_pipeline import answer_etag, normalize_question
+
+    cache_control = f"public, max-age={QUERY_CACHE_MAX_AGE}"
+    normalized = normalize_question(question)
+    if question != normalized:
+        metrics.increment("http.normalize_redirect")
+        return RedirectResponse(
+            str(request.url.include_query_params(question=normalized)),
+            status_code=301,
+            headers={"Cache-Control": cache_control}
+        )
+
+    etag = answer_etag(normalized)
+    cache_headers = {"ETag": etag, "Cache-Control": cache_control}
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        metrics.increment("http.not_modified")
+        return Response(status_code=304, headers=cache_headers)
+
+    return await answer_question(request, normalized, response, cache_headers)
 
 
 @app.get("/examples", response_model=List[ExampleQuery])
@@ -143,6 +322,14 @@ async def get_examples():
     return EXAMPLE_QUERIES
 
 
+@app.get("/metrics")
+async def get_metrics():
+    """Per-worker counters and latency summaries, plus shared cache usage."""
+    from cache import get_cache
+
+    return {"metrics": metrics.snapshot(), "cache": get_cache().stats()}
+
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
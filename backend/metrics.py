@@ -0,0 +1,63 @@
+"""
+Lightweight in-process metrics (counters, gauges, latency summaries).
+Exposed as JSON by the /metrics endpoint - no external metrics service needed.
+"""
+
+import threading
+from collections import defaultdict, deque
+from typing import Any, Deque, Dict
+
+# Number of recent samples kept per timing for percentile estimates
+TIMING_WINDOW = 1000
+
+_lock = threading.Lock()
+_counters: Dict[str, float] = defaultdict(float)
+_gauges: Dict[str, float] = {}
+_timings: Dict[str, Deque[float]] = defaultdict(lambda: deque(maxlen=TIMING_WINDOW))
+_timing_counts: Dict[str, int] = defaultdict(int)
+
+
+def increment(name: str, value: float = 1) -> None:
+    """Add to a counter."""
+    with _lock:
+        _counters[name] += value
+
+
+def set_gauge(name: str, value: float) -> None:
+    """Record the current value of a gauge."""
+    with _lock:
+        _gauges[name] = value
+
+
+def observe(name: str, value_ms: float) -> None:
+    """Record a latency sample in milliseconds."""
+    with _lock:
+        _timings[name].append(value_ms)
+        _timing_counts[name] += 1
+
+
+def _percentile(sorted_values: list, pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    index = min(len(sorted_values) - 1, int(round(pct / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def snapshot() -> Dict[str, Any]:
+    """Return all metrics as a JSON-serializable dict."""
+    with _lock:
+        counters = dict(_counters)
+        gauges = dict(_gauges)
+        timings = {name: sorted(samples) for name, samples in _timings.items() if samples}
+        timing_counts = dict(_timing_counts)
+
+    summaries = {}
+    for name, values in timings.items():
+        summaries[name] = {
+            "count": timing_counts[name],
+            "avg_ms": round(sum(values) / len(values), 2),
+            "p50_ms": round(_percentile(values, 50), 2),
+            "p95_ms": round(_percentile(values, 95), 2),
+            "max_ms": round(values[-1], 2),
+        }
+
+    return {"counters": counters, "gauges": gauges, "timings": summaries}
@@ -0,0 +1,218 @@
+"""
+Persistent log of executed queries (SQL, plan, latency) for workload analysis.
+
+Every statement run through database.execute_query is appended to a small
+SQLite store kept next to the main database. scripts/index_advisor.py replays
+this log to propose indexes that match what the LLM actually generates.
+Templated statements are logged once per template, with their bound parameters.
+
+Logging stays off the request path: record_query only queues the entry, and a
+background writer thread explains each statement against the database it ran
+on, appends entries in batches over one long-lived connection, and keeps the
+newest QUERY_LOG_MAX_ROWS rows.
+"""
+
+import json
+import os
+import queue
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+import metrics
+
+# Log location - override with QUERY_LOG_PATH, disable with QUERY_LOG_ENABLED=0
+QUERY_LOG_PATH = Path(
+    os.getenv("QUERY_LOG_PATH", str(Path(__file__).parent.parent / "data" / "query_log.db"))
+)
+QUERY_LOG_ENABLED = os.getenv("QUERY_LOG_ENABLED", "1") != "0"
+
+# Rows kept in the log; older ones are deleted as new ones are written
+QUERY_LOG_MAX_ROWS = int(os.getenv("QUERY_LOG_MAX_ROWS", "50000"))
+
+# Entries waiting for the writer; if it falls this far behind (e.g. the log file
+# is locked), new entries are dropped rather than blocking queries
+QUEUE_SIZE = 1000
+
+# Entries written per transaction
+BATCH_SIZE = 100
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS query_log (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    logged_at REAL NOT NULL,
+    sql TEXT NOT NULL,
+    plan TEXT,
+    latency_ms REAL,
+    row_count INTEGER,
+    error TEXT,
+    params TEXT
+)
+"""
+
+
+@dataclass
+class LogEntry:
+    """An executed query waiting to be written."""
+    sql: str
+    params: List[Any]
+    latency_ms: float
+    row_count: Optional[int]
+    error: Optional[str]
+    db_path: Optional[Path]     # database to explain the statement against
+    logged_at: float = field(default_factory=time.time)
+
+
+_queue: "queue.Queue[LogEntry]" = queue.Queue(maxsize=QUEUE_SIZE)
+_writer: Optional[threading.Thread] = None
+_writer_lock = threading.Lock()
+
+
+def _connect() -> sqlite3.Connection:
+    """Open the log store, creating it if needed."""
+    QUERY_LOG_PATH.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(QUERY_LOG_PATH, timeout=5)
+    # WAL lets several worker processes append without blocking readers
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute(SCHEMA)
+    # Logs created before templated queries have no params column
+    if "params" not in [row[1] for row in conn.execute("PRAGMA table_info(query_log)")]:
+        conn.execute("ALTER TABLE query_log ADD COLUMN params TEXT")
+    return conn
+
+
+def format_plan(plan_rows: List[tuple]) -> str:
+    """
+    Render EXPLAIN QUERY PLAN rows as an indented tree.
+
+    Args:
+        plan_rows: Rows of (id, parent, notused, detail)
+
+    Returns:
+        One plan step per line, indented by depth
+    """
+    depth = {0: -1}
+    lines = []
+    for node_id, parent, _, detail in plan_rows:
+        depth[node_id] = depth.get(parent, -1) + 1
+        lines.append("  " * depth[node_id] + detail)
+    return "\n".join(lines)
+
+
+def record_query(
+    sql: str,
+    latency_ms: float,
+    row_count: Optional[int] = None,
+    error: Optional[str] = None,
+    params: Sequence[Any] = (),
+    db_path: Optional[Path] = None
+) -> None:
+    """
+    Queue one executed query for the log.
+
+    Logging is best-effort: failures here must never break (or slow down) the
+    query itself, so this never blocks and never raises.
+
+    Args:
+        sql: The statement as executed
+        latency_ms: Execution time
+        row_count: Rows fetched, if the statement succeeded
+        error: Error message, if it failed
+        params: Values bound to its ? placeholders
+        db_path: SQLite database the writer explains the statement against (None: no plan)
+    """
+    if not QUERY_LOG_ENABLED:
+        return
+    _start_writer()
+    try:
+        _queue.put_nowait(LogEntry(sql, list(params), latency_ms, row_count, error, db_path))
+    except queue.Full:
+        metrics.increment("query_log.dropped")
+
+
+def flush(timeout: float = 5.0) -> bool:
+    """Wait until every queued entry has been written (for tests and scripts). Returns False on timeout."""
+    deadline = time.monotonic() + timeout
+    while _queue.unfinished_tasks:
+        if time.monotonic() >= deadline:
+            return False
+        time.sleep(0.01)
+    return True
+
+
+def _start_writer() -> None:
+    global _writer
+    if _writer is None:
+        with _writer_lock:
+            if _writer is None:
+                _writer = threading.Thread(target=_write_loop, name="query-log-writer", daemon=True)
+                _writer.start()
+
+
+def _write_loop() -> None:
+    conn = None
+    while True:
+        batch = [_queue.get()]
+        while len(batch) < BATCH_SIZE:
+            try:
+                batch.append(_queue.get_nowait())
+            except queue.Empty:
+                break
+        try:
+            if conn is None:
+                conn = _connect()
+            _write_batch(conn, batch)
+        except sqlite3.Error:
+            # Drop the batch and reconnect next time (e.g. the log file was removed)
+            metrics.increment("query_log.dropped", len(batch))
+            if conn is not None:
+                conn.close()
+                conn = None
+        finally:
+            for _ in batch:
+                _queue.task_done()
+
+
+def _write_batch(conn: sqlite3.Connection, batch: List[LogEntry]) -> None:
+    """Append a batch of entries in one transaction and trim the log to QUERY_LOG_MAX_ROWS."""
+    plans = _explain(batch)
+    with conn:
+        conn.executemany(
+            "INSERT INTO query_log (logged_at, sql, plan, latency_ms, row_count, error, params) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            [
+                (entry.logged_at, entry.sql, plan, entry.latency_ms, entry.row_count, entry.error,
+                 json.dumps(entry.params) if entry.params else None)
+                for entry, plan in zip(batch, plans)
+            ]
+        )
+        conn.execute(
+            "DELETE FROM query_log WHERE id <= (SELECT MAX(id) FROM query_log) - ?",
+            (QUERY_LOG_MAX_ROWS,)
+        )
+
+
+def _explain(batch: List[LogEntry]) -> List[Optional[str]]:
+    """EXPLAIN QUERY PLAN each entry on a read-only connection to its database (None if it can't be planned)."""
+    connections: Dict[Path, sqlite3.Connection] = {}
+    plans = []
+    try:
+        for entry in batch:
+            plan = None
+            if entry.db_path is not None:
+                try:
+                    conn = connections.get(entry.db_path)
+                    if conn is None:
+                        conn = sqlite3.connect(f"file:{entry.db_path}?mode=ro", uri=True, timeout=5)
+                        connections[entry.db_path] = conn
+                    plan = format_plan(conn.execute(f"EXPLAIN QUERY PLAN {entry.sql}", entry.params).fetchall())
+                except sqlite3.Error:
+                    pass
+            plans.append(plan)
+    finally:
+        for conn in connections.values():
+            conn.close()
+    return plans
@@ -2,10 +2,48 @@
 Query pipeline: Natural Language -> SQL -> Execute -> Natural Language Response
 """
 
-from dataclasses import dataclass
-from typing import Optional, List, Dict, Any
-from database import execute_query, validate_sql, get_schema_info
+import contextvars
+import json
+import os
+import re
+import time
+from concurrent.futures import FIRST_EXCEPTION, ThreadPoolExecutor, wait
+from dataclasses import dataclass, asdict
+from typing import Optional, List, Dict, Any, Sequence, Tuple
+import metrics
+from admission import Overloaded, llm_admission
+from cache import cached_get, get_cache, make_key
+from cancellation import CancelToken, check_cancelled, on_cancel, use_token
+from database import execute_query, validate_sql, get_schema_info, get_db_fingerprint
+from decompose import SubQuestion, decompose_question, merge_part_results
 from llm import generate_sql, generate_sql_with_error_retry, format_response
+from example_store import get_example_store
+from routing import FAST_TIER, REASONING_TIER, classify_question
+from sql_templates import learn_template, match_template
+
+# Cache lifetimes (seconds). Answers and results are also keyed on the database
+# fingerprint, so a rebuild invalidates them regardless of TTL.
+QUESTION_CACHE_TTL = int(os.getenv("QUESTION_CACHE_TTL", str(24 * 3600)))
+SQL_CACHE_TTL = int(os.getenv("SQL_CACHE_TTL", str(7 * 24 * 3600)))
+RESULT_CACHE_TTL = int(os.getenv("RESULT_CACHE_TTL", str(24 * 3600)))
+
+# Answer questions that differ from an earlier one only in an entity (company,
+# job family, industry, number) from its parameterized SQL (see sql_templates.py)
+SQL_TEMPLATES = os.getenv("SQL_TEMPLATES", "1") == "1"
+
+# Split "A vs B" comparison questions into parts answered in parallel (see decompose.py)
+QUESTION_DECOMPOSITION = os.getenv("QUESTION_DECOMPOSITION", "1") == "1"
+
+# Threads per worker process for the parts of decomposed questions (each part
+# generates its SQL and runs it against SQLite on one of these)
+SUBQUERY_WORKERS = int(os.getenv("SUBQUERY_WORKERS", "8"))
+_subquery_pool = ThreadPoolExecutor(max_workers=SUBQUERY_WORKERS, thread_name_prefix="subquery")
+
+# Appended to each part so the generated SQL answers only its own slice
+PART_HINT = (
+    "\n(This is one part of a comparison that is answered piece by piece. "
+    "Return the figures for exactly this case; don't group by or filter on the other compared cases.)"
+)
 
 
 @dataclass
@@ -17,13 +55,43 @@ class QueryResult:
     error: Optional[str] = None
     raw_results: Optional[List[Dict[str, Any]]] = None
     columns: Optional[List[str]] = None
+    cacheable: bool = True  # False for degraded answers (e.g. formatting failed) that mustn't be reused
+
+
+def normalize_question(question: str) -> str:
+    """Normalize a question for cache lookups (case, whitespace, trailing punctuation)."""
+    return re.sub(r"\s+", " ", question).strip().rstrip("?.! ").lower()
+
+
+def execute_query_cached(sql: str, params: Sequence[Any] = ()) -> Tuple[List[Dict[str, Any]], List[str]]:
+    """Execute SQL, reusing results computed by any worker for the same database build."""
+    key = make_key(get_db_fingerprint(), sql, *(json.dumps(p) for p in params))
+    cached = cached_get("result", key)
+    if cached is not None:
+        return cached["rows"], cached["columns"]
+
+    results, columns = execute_query(sql, params=params)
+    get_cache().set("result", key, {"rows": results, "columns": columns}, ttl=RESULT_CACHE_TTL)
+    return results, columns
 
 
-def process_query(question: str) -> QueryResult:
+def answer_etag(question: str) -> str:
+    """
+    Strong ETag for the answer to a question on the current database build.
+
+    Depends only on the normalized question and the database fingerprint, so it
+    can be checked against If-None-Match without running the pipeline.
+    """
+    return f'"{make_key("etag", get_db_fingerprint(), normalize_question(question))[:32]}"'
+
+
+def process_query(question: str, cancel_token: Optional[CancelToken] = None) -> QueryResult:
     """
     Process a natural language question through the full pipeline.
 
-    1. Generate SQL from question
+    0. Return a cached answer if this question was already answered
+    1. Generate SQL from question (or reuse cached SQL, or bind the question's
+       entities into the SQL template of a same-shaped question)
     2. Validate SQL
     3. Execute SQL
     4. If error, retry once
@@ -31,15 +99,109 @@ def process_query(question: str) -> QueryResult:
 
     Args:
         question: User's natural language question
+        cancel_token: Cancelled by the caller if the client goes away; stops
+            pending LLM calls and interrupts running SQL
 
     Returns:
         QueryResult with response, SQL, and status
+
+    Raises:
+        Overloaded if the LLM stages are saturated and the request can't be queued
+        QueryCancelled if cancel_token is cancelled before the answer is ready
+    """
+    normalized = normalize_question(question)
+    question_key = make_key(get_db_fingerprint(), normalized)
+
+    # Step 0: Answer from the shared question cache (no LLM call, bypasses admission)
+    cached = cached_get("question", question_key)
+    if cached is not None:
+        return QueryResult(**cached)
+
+    # Admission slots are only held around the LLM calls, so templated answers
+    # and SQL execution don't count against LLM_MAX_CONCURRENCY
+    with use_token(cancel_token):
+        return _answer_question(question, normalized, question_key)
+
+
+def _few_shot_examples(question: str) -> List[Tuple[str, str]]:
+    """Retrieve similar verified (question, sql) pairs for the SQL prompt."""
+    store = get_example_store()
+    if store is None:
+        return []
+    return [(example.question, example.sql) for example in store.find(question)]
+
+
+def _is_message_result(results: List[Dict[str, Any]]) -> bool:
+    """True if the SQL returned the "cannot be answered" message row instead of data."""
+    return len(results) == 1 and "message" in results[0]
+
+
+def _answer_from_template(question: str) -> Optional[Tuple[str, List[Dict[str, Any]], List[str]]]:
+    """
+    Answer from the SQL template of an earlier question with the same shape.
+
+    Returns:
+        (SQL with the values inlined, rows, columns), or None if there is no
+        template for the question's shape or it didn't produce data
+    """
+    if not SQL_TEMPLATES:
+        return None
+    bound = match_template(question)
+    if bound is None:
+        return None
+    try:
+        results, columns = execute_query_cached(bound.sql, bound.params)
+    except Exception:
+        metrics.increment("templates.failed")
+        return None
+    if _is_message_result(results):
+        metrics.increment("templates.failed")
+        return None
+    metrics.increment("templates.hit")
+    return bound.display_sql, results, columns
+
+
+def _answer_question(question: str, normalized: str, question_key: str) -> QueryResult:
+    """
+    Run steps 1-5 of the pipeline for a question that wasn't answered from cache.
+
+    Simple questions start on the fast model tier. They escalate to the
+    reasoning tier if the fast SQL fails validation, fails to execute, or
+    gives up with the "cannot be answered" message.
     """
     schema = get_schema_info()
+    route = classify_question(question)
+    tier = route.tier
+    escalated = False
+    metrics.increment(f"routing.{tier}")
+
+    # Comparison questions: answer each compared case with its own simple SQL, in parallel
+    parts = decompose_question(question) if QUESTION_DECOMPOSITION else None
+    if parts:
+        decomposed = _answer_decomposed(question, parts, schema)
+        if decomposed is not None:
+            sql, results, columns = decomposed
+            return _format_and_cache(question, normalized, question_key, tier, sql, results, columns, cache_sql=False)
+
+    # Step 1a: Same question about another entity -> bind it into that question's SQL (no generation)
+    cached_sql = cached_get("sql", normalized)
+    if cached_sql is None:
+        templated = _answer_from_template(question)
+        if templated is not None:
+            sql, results, columns = templated
+            return _format_and_cache(question, normalized, question_key, tier, sql, results, columns)
+
+    examples = _few_shot_examples(question)
 
-    # Step 1: Generate SQL
+    # Step 1: Generate SQL (SQL depends only on the question, not the data)
     try:
-        sql = generate_sql(question, schema)
+        if cached_sql is not None:
+            sql = cached_sql
+        else:
+            with llm_admission.admit():
+                sql = generate_sql(question, schema, tier, examples)
+    except Overloaded:
+        raise
     except Exception as e:
         return QueryResult(
             success=False,
@@ -50,6 +212,23 @@ def process_query(question: str) -> QueryResult:
 
     # Step 2: Validate SQL
     is_valid, validation_error = validate_sql(sql)
+    if not is_valid and tier == FAST_TIER:
+        # Escalate: let the reasoning model have a go before giving up
+        metrics.increment("escalation.validation")
+        escalated = True
+        try:
+            with llm_admission.admit():
+                sql = generate_sql(question, schema, REASONING_TIER, examples)
+        except Overloaded:
+            raise
+        except Exception as e:
+            return QueryResult(
+                success=False,
+                response="I encountered an error generating the query. Please try rephrasing your question.",
+                sql="",
+                error=str(e)
+            )
+        is_valid, validation_error = validate_sql(sql)
     if not is_valid:
         return QueryResult(
             success=False,
@@ -60,11 +239,17 @@ def process_query(question: str) -> QueryResult:
 
     # Step 3: Execute SQL
     try:
-        results, columns = execute_query(sql)
+        results, columns = execute_query_cached(sql)
+        metrics.increment("sql.first_shot.success")
     except Exception as e:
-        # Step 4: Retry once with error context
+        metrics.increment("sql.first_shot.failure")
+        # Step 4: Retry once with error context (on the reasoning tier)
+        if tier == FAST_TIER and not escalated:
+            metrics.increment("escalation.execution")
+        escalated = True
         try:
-            sql = generate_sql_with_error_retry(question, schema, sql, str(e))
+            with llm_admission.admit():
+                sql = generate_sql_with_error_retry(question, schema, sql, str(e))
 
             # Validate retry
             is_valid, validation_error = validate_sql(sql)
@@ -76,7 +261,9 @@ def process_query(question: str) -> QueryResult:
                     error=validation_error
                 )
 
-            results, columns = execute_query(sql)
+            results, columns = execute_query_cached(sql)
+        except Overloaded:
+            raise
         except Exception as retry_error:
             return QueryResult(
                 success=False,
@@ -85,17 +272,190 @@ def process_query(question: str) -> QueryResult:
                 error=str(retry_error)
             )
 
-    # Step 5: Format response
+    if tier == FAST_TIER and not escalated and _is_message_result(results):
+        # The fast model may give up on questions the reasoning model can answer
+        metrics.increment("escalation.unanswered")
+        try:
+            with llm_admission.admit():
+                escalated_sql = generate_sql(question, schema, REASONING_TIER, examples)
+            if validate_sql(escalated_sql)[0]:
+                escalated_results, escalated_columns = execute_query_cached(escalated_sql)
+                sql, results, columns = escalated_sql, escalated_results, escalated_columns
+        except Exception:
+            pass  # Keep the fast tier's answer (also if the LLM stages are saturated)
+
+    return _format_and_cache(question, normalized, question_key, tier, sql, results, columns)
+
+
+def _format_and_cache(
+    question: str,
+    normalized: str,
+    question_key: str,
+    tier: str,
+    sql: str,
+    results: List[Dict[str, Any]],
+    columns: List[str],
+    cache_sql: bool = True
+) -> QueryResult:
+    """Step 5 plus caching: narrate the results and remember what worked."""
+    # Format response (narrating results is easy even for escalated questions,
+    # so the starting tier is kept)
+    formatted = True
     try:
-        response = format_response(question, results, columns)
+        with llm_admission.admit():
+            response = format_response(question, results, columns, tier)
+    except Overloaded:
+        # Saturated: answer 503 rather than a degraded answer; the SQL result is cached for the retry
+        raise
     except Exception as e:
-        # If formatting fails, return raw results summary
+        # If formatting fails, return raw results summary (and don't cache it)
+        formatted = False
         response = f"Found {len(results)} results, but had trouble formatting the response."
 
-    return QueryResult(
+    result = QueryResult(
         success=True,
         response=response,
         sql=sql,
         raw_results=results,
-        columns=columns
+        columns=columns,
+        cacheable=formatted
     )
+
+    cache = get_cache()
+    if cache_sql:
+        cache.set("sql", normalized, sql, ttl=SQL_CACHE_TTL)
+
+        if results and not _is_message_result(results):
+            # Grow the few-shot example store from questions that produced real data
+            store = get_example_store()
+            if store is not None:
+                store.add(question, sql)
+            # Reuse the SQL for the same question about other entities
+            if SQL_TEMPLATES:
+                learn_template(question, sql, ttl=SQL_CACHE_TTL)
+    if formatted:
+        cache.set("question", question_key, asdict(result), ttl=QUESTION_CACHE_TTL)
+
+    return result
+
+
+def _answer_part(part: SubQuestion, schema: str) -> Tuple[str, List[Dict[str, Any]], List[str]]:
+    """
+    Generate, validate and run the SQL for one part of a decomposed question.
+
+    Parts are simple single-case questions, so they start on the tier the router
+    picks for them and get one error-context retry, like a whole question.
+
+    Raises:
+        ValueError if no valid SQL with real data could be produced
+    """
+    normalized = normalize_question(part.question)
+    tier = classify_question(part.question).tier
+    sql = cached_get("sql", normalized)
+    if sql is None:
+        templated = _answer_from_template(part.question)
+        if templated is not None:
+            get_cache().set("sql", normalized, templated[0], ttl=SQL_CACHE_TTL)
+            return templated
+        sql = generate_sql(part.question + PART_HINT, schema, tier, _few_shot_examples(part.question))
+    is_valid, validation_error = validate_sql(sql)
+    if not is_valid:
+        raise ValueError(validation_error)
+
+    try:
+        results, columns = execute_query_cached(sql)
+    except Exception as e:
+        sql = generate_sql_with_error_retry(part.question + PART_HINT, schema, sql, str(e))
+        is_valid, validation_error = validate_sql(sql)
+        if not is_valid:
+            raise ValueError(validation_error)
+        results, columns = execute_query_cached(sql)
+
+    if _is_message_result(results):
+        raise ValueError(f"Part could not be answered: {part.question}")
+
+    get_cache().set("sql", normalized, sql, ttl=SQL_CACHE_TTL)
+    store = get_example_store()
+    if store is not None and results:
+        store.add(part.question, sql)
+    if SQL_TEMPLATES and results:
+        learn_template(part.question, sql, ttl=SQL_CACHE_TTL)
+    return sql, results, columns
+
+
+def _answer_parts(parts: List[SubQuestion], schema: str) -> List[Tuple[str, List[Dict[str, Any]], List[str]]]:
+    """Answer several parts one after another (one admission slot's worth of LLM calls)."""
+    return [_answer_part(part, schema) for part in parts]
+
+
+def _answer_lane(
+    token: CancelToken,
+    parts: List[SubQuestion],
+    schema: str
+) -> List[Tuple[str, List[Dict[str, Any]], List[str]]]:
+    """Answer one lane's parts with the decomposition's own cancel token installed."""
+    with use_token(token):
+        return _answer_parts(parts, schema)
+
+
+def _answer_decomposed(
+    question: str,
+    parts: List[SubQuestion],
+    schema: str
+) -> Optional[Tuple[str, List[Dict[str, Any]], List[str]]]:
+    """
+    Answer the parts of a decomposed question in parallel and merge their rows.
+
+    Each part makes its own LLM calls, so parts only run concurrently as far as
+    the admission controller has free slots: one slot for the request plus any
+    extra ones it can take without waiting, held while the parts run. With no spare capacity the parts
+    run one after another. The lanes share a cancel token of their own, which
+    is cancelled when the request is or when any lane fails; the extra slots
+    are only released once every lane has stopped.
+
+    Returns:
+        (combined SQL for display, merged rows, merged columns), or None if any
+        part failed or the parts returned different columns - the caller then
+        answers the question with a single SQL
+    """
+    metrics.increment("decomposition.planned")
+    metrics.increment("decomposition.parts", len(parts))
+    start = time.perf_counter()
+    # The request's own slot covers the lanes; they take no slots of their own
+    with llm_admission.admit():
+        extra_slots = llm_admission.try_acquire(min(len(parts), SUBQUERY_WORKERS) - 1)
+        lanes_token = CancelToken()
+        try:
+            width = 1 + extra_slots
+            if width < len(parts):
+                metrics.increment("decomposition.serialized")
+            with on_cancel(lambda: lanes_token.cancel("request cancelled")):
+                lanes = [
+                    _subquery_pool.submit(
+                        contextvars.copy_context().run, _answer_lane, lanes_token, parts[lane::width], schema
+                    )
+                    for lane in range(width)
+                ]
+                _, running = wait(lanes, return_when=FIRST_EXCEPTION)
+                if running:
+                    # A lane failed: stop the others mid-call rather than letting them run on
+                    lanes_token.cancel("another part failed")
+                    wait(running)
+        finally:
+            llm_admission.release(extra_slots)
+    check_cancelled()
+    if any(future.exception() is not None for future in lanes):
+        metrics.increment("decomposition.fallback")
+        return None
+    by_lane = [future.result() for future in lanes]
+    metrics.observe("decomposition.parallel", (time.perf_counter() - start) * 1000)
+
+    # Lane k answered parts k, k + width, ...; put the outcomes back in plan order
+    outcomes = [by_lane[i % width][i // width] for i in range(len(parts))]
+    merged = merge_part_results(parts, [(rows, cols) for _, rows, cols in outcomes])
+    if merged is None:
+        metrics.increment("decomposition.fallback")
+        return None
+    results, columns = merged
+    sql = "\n\n".join(f"-- {part.segment}\n{part_sql}" for part, (part_sql, _, _) in zip(parts, outcomes))
+    return sql, results, columns
@@ -0,0 +1,67 @@
+"""
+Local question-complexity classifier for the model cascade.
+Purely rule-based - no LLM calls.
+
+Simple lookups ("How many remote jobs are available?") go to the fast tier;
+comparisons, ratios, trends and multi-part questions go straight to the
+reasoning tier.
+"""
+
+import re
+from dataclasses import dataclass, field
+from typing import List
+
+FAST_TIER = "fast"
+REASONING_TIER = "reasoning"
+
+# Phrases that usually need multi-step SQL (subqueries, conditional aggregates, ratios)
+COMPLEX_PATTERNS = [
+    (r"\bcompar", "comparison"),
+    (r"\b(vs\.?|versus)\b", "comparison"),
+    (r"\bdifference between\b", "comparison"),
+    (r"\b(more|less|higher|lower|fewer) than\b", "comparison"),
+    (r"\b(ratio|percent|percentage|proportion|share|fraction)\b", "ratio"),
+    (r"\b(trend|over time|growth|change|per month|per year)\b", "trend"),
+    (r"\b(correlat|relationship between)\w*", "correlation"),
+    (r"\b(median|percentile|distribution|standard deviation|variance)\b", "statistics"),
+    (r"\b(each|per|within|among)\b.*\b(top|most|highest|lowest|best)\b", "ranking within groups"),
+    (r"\b(top|most|highest|lowest)\b.*\b(each|per|within)\b", "ranking within groups"),
+    (r"\b(and also|as well as|along with|broken down by|split by)\b", "multi-part"),
+    (r"\bwhy\b", "explanation"),
+]
+
+# Questions longer than this are treated as multi-step
+MAX_SIMPLE_WORDS = 16
+
+
+@dataclass
+class Route:
+    """Which model tier to start a question on, and why."""
+    tier: str
+    reasons: List[str] = field(default_factory=list)
+
+
+def classify_question(question: str) -> Route:
+    """
+    Classify a question as simple (fast tier) or complex (reasoning tier).
+
+    Args:
+        question: User's natural language question
+
+    Returns:
+        Route with the starting tier and the signals that triggered it
+    """
+    text = question.lower()
+    reasons = []
+
+    for pattern, reason in COMPLEX_PATTERNS:
+        if re.search(pattern, text) and reason not in reasons:
+            reasons.append(reason)
+
+    if len(text.split()) > MAX_SIMPLE_WORDS:
+        reasons.append("long question")
+
+    if text.count("?") > 1 or len(re.findall(r"\band\b", text)) >= 2:
+        reasons.append("multi-part")
+
+    return Route(tier=REASONING_TIER if reasons else FAST_TIER, reasons=reasons)
@@ -0,0 +1,296 @@
+"""
+Parameterized SQL templates: answer variants of a question without generating SQL.
+Purely local - no LLM calls.
+
+"Average salary for registered nurses" and "average salary for data engineers"
+need the same SQL with a different literal. When a question's SQL succeeds, the
+question is reduced to its shape by replacing the entities it mentions (title
+families, industries, company names from the database, and numbers) with slots:
+
+    what is the average salary for {title_family}
+
+The SQL literals holding those entities become ? placeholders, and the template
+is cached under the shape. A later question with the same shape binds its own
+entities into the template and runs it as a prepared statement, so it only
+needs the formatting step.
+
+A template is only learned when every entity in the question maps to a literal
+in the SQL and every literal in the SQL (other than the LIMIT row count) maps to
+an entity, so a slot can never be silently ignored and no value from the
+original question (a state, a year, an abbreviation of the entity) is carried
+over into another question's answer.
+"""
+
+import re
+import threading
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+import metrics
+from cache import cached_get, get_cache, make_key
+from database import get_connection, get_db_fingerprint, get_schema_features
+
+# Known entity values per slot (slot, table, query), in priority order when one
+# phrase matches several. Sources whose table the database lacks are skipped
+# (title_families only exists in builds with the derived columns).
+ENTITY_SOURCES = [
+    ("title_family", "title_families", "SELECT title_family FROM title_families"),
+    ("industry", "industries", "SELECT industry_name FROM industries"),
+    ("company", "companies", "SELECT DISTINCT name FROM companies"),
+]
+
+NUMBER_SLOT = "number"
+
+# Longest entity phrase looked for in a question, in words
+MAX_ENTITY_WORDS = 6
+
+# Question words that are never treated as an entity on their own, even if a
+# company happens to be called that
+COMMON_WORDS = {
+    "a", "an", "the", "and", "or", "of", "for", "in", "at", "to", "by", "on", "with",
+    "what", "which", "how", "many", "most", "top", "jobs", "job", "postings", "remote",
+    "data", "salary", "salaries", "average", "senior", "entry", "level", "company", "companies",
+}
+
+WORD_RE = re.compile(r"[a-z0-9]+")
+
+# String literals and integer literals in SQL ('' is an escaped quote)
+LITERAL_RE = re.compile(r"'((?:[^']|'')*)'|(?<![\w.])(\d+)(?![\w.])")
+
+# A LIMIT row count ends the text before it - the one literal a template may keep
+LIMIT_BEFORE_RE = re.compile(r"\bLIMIT\s+$", re.IGNORECASE)
+
+# String literals and ? placeholders in a template
+PLACEHOLDER_RE = re.compile(r"'(?:[^']|'')*'|\?")
+
+
+@dataclass
+class Entity:
+    """A known value mentioned in a question."""
+    slot: str
+    value: Any
+
+
+@dataclass
+class QuestionShape:
+    """A question with its entities replaced by {slot} markers."""
+    text: str
+    entities: List[Entity]
+
+
+@dataclass
+class BoundQuery:
+    """A template with a new question's entities bound to it."""
+    sql: str            # with ? placeholders
+    params: List[Any]
+    display_sql: str    # the same statement with the values inlined
+
+
+_vocabulary: Optional[Tuple[str, Dict[Tuple[str, ...], Entity]]] = None
+_vocabulary_lock = threading.Lock()
+
+
+def _words(text: str) -> List[str]:
+    return WORD_RE.findall(text.lower())
+
+
+def _phrase_keys(value: str) -> List[Tuple[str, ...]]:
+    """Word tuples a value may appear as in a question (singular and simple plurals)."""
+    words = _words(value)
+    if not words or len(words) > MAX_ENTITY_WORDS or all(w in COMMON_WORDS for w in words):
+        return []
+    stem, last = words[:-1], words[-1]
+    return [tuple(words), tuple(stem + [last + "s"]), tuple(stem + [last + "es"])]
+
+
+def load_vocabulary() -> Dict[Tuple[str, ...], Entity]:
+    """
+    Map question phrases to entities, from the current database build.
+
+    Loaded once per build; a rebuilt database (new fingerprint) is re-read.
+    """
+    global _vocabulary
+    fingerprint = get_db_fingerprint()
+    if fingerprint == "missing":
+        return {}
+    with _vocabulary_lock:
+        if _vocabulary is not None and _vocabulary[0] == fingerprint:
+            return _vocabulary[1]
+
+        phrases: Dict[Tuple[str, ...], Entity] = {}
+        tables = get_schema_features().tables
+        with get_connection() as conn:
+            for slot, table, query in ENTITY_SOURCES:
+                if table not in tables:
+                    continue
+                try:
+                    values = [row[0] for row in conn.execute(query) if isinstance(row[0], str)]
+                except Exception:
+                    continue
+                for value in values:
+                    for key in _phrase_keys(value):
+                        phrases.setdefault(key, Entity(slot=slot, value=value))
+        _vocabulary = (fingerprint, phrases)
+        metrics.set_gauge("templates.vocabulary", len(phrases))
+        return phrases
+
+
+def question_shape(question: str) -> QuestionShape:
+    """
+    Replace the entities in a question with {slot} markers.
+
+    Longest phrases win, so "data scientist" is one title family rather than
+    two words.
+    """
+    vocabulary = load_vocabulary()
+    words = _words(question.replace("'s ", " "))
+    parts, entities = [], []
+    i = 0
+    while i < len(words):
+        if words[i].isdigit():
+            parts.append("{" + NUMBER_SLOT + "}")
+            entities.append(Entity(slot=NUMBER_SLOT, value=int(words[i])))
+            i += 1
+            continue
+        for n in range(min(MAX_ENTITY_WORDS, len(words) - i), 0, -1):
+            entity = vocabulary.get(tuple(words[i:i + n]))
+            if entity is not None:
+                parts.append("{" + entity.slot + "}")
+                entities.append(entity)
+                i += n
+                break
+        else:
+            parts.append(words[i])
+            i += 1
+    return QuestionShape(text=" ".join(parts), entities=entities)
+
+
+def _literal_case(literal: str, value: str) -> Optional[str]:
+    """How a literal spells an entity value: as stored, lowercased or uppercased (None if it doesn't)."""
+    if literal.lower() != value.lower():
+        return None
+    if literal == value:
+        return "exact"
+    if literal == literal.lower():
+        return "lower"
+    if literal == literal.upper():
+        return "upper"
+    return "exact"
+
+
+def _bind_value(spec: List[Any], entities: List[Entity]) -> Any:
+    """The parameter for one placeholder: the entity's value, spelled and wildcarded like the original literal."""
+    index, case, prefix, suffix = spec
+    value = entities[index].value
+    if entities[index].slot == NUMBER_SLOT:
+        return int(value)
+    if case == "lower":
+        value = value.lower()
+    elif case == "upper":
+        value = value.upper()
+    return f"{prefix}{value}{suffix}"
+
+
+def extract_template(shape: QuestionShape, sql: str) -> Optional[Dict[str, Any]]:
+    """
+    Turn the entity literals of a successful SQL into ? placeholders.
+
+    Args:
+        shape: Shape of the question the SQL answers
+        sql: The SQL, with literal values
+
+    Returns:
+        {"sql": template, "placeholders": [[entity index, case, prefix, suffix], ...]},
+        or None if the question has no entities, one of them isn't a literal
+        in the SQL (or is ambiguous), or the SQL has a literal that isn't one
+        of the entities (except a LIMIT row count)
+    """
+    if not shape.entities:
+        return None
+    if len({(e.slot, str(e.value).lower()) for e in shape.entities}) < len(shape.entities):
+        return None
+
+    pieces, placeholders, used = [], [], set()
+    position = 0
+    for match in LITERAL_RE.finditer(sql):
+        text, number = match.group(1), match.group(2)
+        binding = None
+        for index, entity in enumerate(shape.entities):
+            if entity.slot == NUMBER_SLOT:
+                if number is not None and int(number) == entity.value:
+                    binding = [index, "exact", "", ""]
+            elif text is not None:
+                core = text.replace("''", "'")
+                prefix = "%" if core.startswith("%") else ""
+                suffix = "%" if core.endswith("%") and len(core) > 1 else ""
+                core = core[len(prefix):len(core) - len(suffix)]
+                case = _literal_case(core, entity.value)
+                if case is not None:
+                    binding = [index, case, prefix, suffix]
+            if binding is not None:
+                break
+        if binding is None:
+            if number is not None and LIMIT_BEFORE_RE.search(sql, 0, match.start()):
+                continue
+            return None
+        # A number may only fill one placeholder ("top 5" vs. LIMIT 5 and HAVING COUNT(*) >= 5)
+        if shape.entities[binding[0]].slot == NUMBER_SLOT and binding[0] in used:
+            return None
+        used.add(binding[0])
+        pieces += [sql[position:match.start()], "?"]
+        placeholders.append(binding)
+        position = match.end()
+
+    if len(used) < len(shape.entities):
+        return None
+    pieces.append(sql[position:])
+    return {"sql": "".join(pieces), "placeholders": placeholders}
+
+
+def render_sql(sql: str, params: List[Any]) -> str:
+    """Inline bound parameters into a template, for display and the SQL cache."""
+    values = iter(params)
+
+    def replace(match: re.Match) -> str:
+        if match.group(0) != "?":
+            return match.group(0)
+        value = next(values)
+        if isinstance(value, str):
+            return "'" + value.replace("'", "''") + "'"
+        return str(value)
+
+    return PLACEHOLDER_RE.sub(replace, sql)
+
+
+def learn_template(question: str, sql: str, ttl: Optional[float] = None) -> None:
+    """Cache a template for the question's shape if its SQL can be parameterized."""
+    try:
+        shape = question_shape(question)
+    except Exception:
+        return
+    template = extract_template(shape, sql)
+    if template is None:
+        return
+    get_cache().set("template", make_key(shape.text), template, ttl=ttl)
+    metrics.increment("templates.learned")
+
+
+def match_template(question: str) -> Optional[BoundQuery]:
+    """
+    Bind a question's entities into the cached template for its shape.
+
+    Returns:
+        BoundQuery to execute, or None if no template has this shape
+    """
+    try:
+        shape = question_shape(question)
+    except Exception:
+        return None
+    if not shape.entities:
+        return None
+    template = cached_get("template", make_key(shape.text))
+    if template is None:
+        return None
+
+    params = [_bind_value(spec, shape.entities) for spec in template["placeholders"]]
+    return BoundQuery(sql=template["sql"], params=params, display_sql=render_sql(template["sql"], params))
@@ -0,0 +1,186 @@
+"""
+Compact statistical digests of query results for the response-formatting prompt.
+Purely local - no LLM calls.
+
+Instead of pasting every row as "k: v" text, format_response sends a digest:
+per-column statistics (numeric percentiles, distinct counts, top values with
+their share of the total where the measure can be summed) followed by as many leading rows as fit. Long strings
+are truncated and the whole digest is capped at a fixed character budget, so
+prompt size stays constant no matter how wide or long the result is.
+"""
+
+from collections import Counter
+from typing import Any, Dict, List, Optional
+
+from visualization import is_additive
+
+# Roughly 4 characters per token -> ~900 prompt tokens for the results section
+DIGEST_CHAR_BUDGET = 3600
+
+# Longest string value shown (titles, descriptions, ...)
+MAX_TEXT_CHARS = 60
+
+# Number of top values listed per text column
+TOP_K = 8
+
+# Columns summarized individually; wider results only list the remaining names
+MAX_SUMMARIZED_COLUMNS = 12
+
+# Results this small are shown as rows only - statistics would just repeat them
+SMALL_RESULT_ROWS = 5
+
+
+def _is_number(value: Any) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def _fmt(value: Any) -> str:
+    """Format a value compactly but exactly enough to quote in a response."""
+    if value is None:
+        return "null"
+    if isinstance(value, bool):
+        return str(value)
+    if isinstance(value, int):
+        return f"{value:,}"
+    if isinstance(value, float):
+        if value.is_integer():
+            return f"{int(value):,}"
+        if abs(value) >= 1:
+            return f"{value:,.2f}"
+        # Small ratios and rates: significant digits, so 0.0042 doesn't become 0.00
+        return f"{value:.4g}"
+    text = str(value).replace("\n", " ")
+    if len(text) > MAX_TEXT_CHARS:
+        return text[:MAX_TEXT_CHARS - 3] + "..."
+    return text
+
+
+def _percentile(sorted_values: List[float], pct: float) -> float:
+    """Linear-interpolated percentile of an already sorted list."""
+    if len(sorted_values) == 1:
+        return sorted_values[0]
+    position = pct / 100 * (len(sorted_values) - 1)
+    lower = int(position)
+    upper = min(lower + 1, len(sorted_values) - 1)
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (position - lower)
+
+
+def _numeric_summary(name: str, values: List[float], nulls: int) -> str:
+    ordered = sorted(values)
+    total = sum(ordered)
+    parts = [
+        f"n={len(ordered):,}",
+        f"min={_fmt(ordered[0])}",
+        f"p25={_fmt(_percentile(ordered, 25))}",
+        f"median={_fmt(_percentile(ordered, 50))}",
+        f"p75={_fmt(_percentile(ordered, 75))}",
+        f"p90={_fmt(_percentile(ordered, 90))}",
+        f"max={_fmt(ordered[-1])}",
+        f"mean={_fmt(total / len(ordered))}",
+    ]
+    if is_additive(name):
+        parts.append(f"sum={_fmt(total)}")
+    if nulls:
+        parts.append(f"nulls={nulls:,}")
+    return f"- {name} (numeric): " + ", ".join(parts)
+
+
+def _text_summary(name: str, values: List[Any], nulls: int, measure: Optional[List[Any]], measure_name: Optional[str]) -> str:
+    counts = Counter(values)
+    line = f"- {name} (text): {len(counts):,} distinct"
+    if nulls:
+        line += f", nulls={nulls:,}"
+
+    if len(counts) < len(values):
+        # Repeated values: show the most frequent ones
+        top = ", ".join(f"{_fmt(v)} ({c:,}, {c / len(values):.1%})" for v, c in counts.most_common(TOP_K))
+        return f"{line}; most frequent: {top}"
+
+    if measure is not None:
+        # One row per label (typical GROUP BY): show the top labels by the measure, and
+        # their share when the measure adds up (a share of summed averages is meaningless)
+        pairs = [(v, m) for v, m in zip(values, measure) if _is_number(m)]
+        pairs.sort(key=lambda p: p[1], reverse=True)
+        if pairs and not is_additive(measure_name):
+            top = ", ".join(f"{_fmt(v)} ({_fmt(m)})" for v, m in pairs[:TOP_K])
+            return f"{line}; top by {measure_name}: {top}"
+        total = sum(m for _, m in pairs)
+        if pairs and total:
+            top = ", ".join(f"{_fmt(v)} ({_fmt(m)}, {m / total:.1%})" for v, m in pairs[:TOP_K])
+            return f"{line}; top by {measure_name} (share of total {_fmt(total)}): {top}"
+    return line
+
+
+def _pick_measure(numeric_columns: List[str]) -> Optional[str]:
+    """Choose the column to rank labels by - prefer counts/totals, like detect_visualization."""
+    for name in numeric_columns:
+        lowered = name.lower()
+        if "count" in lowered or "total" in lowered or "num" in lowered:
+            return name
+    return numeric_columns[0] if numeric_columns else None
+
+
+def summarize_results(results: List[Dict[str, Any]], columns: List[str], budget: int = DIGEST_CHAR_BUDGET) -> str:
+    """
+    Build a fixed-size digest of a result set for the formatting prompt.
+
+    Args:
+        results: Query results as list of dicts
+        columns: Column names
+        budget: Maximum digest length in characters
+
+    Returns:
+        Digest text: header, per-column statistics, then leading rows
+    """
+    # Work column-wise: one pass to split every column into its values
+    column_values = {c: [row.get(c) for row in results] for c in columns}
+    summarized = columns[:MAX_SUMMARIZED_COLUMNS]
+
+    numeric_columns = []
+    for name in summarized:
+        present = [v for v in column_values[name] if v is not None]
+        if present and all(_is_number(v) for v in present):
+            numeric_columns.append(name)
+    measure_name = _pick_measure(numeric_columns)
+
+    lines = [f"Columns: {', '.join(columns)}", f"Total rows: {len(results):,}"]
+    if len(results) > SMALL_RESULT_ROWS:
+        lines += ["", "Column statistics:"]
+        for name in summarized:
+            values = column_values[name]
+            present = [v for v in values if v is not None]
+            nulls = len(values) - len(present)
+            if not present:
+                lines.append(f"- {name}: all null")
+            elif name in numeric_columns:
+                lines.append(_numeric_summary(name, present, nulls))
+            else:
+                measure = column_values[measure_name] if measure_name else None
+                if measure is not None:
+                    measure = [m for v, m in zip(values, measure) if v is not None]
+                # Counted on the full values; _text_summary truncates only for display
+                lines.append(_text_summary(name, present, nulls, measure, measure_name))
+        if len(columns) > len(summarized):
+            lines.append(f"- (not summarized: {', '.join(columns[len(summarized):])})")
+
+    digest = "\n".join(line[:budget // 4] for line in lines)
+    if len(digest) >= budget:
+        return digest[:budget - 3] + "..."
+
+    # Fill what's left of the budget with leading rows, in result order
+    row_lines = ["", "Rows (in result order):"]
+    used = len(digest) + sum(len(line) + 1 for line in row_lines)
+    shown = 0
+    for i, row in enumerate(results, 1):
+        line = f"{i}. " + ", ".join(f"{c}: {_fmt(row.get(c))}" for c in summarized)
+        if used + len(line) + 1 > budget - 40:
+            break
+        row_lines.append(line)
+        used += len(line) + 1
+        shown += 1
+
+    if shown == 0:
+        return digest
+    if shown < len(results):
+        row_lines.append(f"... {len(results) - shown:,} more rows (covered by the statistics above)")
+    return digest + "\n" + "\n".join(row_lines)
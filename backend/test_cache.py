@@ -0,0 +1,67 @@
+"""Unit cases for cache.py (run with: cd backend && python -m pytest test_cache.py)."""
+
+import logging
+import sqlite3
+import time
+
+import cache
+from cache import SQLiteCache
+
+
+def tracked_and_actual_size(path):
+    conn = sqlite3.connect(path)
+    tracked = conn.execute("SELECT bytes FROM cache_size").fetchone()[0]
+    actual = conn.execute("SELECT COALESCE(SUM(size), 0) FROM cache_entries").fetchone()[0]
+    conn.close()
+    return tracked, actual
+
+
+def test_size_is_tracked_through_writes_overwrites_and_deletes(tmp_path):
+    store = SQLiteCache(tmp_path / "cache.db", max_bytes=10_000)
+    for i in range(50):
+        store.set("result", f"k{i}", {"rows": "x" * i})
+    store.set("result", "k1", {"rows": "y" * 500})     # overwrite with a larger value
+    store.set("result", "k2", "short")                  # and a smaller one
+    store.delete("result", "k3")
+    store.clear("sql")                                  # a namespace with no entries
+
+    tracked, actual = tracked_and_actual_size(tmp_path / "cache.db")
+    assert tracked == actual > 0
+
+
+def test_size_is_tracked_through_expiry_and_eviction(tmp_path):
+    store = SQLiteCache(tmp_path / "cache.db", max_bytes=2_000)
+    store.set("question", "old", "x" * 100, ttl=0.01)
+    time.sleep(0.02)
+    assert store.get("question", "old") is None          # expired on read
+    for i in range(100):
+        store.set("result", f"k{i}", "x" * 100)         # evicts least recently used entries
+
+    tracked, actual = tracked_and_actual_size(tmp_path / "cache.db")
+    assert tracked == actual <= 2_000
+
+
+def test_existing_cache_file_gets_its_size_initialized(tmp_path):
+    conn = sqlite3.connect(tmp_path / "cache.db")
+    conn.execute(
+        "CREATE TABLE cache_entries (namespace TEXT NOT NULL, key TEXT NOT NULL, value TEXT NOT NULL, "
+        "size INTEGER NOT NULL, expires_at REAL, accessed_at REAL NOT NULL, PRIMARY KEY (namespace, key)) WITHOUT ROWID"
+    )
+    conn.execute("INSERT INTO cache_entries VALUES ('sql', 'k', '\"SELECT 1\"', 10, NULL, 0)")
+    conn.commit()
+    conn.close()
+
+    SQLiteCache(tmp_path / "cache.db")
+    assert tracked_and_actual_size(tmp_path / "cache.db") == (10, 10)
+
+
+def test_falling_back_to_memory_is_logged(monkeypatch, caplog):
+    def busy():
+        raise sqlite3.OperationalError("database is locked")
+
+    monkeypatch.setattr(cache, "_cache", None)
+    monkeypatch.setattr(cache, "CACHE_BACKEND", "sqlite")
+    monkeypatch.setattr(cache, "SQLiteCache", busy)
+    with caplog.at_level(logging.WARNING, logger="cache"):
+        assert isinstance(cache.get_cache(), cache.MemoryCache)
+    assert "database is locked" in caplog.text
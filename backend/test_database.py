@@ -0,0 +1,42 @@
+"""Unit cases for database.py (run with: cd backend && python -m pytest test_database.py)."""
+
+import sqlite3
+
+import database
+import llm
+
+
+def make_db(path, postings_columns, tables=()):
+    conn = sqlite3.connect(path)
+    conn.execute(f"CREATE TABLE postings ({', '.join(postings_columns)})")
+    for table in tables:
+        conn.execute(f"CREATE TABLE {table} (id INTEGER)")
+    conn.commit()
+    conn.close()
+    return path
+
+
+def prompt_for(monkeypatch):
+    prompts = []
+    monkeypatch.setattr(llm, "_chat", lambda tier, stage, messages, tokens: prompts.append(messages[0]["content"]) or "SELECT 1")
+    llm.generate_sql("average salary for nurses", database.get_schema_info())
+    return prompts[0]
+
+
+def test_legacy_database_gets_legacy_docs_and_rules(tmp_path, monkeypatch):
+    monkeypatch.setattr(database, "DB_PATH", make_db(tmp_path / "legacy.db", ["job_id", "title", "max_salary"]))
+
+    assert not database.get_schema_features().derived_columns
+    prompt = prompt_for(monkeypatch)
+    for name in database.DERIVED_POSTINGS_COLUMNS + database.LOOKUP_TABLES:
+        assert name not in prompt
+
+
+def test_database_with_derived_columns_gets_current_docs_and_rules(tmp_path, monkeypatch):
+    columns = ["job_id", "title", "max_salary"] + list(database.DERIVED_POSTINGS_COLUMNS)
+    monkeypatch.setattr(database, "DB_PATH", make_db(tmp_path / "current.db", columns, database.LOOKUP_TABLES))
+
+    assert database.get_schema_features().derived_columns
+    prompt = prompt_for(monkeypatch)
+    assert "title_family_id (join title_families)" in prompt
+    assert "annual_salary (REAL)" in prompt
@@ -0,0 +1,64 @@
+"""Unit cases for decompose.py (run with: cd backend && python -m pytest test_decompose.py)."""
+
+from decompose import MAX_MERGED_ROWS, SEGMENT_COLUMN, SubQuestion, decompose_question, merge_part_results
+
+
+def questions(question):
+    parts = decompose_question(question)
+    return None if parts is None else [(p.question, p.segment) for p in parts]
+
+
+def test_multi_word_alternative_is_not_split_into_a_shared_suffix():
+    assert questions("Salary in California vs New York for software engineers") == [
+        ("Salary in California for software engineers?", "California"),
+        ("Salary in New York for software engineers?", "New York"),
+    ]
+
+
+def test_alternative_running_to_the_start_of_the_question_is_not_decomposed():
+    assert questions("Top 10 companies hiring remote vs onsite") is None
+
+
+def test_alternative_running_to_the_start_of_a_clause_is_not_decomposed():
+    assert questions("Which pays more, nurses vs teachers?") is None
+
+
+def test_single_modifiers_share_the_head_noun():
+    assert questions("Compare salaries for data scientists vs software engineers in remote vs onsite roles") == [
+        ("Salaries for data scientists in remote roles?", "data scientists / remote roles"),
+        ("Salaries for data scientists in onsite roles?", "data scientists / onsite roles"),
+        ("Salaries for software engineers in remote roles?", "software engineers / remote roles"),
+        ("Salaries for software engineers in onsite roles?", "software engineers / onsite roles"),
+    ]
+
+
+def test_merge_matches_columns_by_name():
+    parts = [SubQuestion("Jobs at Google?", ["Google"]), SubQuestion("Jobs at Amazon?", ["Amazon"])]
+    merged = merge_part_results(parts, [
+        ([{"title": "SWE", "avg_salary": 150}], ["title", "avg_salary"]),
+        ([{"avg_salary": 140, "title": "SDE"}], ["avg_salary", "title"]),
+    ])
+    assert merged == (
+        [
+            {SEGMENT_COLUMN: "Google", "title": "SWE", "avg_salary": 150},
+            {SEGMENT_COLUMN: "Amazon", "title": "SDE", "avg_salary": 140},
+        ],
+        [SEGMENT_COLUMN, "title", "avg_salary"],
+    )
+
+
+def test_merge_refuses_parts_with_different_columns():
+    parts = [SubQuestion("Jobs at Google?", ["Google"]), SubQuestion("Jobs at Amazon?", ["Amazon"])]
+    assert merge_part_results(parts, [
+        ([{"title": "SWE", "avg_salary": 150}], ["title", "avg_salary"]),
+        ([{"avg_salary": 140, "count": 3}], ["avg_salary", "count"]),
+    ]) is None
+
+
+def test_merge_keeps_rows_from_every_part():
+    parts = [SubQuestion("Jobs at Google?", ["Google"]), SubQuestion("Jobs at Amazon?", ["Amazon"])]
+    rows = [{"title": f"T{i}"} for i in range(MAX_MERGED_ROWS)]
+    merged, _ = merge_part_results(parts, [(rows, ["title"]), (rows, ["title"])])
+    assert len(merged) == MAX_MERGED_ROWS
+    assert [r[SEGMENT_COLUMN] for r in merged].count("Amazon") == MAX_MERGED_ROWS // 2
+    assert merged[MAX_MERGED_ROWS // 2] == {SEGMENT_COLUMN: "Amazon", "title": "T0"}
@@ -0,0 +1,108 @@
+"""
+Parity of the SQLite and DuckDB execution backends (run with: cd backend && python -m pytest test_engine_parity.py).
+
+Runs statements on both backends of database.py and compares the results
+(scripts/check_engine_parity.py compare_results): statements covering the
+dialect differences to_duckdb_sql and the DuckDB settings paper over, on a
+small generated database, and the benchmark corpus on data/linkedin_jobs.db
+when it and a current Parquet export are present. Skipped without duckdb.
+"""
+
+import json
+import random
+import sqlite3
+import sys
+from pathlib import Path
+
+import pytest
+
+import database
+
+pytest.importorskip("duckdb")
+
+SCRIPTS_DIR = Path(__file__).parent.parent / "scripts"
+sys.path.insert(0, str(SCRIPTS_DIR))
+
+from check_engine_parity import CORPUS_PATH, compare_results  # noqa: E402
+from export_parquet import export_parquet  # noqa: E402
+
+STATEMENTS = [
+    # LIKE is case-insensitive in SQLite (ILIKE in DuckDB)
+    "SELECT title, COUNT(*) AS n FROM postings WHERE title LIKE '%engineer%' GROUP BY title ORDER BY n DESC, title",
+    # Integer division, and NULLs first in ascending order
+    "SELECT pay_period, SUM(views) / COUNT(*) AS per_posting, AVG(max_salary) AS avg_max "
+    "FROM postings GROUP BY pay_period ORDER BY pay_period",
+    # REAL is 64-bit in SQLite, 32-bit in DuckDB unless translated
+    "SELECT CAST(SUM(views) AS REAL) / 7 AS ratio FROM postings",
+    # DuckDB types decimal literals as DECIMAL; SQLite returns floats
+    "SELECT ROUND(100.0 * COUNT(*) / (SELECT COUNT(*) FROM postings), 2) AS pct FROM postings WHERE remote_allowed = 1",
+    "SELECT c.name, COUNT(*) AS n, MAX(p.max_salary) AS top FROM postings p "
+    "JOIN companies c ON p.company_id = c.company_id GROUP BY c.name ORDER BY n DESC, c.name LIMIT 5",
+]
+
+
+def build_database(path: Path) -> None:
+    rng = random.Random(7)
+    titles = ["Software Engineer", "software engineer", "Data ENGINEER", "Nurse", "Data Analyst"]
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE companies (company_id INTEGER, name TEXT)")
+    conn.execute(
+        "CREATE TABLE postings (job_id INTEGER, company_id INTEGER, title TEXT, max_salary REAL, "
+        "pay_period TEXT, views INTEGER, remote_allowed INTEGER)"
+    )
+    conn.executemany("INSERT INTO companies VALUES (?, ?)", [(i, f"Company {i}") for i in range(20)])
+    conn.executemany("INSERT INTO postings VALUES (?, ?, ?, ?, ?, ?, ?)", [
+        (
+            job_id, rng.randrange(20), rng.choice(titles),
+            rng.choice([None, round(rng.uniform(15, 250000), 2)]),
+            rng.choice([None, "HOURLY", "YEARLY", "MONTHLY"]),
+            rng.randrange(1000), rng.choice([None, 0, 1]),
+        )
+        for job_id in range(2000)
+    ])
+    conn.commit()
+    conn.close()
+
+
+def backends(db_path: Path, parquet_dir: Path, monkeypatch):
+    monkeypatch.setattr(database, "DB_PATH", db_path)
+    return database.sqlite_backend, database.DuckDBBackend(parquet_dir)
+
+
+def assert_parity(sqlite_backend, duck, sql: str) -> None:
+    expected = sqlite_backend.execute(sql, (), database.MAX_RESULT_ROWS)
+    try:
+        actual = duck.execute(sql, (), database.MAX_RESULT_ROWS)
+    except Exception:
+        return  # falls back to SQLite in execute_query - not a mismatch
+    assert compare_results(expected, actual) == "", sql
+
+
+@pytest.fixture(scope="module")
+def generated(tmp_path_factory) -> Path:
+    """A small database and its Parquet export, shared by the tests of this module."""
+    root = tmp_path_factory.mktemp("parity")
+    build_database(root / "jobs.db")
+    export_parquet(root / "jobs.db", root / "parquet")
+    return root
+
+
+@pytest.mark.parametrize("sql", STATEMENTS)
+def test_engines_agree_on_dialect_differences(sql, generated, monkeypatch):
+    sqlite_backend, duck = backends(generated / "jobs.db", generated / "parquet", monkeypatch)
+    # Every statement here must actually run on DuckDB
+    duck.execute(sql, (), database.MAX_RESULT_ROWS)
+    assert_parity(sqlite_backend, duck, sql)
+
+
+def test_engines_agree_on_the_benchmark_corpus(monkeypatch):
+    db_path = Path(__file__).parent.parent / "data" / "linkedin_jobs.db"
+    parquet_dir = db_path.parent / "parquet"
+    monkeypatch.setattr(database, "DB_PATH", db_path)
+    manifest = database.read_export_manifest(parquet_dir)
+    if not db_path.exists() or manifest is None or manifest.get("source_fingerprint") != database.get_db_fingerprint():
+        pytest.skip("needs data/linkedin_jobs.db and a current Parquet export (scripts/export_parquet.py)")
+
+    sqlite_backend, duck = backends(db_path, parquet_dir, monkeypatch)
+    for entry in json.loads(CORPUS_PATH.read_text()):
+        assert_parity(sqlite_backend, duck, entry["sql"])
@@ -0,0 +1,29 @@
+"""Unit cases for query_log.py (run with: cd backend && python -m pytest test_query_log.py)."""
+
+import sqlite3
+
+import query_log
+
+
+def test_entries_are_written_in_the_background_with_plans_and_trimmed(tmp_path, monkeypatch):
+    db_path = tmp_path / "jobs.db"
+    conn = sqlite3.connect(db_path)
+    conn.execute("CREATE TABLE postings (job_id INTEGER PRIMARY KEY, title TEXT)")
+    conn.close()
+    monkeypatch.setattr(query_log, "QUERY_LOG_PATH", tmp_path / "query_log.db")
+    monkeypatch.setattr(query_log, "QUERY_LOG_ENABLED", True)
+    monkeypatch.setattr(query_log, "QUERY_LOG_MAX_ROWS", 10)
+
+    for job_id in range(25):
+        query_log.record_query("SELECT title FROM postings WHERE job_id = ?", 1.0, row_count=0,
+                               params=[job_id], db_path=db_path)
+    query_log.record_query("SELECT nope FROM postings", 1.0, error="no such column: nope", db_path=db_path)
+    assert query_log.flush()
+
+    log = sqlite3.connect(tmp_path / "query_log.db")
+    rows = log.execute("SELECT sql, plan, error, params FROM query_log ORDER BY id").fetchall()
+    log.close()
+    assert len(rows) == 10
+    assert rows[-2] == ("SELECT title FROM postings WHERE job_id = ?",
+                        "SEARCH postings USING INTEGER PRIMARY KEY (rowid=?)", None, "[24]")
+    assert rows[-1] == ("SELECT nope FROM postings", None, "no such column: nope", None)
@@ -0,0 +1,50 @@
+"""Unit cases for query_pipeline.py (run with: cd backend && python -m pytest test_query_pipeline.py)."""
+
+import pytest
+
+import cache
+import query_pipeline
+from admission import llm_admission
+from decompose import SubQuestion
+
+
+@pytest.fixture(autouse=True)
+def pipeline(monkeypatch):
+    """Run the pipeline without an LLM, a database or shared state; record slots held per stage."""
+    slots = []
+    monkeypatch.setattr(cache, "_cache", cache.MemoryCache())
+    monkeypatch.setattr(query_pipeline, "get_example_store", lambda: None)
+    monkeypatch.setattr(query_pipeline, "SQL_TEMPLATES", False)
+    monkeypatch.setattr(query_pipeline, "get_schema_info", lambda: "schema")
+
+    def generate_sql(question, schema, tier, examples):
+        slots.append(("llm", llm_admission._active))
+        return "SELECT 1 AS n"
+
+    def execute_query(sql, params=()):
+        slots.append(("sql", llm_admission._active))
+        return [{"n": 1}], ["n"]
+
+    def format_response(question, results, columns, tier):
+        slots.append(("llm", llm_admission._active))
+        return "One."
+
+    monkeypatch.setattr(query_pipeline, "generate_sql", generate_sql)
+    monkeypatch.setattr(query_pipeline, "execute_query", execute_query)
+    monkeypatch.setattr(query_pipeline, "format_response", format_response)
+    return slots
+
+
+def test_slots_are_held_only_around_llm_calls(pipeline):
+    result = query_pipeline.process_query("How many jobs are there?")
+    assert result.success and result.response == "One."
+    assert pipeline == [("llm", 1), ("sql", 0), ("llm", 1)]
+    assert llm_admission._active == 0
+
+
+def test_parts_of_a_decomposed_question_run_under_the_requests_slots(pipeline):
+    parts = [SubQuestion("Jobs at Google?", ["Google"]), SubQuestion("Jobs at Amazon?", ["Amazon"])]
+    assert query_pipeline._answer_decomposed("Jobs at Google vs Amazon", parts, "schema") is not None
+    # One slot for the request plus one extra for the second lane, none taken by the lanes themselves
+    assert {slots for stage, slots in pipeline} == {2}
+    assert llm_admission._active == 0
@@ -0,0 +1,54 @@
+"""Unit cases for sql_templates.py (run with: cd backend && python -m pytest test_sql_templates.py)."""
+
+import pytest
+
+import cache
+import sql_templates
+from sql_templates import Entity, extract_template, learn_template, match_template, question_shape
+
+VOCABULARY = {
+    ("registered", "nurse"): Entity(slot="title_family", value="registered nurse"),
+    ("registered", "nurses"): Entity(slot="title_family", value="registered nurse"),
+    ("data", "engineer"): Entity(slot="title_family", value="data engineer"),
+    ("data", "engineers"): Entity(slot="title_family", value="data engineer"),
+}
+
+
+@pytest.fixture(autouse=True)
+def vocabulary(monkeypatch):
+    monkeypatch.setattr(sql_templates, "load_vocabulary", lambda: VOCABULARY)
+    monkeypatch.setattr(cache, "_cache", cache.MemoryCache())
+
+
+def test_template_is_reused_for_another_entity():
+    learn_template(
+        "Top 5 companies hiring registered nurses",
+        "SELECT company_name, COUNT(*) AS n FROM postings p JOIN title_families f "
+        "ON p.title_family_id = f.title_family_id WHERE f.title_family = 'registered nurse' "
+        "GROUP BY company_name ORDER BY n DESC LIMIT 5"
+    )
+
+    bound = match_template("Top 3 companies hiring data engineers")
+    assert bound.params == ["data engineer", 3]
+    assert bound.display_sql.endswith("WHERE f.title_family = 'data engineer' GROUP BY company_name ORDER BY n DESC LIMIT 3")
+
+
+def test_limit_row_count_may_stay_in_the_template():
+    shape = question_shape("Average salary for registered nurses")
+    template = extract_template(
+        shape, "SELECT AVG(annual_salary) FROM postings WHERE normalized_title LIKE '%registered nurse%' LIMIT 100"
+    )
+    assert template["sql"] == "SELECT AVG(annual_salary) FROM postings WHERE normalized_title LIKE ? LIMIT 100"
+    assert template["placeholders"] == [[0, "exact", "%", "%"]]
+
+
+@pytest.mark.parametrize("sql", [
+    # An abbreviation of the entity would stay behind for every other title
+    "SELECT AVG(annual_salary) FROM postings WHERE normalized_title LIKE '%registered nurse%' "
+    "OR normalized_title LIKE '%rn%'",
+    # So would a year or a state the question implied
+    "SELECT AVG(annual_salary) FROM postings WHERE normalized_title LIKE '%registered nurse%' "
+    "AND strftime('%Y', listed_time) = '2024'",
+])
+def test_template_with_an_unbound_literal_is_not_learned(sql):
+    assert extract_template(question_shape("Average salary for registered nurses"), sql) is None
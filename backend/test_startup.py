@@ -0,0 +1,50 @@
+"""
+Cold-start checks for main.py (run with: cd backend && python -m pytest test_startup.py).
+
+scripts/profile_startup.py reports where the import time goes; these tests
+enforce the budget and the lazily loaded modules.
+"""
+
+import os
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).parent
+
+# Fail if importing the app module takes longer than this (median over runs)
+STARTUP_BUDGET_MS = float(os.getenv("STARTUP_BUDGET_MS", "1000"))
+
+# Modules that must not be imported by the app module itself
+LAZY_MODULES = ["openai", "query_pipeline", "llm", "cache", "example_store"]
+
+
+def import_main(*flags: str) -> subprocess.CompletedProcess:
+    """Import main in a fresh interpreter."""
+    return subprocess.run(
+        [sys.executable, *flags, "-c", "import main, sys; print(' '.join(sys.modules))"],
+        cwd=BACKEND_DIR,
+        capture_output=True,
+        text=True,
+        check=True
+    )
+
+
+def import_ms() -> float:
+    """Cumulative import time of main, from -X importtime."""
+    for line in import_main("-X", "importtime").stderr.splitlines():
+        fields = line.split("|")
+        if len(fields) == 3 and fields[2].strip() == "main":
+            return int(fields[1]) / 1000
+    raise AssertionError("main missing from -X importtime output")
+
+
+def test_modules_meant_to_load_lazily_are_not_imported_at_startup():
+    imported = set(import_main().stdout.split())
+    assert [m for m in LAZY_MODULES if m in imported] == []
+
+
+def test_import_is_within_the_startup_budget():
+    import_main()  # warm the bytecode and OS file caches
+    assert statistics.median(import_ms() for _ in range(3)) <= STARTUP_BUDGET_MS
@@ -0,0 +1,34 @@
+"""Unit cases for summarize.py (run with: cd backend && python -m pytest test_summarize.py)."""
+
+from summarize import MAX_TEXT_CHARS, summarize_results
+
+
+def statistics(results, columns):
+    digest = summarize_results(results, columns)
+    return {line.split(" (")[0][2:]: line for line in digest.splitlines() if line.startswith("- ")}
+
+
+def test_additive_measure_gets_shares_and_a_sum():
+    rows = [{"state": f"S{i}", "job_count": i} for i in range(1, 10)]
+    stats = statistics(rows, ["state", "job_count"])
+    assert "top by job_count (share of total 45): S9 (9, 20.0%)" in stats["state"]
+    assert "sum=45" in stats["job_count"]
+
+
+def test_non_additive_measure_gets_no_shares_or_sum():
+    rows = [{"state": f"S{i}", "avg_salary": 1000.0 * i} for i in range(1, 10)]
+    stats = statistics(rows, ["state", "avg_salary"])
+    assert "top by avg_salary: S9 (9,000), S8 (8,000)" in stats["state"]
+    assert "share" not in stats["state"]
+    assert "sum=" not in stats["avg_salary"]
+
+
+def test_small_floats_keep_significant_digits():
+    rows = [{"rate": 0.0042 * i} for i in range(1, 10)]
+    assert "min=0.0042" in statistics(rows, ["rate"])["rate"]
+
+
+def test_long_text_values_are_counted_before_truncation():
+    prefix = "x" * MAX_TEXT_CHARS
+    rows = [{"description": f"{prefix} {i}"} for i in range(10)]
+    assert "10 distinct" in statistics(rows, ["description"])["description"]
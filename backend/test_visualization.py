@@ -0,0 +1,67 @@
+"""Unit cases for visualization.py (run with: cd backend && python -m pytest test_visualization.py)."""
+
+import random
+
+from visualization import (
+    HISTOGRAM_COUNT_COLUMN, MAX_CHART_CATEGORIES, MAX_CHART_POINTS,
+    detect_visualization, downsample, histogram, top_n_with_other,
+)
+
+
+def test_top_n_keeps_ranking_and_sums_the_rest_of_an_additive_measure():
+    labels = [f"S{i}" for i in range(30)]
+    reduced = top_n_with_other(labels, [30 - i for i in range(30)], additive=True, limit=5)
+    assert reduced == [("S0", 30), ("S1", 29), ("S2", 28), ("S3", 27), ("Other (26)", sum(range(1, 27)))]
+
+
+def test_top_n_averages_the_rest_of_a_non_additive_measure():
+    labels = [f"S{i}" for i in range(10)]
+    reduced = top_n_with_other(labels, [10.0 * (i * 3 % 10) for i in range(10)], additive=False, limit=3)
+    # Unordered input is ranked by value first
+    assert reduced == [("S3", 90.0), ("S6", 80.0), ("Other (8)", 35.0)]
+
+
+def test_top_n_combines_repeated_labels():
+    assert top_n_with_other(["a", "b", "a", None], [1, 2, 3, 5], additive=True) == [("(none)", 5), ("a", 4), ("b", 2)]
+
+
+def test_histogram_uses_rounded_edges_and_covers_every_value():
+    bins = histogram(list(range(100)) + [None])
+    assert len(bins) == 10
+    assert bins[0] == ("0-10", 10)
+    assert bins[-1] == ("90-100", 10)
+    assert histogram([45000.0, 98000.0, 151000.0], bins=5)[0][0] == "25k-50k"
+    assert histogram([7, 7, 7]) == [("7", 3)]
+
+
+def test_downsample_sums_counts_and_averages_other_measures():
+    xs = list(range(100))
+    assert downsample(xs, [1] * 100, additive=True, points=10) == [(x, 10) for x in range(0, 100, 10)]
+    assert downsample(xs, [1.0] * 100, additive=False, points=10) == [(x, 1.0) for x in range(0, 100, 10)]
+    assert downsample(xs[:5], [1] * 5, additive=True, points=10) == [(x, 1) for x in range(5)]
+
+
+def test_long_ranking_is_cut_to_top_categories_plus_other():
+    rows = [{"title": f"Job {i}", "job_count": 1000 - i} for i in range(100)]
+    result = detect_visualization(rows, ["title", "job_count"])
+    assert result.config.type == "bar"
+    assert len(result.data) == MAX_CHART_CATEGORIES
+    assert result.data[-1]["title"].startswith("Other")
+    assert sum(row["job_count"] for row in result.data) == sum(row["job_count"] for row in rows)
+
+
+def test_unranked_salaries_become_a_histogram():
+    rng = random.Random(3)
+    rows = [{"title": f"Job {i}", "avg_salary": rng.uniform(40000, 200000)} for i in range(100)]
+    result = detect_visualization(rows, ["title", "avg_salary"])
+    assert result.config.type == "bar"
+    assert result.config.y_key == HISTOGRAM_COUNT_COLUMN
+    assert sum(row[HISTOGRAM_COUNT_COLUMN] for row in result.data) == 100
+
+
+def test_long_series_is_downsampled():
+    rows = [{"posted_date": f"2024-{1 + i // 28:02d}-{1 + i % 28:02d}", "job_count": 1} for i in range(300)]
+    result = detect_visualization(rows, ["posted_date", "job_count"])
+    assert result.config.type == "line"
+    assert len(result.data) <= MAX_CHART_POINTS
+    assert sum(row["job_count"] for row in result.data) == 300
@@ -1,16 +1,53 @@
 """
 Rule-based visualization detection for query results.
 Purely deterministic - no LLM calls.
+
+Results with more rows than a chart can show are reduced server-side, so the
+chart payload stays small while still summarizing every row that was fetched
+(execute_query fetches at most MAX_RESULT_ROWS, so "Other" buckets and
+histogram bins cover those rows, not rows past the cap):
+- ranked categories -> top N plus an "Other" bucket
+- a numeric distribution (e.g. one salary per posting) -> histogram bins
+- a long time series -> downsampled to a fixed number of points
 """
 
-from typing import List, Dict, Any, Optional
+import math
+import os
+import re
+from typing import List, Dict, Any, Optional, Sequence, Tuple
 from dataclasses import dataclass
 
+# Most bars in a category chart; longer rankings keep the top N-1 and fold the rest into "Other"
+MAX_CHART_CATEGORIES = int(os.getenv("MAX_CHART_CATEGORIES", "20"))
+
+# Most points in a line chart; longer series are averaged (or summed) into buckets
+MAX_CHART_POINTS = int(os.getenv("MAX_CHART_POINTS", "50"))
+
+# Target number of histogram bins (bin edges are rounded, so the actual count may differ by one)
+HISTOGRAM_BINS = int(os.getenv("HISTOGRAM_BINS", "10"))
+
+# Largest result shown as a pie chart
+MAX_PIE_SLICES = 8
+
+OTHER_LABEL = "Other"
+HISTOGRAM_COUNT_COLUMN = "count"
+
+DATE_RE = re.compile(r"^\d{4}-\d{2}(-\d{2})?([ T]\d{2}:\d{2}(:\d{2})?)?")
+
+# Name words of measures that can't be summed across rows (summing averages or salaries is meaningless)
+NON_ADDITIVE_WORDS = {
+    "avg", "average", "mean", "median", "min", "max", "minimum", "maximum", "lowest", "highest",
+    "salary", "pay", "rate", "ratio", "pct", "percent", "percentage", "share",
+}
+
+# Name words of numeric columns that are a time axis rather than a measure
+SERIES_WORDS = {"year", "quarter", "month", "week", "day", "date", "hour", "time"}
+
 
 @dataclass
 class VisualizationConfig:
     """Configuration for how to visualize query results."""
-    type: str  # "bar", "pie", "table", "none"
+    type: str  # "bar", "pie", "line", "table", "none"
     x_key: Optional[str] = None
     y_key: Optional[str] = None
     label_key: Optional[str] = None
@@ -18,28 +55,209 @@ class VisualizationConfig:
 
 @dataclass
 class VisualizationResult:
-    """Result containing config and potentially transformed data."""
+    """Result containing config and, for reduced charts, the chart's own rows."""
     config: VisualizationConfig
-    data: Optional[List[Dict[str, Any]]] = None
+    data: Optional[List[Dict[str, Any]]] = None     # None: chart the query rows as they are
     columns: Optional[List[str]] = None
 
 
-def is_numeric_column(data: List[Dict[str, Any]], column: str) -> bool:
-    """Check if a column contains numeric values."""
-    for row in data:
-        val = row.get(column)
-        if val is not None:
-            return isinstance(val, (int, float))
-    return False
+@dataclass
+class ColumnProfile:
+    """Type and values of one result column."""
+    name: str
+    kind: str  # "numeric", "text", "date", "empty", "mixed"
+    values: Sequence[Any]
+    distinct: int
+
+
+def _name_words(column: str) -> set:
+    return set(re.split(r"[^a-z0-9]+", column.lower()))
+
+
+def is_additive(column: str) -> bool:
+    """Whether a measure's values can be summed across rows (counts and totals, not averages or rates)."""
+    return not (_name_words(column) & NON_ADDITIVE_WORDS)
+
+
+def _column_kind(values: Sequence[Any]) -> str:
+    present = [v for v in values if v is not None]
+    if not present:
+        return "empty"
+    if all(isinstance(v, (int, float)) and not isinstance(v, bool) for v in present):
+        return "numeric"
+    if all(isinstance(v, str) for v in present):
+        return "date" if all(DATE_RE.match(v) for v in present) else "text"
+    return "mixed"
+
+
+def classify_columns(data: List[Dict[str, Any]], columns: List[str]) -> List[ColumnProfile]:
+    """
+    Type every column of a result set.
+
+    The rows are transposed into per-column value vectors in one pass, and each
+    column is typed from its whole vector (not just its first non-null value).
+
+    Args:
+        data: List of row dictionaries from query results
+        columns: List of column names
+
+    Returns:
+        One ColumnProfile per column, in column order
+    """
+    vectors = list(zip(*(tuple(row.get(c) for c in columns) for row in data))) or [() for _ in columns]
+    return [
+        ColumnProfile(name=name, kind=_column_kind(values), values=values,
+                      distinct=len(set(v for v in values if v is not None)))
+        for name, values in zip(columns, vectors)
+    ]
+
+
+def _pick_measure(numeric: List[ColumnProfile]) -> ColumnProfile:
+    """Prefer count columns over percentage columns for chart values, and anything over ID columns."""
+    measures = [p for p in numeric if "id" not in _name_words(p.name)] or numeric
+    for profile in measures:
+        name = profile.name.lower()
+        if 'count' in name or 'total' in name or 'num' in name:
+            return profile
+    return measures[0]
+
+
+def _mean(values: List[float]) -> float:
+    return sum(values) / len(values)
+
+
+def _combine(values: List[float], additive: bool) -> float:
+    combined = sum(values) if additive else _mean(values)
+    return round(combined, 2) if isinstance(combined, float) else combined
+
 
+def _is_monotonic(values: Sequence[Any]) -> bool:
+    pairs = list(zip(values, values[1:]))
+    return all(a >= b for a, b in pairs) or all(a <= b for a, b in pairs)
 
-def is_text_column(data: List[Dict[str, Any]], column: str) -> bool:
-    """Check if a column contains text values."""
-    for row in data:
-        val = row.get(column)
-        if val is not None:
-            return isinstance(val, str)
-    return False
+
+def top_n_with_other(
+    labels: Sequence[Any],
+    values: Sequence[Any],
+    additive: bool,
+    limit: int = MAX_CHART_CATEGORIES
+) -> List[Tuple[Any, float]]:
+    """
+    Reduce a ranking to at most `limit` categories.
+
+    Rows with the same label are combined first. If the result was already
+    ordered by the value (ORDER BY ... LIMIT), that order is kept; otherwise
+    categories are ranked by value. Everything past the first limit-1 goes
+    into one "Other (k)" bucket, summed for additive measures and averaged
+    otherwise.
+
+    Returns:
+        (label, value) pairs
+    """
+    groups: Dict[Any, List[float]] = {}
+    for label, value in zip(labels, values):
+        if value is not None:
+            groups.setdefault("(none)" if label is None else label, []).append(value)
+
+    ranked = [(label, _combine(group, additive)) for label, group in groups.items()]
+    if not _is_monotonic([value for _, value in ranked]):
+        ranked.sort(key=lambda item: item[1], reverse=True)
+    if len(ranked) <= limit:
+        return ranked
+
+    head, tail = ranked[:limit - 1], ranked[limit - 1:]
+    rest = [value for label, _ in tail for value in groups[label]]
+    return head + [(f"{OTHER_LABEL} ({len(tail)})", _combine(rest, additive))]
+
+
+def _nice_width(raw: float) -> float:
+    """Smallest 1/2/2.5/5 x 10^k step at least `raw`."""
+    magnitude = 10 ** math.floor(math.log10(raw))
+    for step in (1, 2, 2.5, 5, 10):
+        if step * magnitude >= raw:
+            return step * magnitude
+    return 10 * magnitude
+
+
+def _format_edge(value: float) -> str:
+    if abs(value) >= 1_000_000:
+        return f"{value / 1_000_000:g}M"
+    if abs(value) >= 1_000:
+        return f"{value / 1_000:g}k"
+    return f"{round(value, 6):g}"
+
+
+def histogram(values: Sequence[Any], bins: int = HISTOGRAM_BINS) -> List[Tuple[str, int]]:
+    """
+    Bin numeric values into equal-width ranges with rounded edges.
+
+    Returns:
+        ("lo-hi", count) pairs covering all non-null values
+    """
+    present = [v for v in values if v is not None]
+    low, high = min(present), max(present)
+    if low == high:
+        return [(_format_edge(low), len(present))]
+
+    width = _nice_width((high - low) / bins)
+    start = math.floor(low / width) * width
+    count = int((high - start) // width) + 1
+    counts = [0] * count
+    for value in present:
+        counts[min(int((value - start) // width), count - 1)] += 1
+    return [
+        (f"{_format_edge(start + i * width)}-{_format_edge(start + (i + 1) * width)}", n)
+        for i, n in enumerate(counts)
+    ]
+
+
+def downsample(
+    xs: Sequence[Any],
+    ys: Sequence[Any],
+    additive: bool,
+    points: int = MAX_CHART_POINTS
+) -> List[Tuple[Any, Optional[float]]]:
+    """
+    Reduce an ordered series to at most `points` points.
+
+    Consecutive points are grouped into equal buckets, each labelled with its
+    first x; counts are summed per bucket and other measures averaged, so every
+    row still contributes.
+    """
+    if len(xs) <= points:
+        return list(zip(xs, ys))
+    size = math.ceil(len(xs) / points)
+    reduced = []
+    for i in range(0, len(xs), size):
+        bucket = [y for y in ys[i:i + size] if y is not None]
+        reduced.append((xs[i], _combine(bucket, additive) if bucket else None))
+    return reduced
+
+
+def _chart(kind: str, x_key: str, y_key: str, pairs: List[Tuple[Any, Any]]) -> VisualizationResult:
+    """Chart result carrying only the reduced (x, y) rows."""
+    config = VisualizationConfig(type=kind, y_key=y_key)
+    if kind == "pie":
+        config.label_key = x_key
+    else:
+        config.x_key = x_key
+    return VisualizationResult(
+        config=config,
+        data=[{x_key: x, y_key: y} for x, y in pairs],
+        columns=[x_key, y_key]
+    )
+
+
+def _series(x: ColumnProfile, y: ColumnProfile) -> VisualizationResult:
+    order = sorted((i for i, value in enumerate(x.values) if value is not None), key=lambda i: x.values[i])
+    xs = [x.values[i] for i in order]
+    ys = [y.values[i] for i in order]
+    return _chart("line", x.name, y.name, downsample(xs, ys, is_additive(y.name)))
+
+
+def _distribution(value: ColumnProfile) -> VisualizationResult:
+    count_key = HISTOGRAM_COUNT_COLUMN if value.name != HISTOGRAM_COUNT_COLUMN else "rows"
+    return _chart("bar", value.name, count_key, histogram(value.values))
 
 
 def detect_visualization(
@@ -51,9 +269,14 @@ def detect_visualization(
 
     Rules:
     - No data or single row -> "none" (text is sufficient)
-    - 2 cols (text + numeric), 2-8 rows -> "pie"
-    - 2 cols (text + numeric), 9-20 rows -> "bar"
-    - >20 rows or complex data -> "table"
+    - date (or year/month...) + numeric -> "line", downsampled past MAX_CHART_POINTS
+    - text + count-like numeric, 2-8 rows -> "pie"
+    - text + numeric, up to MAX_CHART_CATEGORIES rows -> "bar"
+    - text + numeric, more rows -> "bar" of the top categories plus "Other",
+      or a histogram if the values are a distribution (e.g. salaries) rather
+      than a ranking
+    - numeric only, many rows -> histogram "bar"
+    - anything else -> "table"
 
     Args:
         data: List of row dictionaries from query results
@@ -67,53 +290,60 @@ def detect_visualization(
         return VisualizationResult(config=VisualizationConfig(type="none"))
 
     row_count = len(data)
-    col_count = len(columns)
 
     # Single row results - no chart needed, text response is sufficient
     # This avoids nonsensical charts like comparing salary ($139k) vs count (16)
     if row_count == 1:
         return VisualizationResult(config=VisualizationConfig(type="none"))
 
-    # Find text and numeric columns
-    text_cols = [c for c in columns if is_text_column(data, c)]
-    num_cols = [c for c in columns if is_numeric_column(data, c)]
+    profiles = classify_columns(data, columns)
+    text_cols = [p for p in profiles if p.kind == "text"]
+    date_cols = [p for p in profiles if p.kind == "date"]
+    num_cols = [p for p in profiles if p.kind == "numeric"]
+
+    # Time series
+    if date_cols and num_cols:
+        return _series(date_cols[0], _pick_measure(num_cols))
+    time_cols = [p for p in num_cols if _name_words(p.name) & SERIES_WORDS]
+    measures = [p for p in num_cols if all(p is not t for t in time_cols)]
+    if not text_cols and time_cols and measures:
+        return _series(time_cols[0], _pick_measure(measures))
 
     # If we have at least one text column and one numeric column, we can chart
     if text_cols and num_cols:
         label_col = text_cols[0]
-        # Prefer count columns over percentage columns for chart values
-        value_col = num_cols[0]
-        for nc in num_cols:
-            nc_lower = nc.lower()
-            if 'count' in nc_lower or 'total' in nc_lower or 'num' in nc_lower:
-                value_col = nc
-                break
-
-        # 2-8 rows -> pie chart (good for distributions)
-        if 2 <= row_count <= 8:
+        value_col = _pick_measure(num_cols)
+        additive = is_additive(value_col.name)
+
+        # 2-8 rows -> pie chart (good for shares of a whole; averages don't add up to one)
+        if row_count <= MAX_PIE_SLICES and additive:
             return VisualizationResult(
                 config=VisualizationConfig(
                     type="pie",
-                    label_key=label_col,
-                    y_key=value_col
+                    label_key=label_col.name,
+                    y_key=value_col.name
                 )
             )
-        # 9-20 rows -> bar chart (good for ranked lists)
-        elif row_count <= 20:
+        # Up to MAX_CHART_CATEGORIES rows -> bar chart (good for ranked lists)
+        if row_count <= MAX_CHART_CATEGORIES:
             return VisualizationResult(
                 config=VisualizationConfig(
                     type="bar",
-                    x_key=label_col,
-                    y_key=value_col
+                    x_key=label_col.name,
+                    y_key=value_col.name
                 )
             )
 
-    # More than 20 rows -> table
-    if row_count > 20:
-        return VisualizationResult(config=VisualizationConfig(type="table"))
+        # Unranked or repeated-label averages/salaries describe a distribution
+        values = [v for v in value_col.values if v is not None]
+        if not additive and (label_col.distinct < row_count or not _is_monotonic(values)):
+            return _distribution(value_col)
+        return _chart("bar", label_col.name, value_col.name,
+                      top_n_with_other(label_col.values, value_col.values, additive))
 
-    # Fallback for data that couldn't be charted
-    if row_count >= 2:
-        return VisualizationResult(config=VisualizationConfig(type="table"))
+    # Many bare numbers (e.g. salaries) -> histogram
+    if not text_cols and num_cols and row_count > MAX_CHART_CATEGORIES:
+        return _distribution(_pick_measure(num_cols))
 
-    return VisualizationResult(config=VisualizationConfig(type="none"))
+    # Fallback for data that couldn't be charted
+    return VisualizationResult(config=VisualizationConfig(type="table"))
@@ -7,6 +7,7 @@ import { ExampleQueries } from "@/components/ExampleQueries";
 import { LoadingState } from "@/components/LoadingState";
 import { ResultsCard } from "@/components/ResultsCard";
 import { Footer } from "@/components/Footer";
+import { normalizeQuestion } from "@/lib/utils";
 import { API_URL, type QueryResponse } from "@/types";
 
 function App() {
@@ -31,14 +32,24 @@ function App() {
     setResult(null);
 
     try {
-      const response = await fetch(`${API_URL}/query`, {
-        method: "POST",
-        headers: { "Content-Type": "application/json" },
-        body: JSON.stringify({ question }),
-      });
-
-      const data: QueryResponse = await response.json();
-      setResult(data);
+      // GET so the browser (and any proxy) can reuse answers and revalidate them by ETag.
+      // Sent normalized: the server redirects any other spelling to this URL.
+      const response = await fetch(
+        `${API_URL}/query?question=${encodeURIComponent(normalizeQuestion(question))}`
+      );
+
+      const data = await response.json();
+      if (!response.ok) {
+        // e.g. 400 for invalid questions, 503 + Retry-After when the server is overloaded
+        setResult({
+          success: false,
+          response: data.detail || "The server could not process your question. Please try again.",
+          sql: "",
+          error: `HTTP ${response.status}`,
+        });
+        return;
+      }
+      setResult(data as QueryResponse);
     } catch (error) {
       setResult({
         success: false,
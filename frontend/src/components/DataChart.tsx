@@ -10,11 +10,15 @@ import {
   Pie,
   Cell,
   Legend,
+  LineChart,
+  Line,
 } from "recharts";
 import type { VisualizationConfig } from "@/types";
 
 interface DataChartProps {
   data: Record<string, unknown>[];
+  /** Chart-sized rows from the backend when data is too large to plot */
+  chartData?: Record<string, unknown>[];
   columns: string[];
   visualization: VisualizationConfig;
 }
@@ -62,17 +66,23 @@ function formatValue(value: unknown, columnName: string): string {
   return String(value);
 }
 
-export function DataChart({ data, columns, visualization }: DataChartProps) {
+export function DataChart({ data, chartData, columns, visualization }: DataChartProps) {
   if (visualization.type === "none" || !data || data.length === 0) {
     return null;
   }
 
+  const plotted = chartData ?? data;
+
   if (visualization.type === "bar") {
-    return <BarChartView data={data} visualization={visualization} />;
+    return <BarChartView data={plotted} visualization={visualization} />;
   }
 
   if (visualization.type === "pie") {
-    return <PieChartView data={data} visualization={visualization} />;
+    return <PieChartView data={plotted} visualization={visualization} />;
+  }
+
+  if (visualization.type === "line") {
+    return <LineChartView data={plotted} visualization={visualization} />;
   }
 
   if (visualization.type === "table") {
@@ -192,6 +202,60 @@ function PieChartView({
   );
 }
 
+function LineChartView({
+  data,
+  visualization,
+}: {
+  data: Record<string, unknown>[];
+  visualization: VisualizationConfig;
+}) {
+  const xKey = visualization.x_key || "";
+  const yKey = visualization.y_key || "";
+
+  // Format data for recharts (series are already downsampled by the backend)
+  const chartData = data.map((row) => ({
+    name: String(row[xKey] ?? ""),
+    value: row[yKey] === null || row[yKey] === undefined ? null : Number(row[yKey]),
+  }));
+
+  return (
+    <div className="mt-4 h-64 w-full">
+      <ResponsiveContainer width="100%" height="100%">
+        <LineChart
+          data={chartData}
+          margin={{ top: 10, right: 10, left: 10, bottom: 40 }}
+        >
+          <CartesianGrid strokeDasharray="3 3" className="stroke-slate-200 dark:stroke-slate-700" />
+          <XAxis
+            dataKey="name"
+            angle={-45}
+            textAnchor="end"
+            height={60}
+            minTickGap={8}
+            tick={{ fontSize: 11, fill: "currentColor" }}
+            className="text-slate-600 dark:text-slate-400"
+          />
+          <YAxis
+            tick={{ fontSize: 11, fill: "currentColor" }}
+            className="text-slate-600 dark:text-slate-400"
+          />
+          <Tooltip
+            contentStyle={{
+              backgroundColor: "var(--tooltip-bg, #fff)",
+              border: "1px solid var(--tooltip-border, #e2e8f0)",
+              borderRadius: "6px",
+              fontSize: "12px",
+            }}
+            labelStyle={{ fontWeight: 500 }}
+            formatter={(value) => (value as number).toLocaleString()}
+          />
+          <Line type="monotone" dataKey="value" stroke="#3b82f6" strokeWidth={2} dot={false} connectNulls />
+        </LineChart>
+      </ResponsiveContainer>
+    </div>
+  );
+}
+
 function TableView({
   data,
   columns,
@@ -77,6 +77,7 @@ export function ResultsCard({ result, onReset }: ResultsCardProps) {
             result.columns && (
               <DataChart
                 data={result.data}
+                chartData={result.chart_data ?? undefined}
                 columns={result.columns}
                 visualization={result.visualization}
               />
@@ -4,3 +4,9 @@ import { twMerge } from "tailwind-merge"
 export function cn(...inputs: ClassValue[]) {
   return twMerge(clsx(inputs))
 }
+
+// Same rules as normalize_question in backend/query_pipeline.py, so GET /query is
+// requested at its canonical URL rather than redirected there
+export function normalizeQuestion(question: string) {
+  return question.replace(/\s+/g, " ").trim().replace(/[?.! ]+$/, "").toLowerCase()
+}
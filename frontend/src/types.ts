@@ -1,5 +1,5 @@
 export interface VisualizationConfig {
-  type: "bar" | "pie" | "table" | "none";
+  type: "bar" | "pie" | "line" | "table" | "none";
   x_key?: string;
   y_key?: string;
   label_key?: string;
@@ -13,6 +13,7 @@ export interface QueryResponse {
   data?: Record<string, unknown>[];
   columns?: string[];
   visualization?: VisualizationConfig;
+  chart_data?: Record<string, unknown>[] | null;
 }
 
 export interface ExampleQuery {
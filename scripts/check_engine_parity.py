@@ -0,0 +1,159 @@
+"""
+Parity check between the SQLite and columnar (DuckDB) execution backends.
+
+Runs every SQL statement of the benchmark corpus (scripts/benchmark_corpus.json)
+on both backends of backend/database.py and compares the results: same columns,
+same rows in any order, floats equal within a tolerance. Also reports each
+statement's routing decision and the speedup of the columnar engine.
+
+Statements DuckDB can't run are reported as fallbacks (the backend retries them
+on SQLite), not failures. Exits non-zero if any statement returns different
+results. The same comparison runs in the test suite (backend/test_engine_parity.py,
+which also covers a generated database); this script adds per-statement
+routing and timings.
+
+Requires a current Parquet export (python scripts/export_parquet.py).
+
+Usage:
+    python scripts/check_engine_parity.py
+    python scripts/check_engine_parity.py --db data/linkedin_jobs_sampled.db --parquet /tmp/parquet --repeat 5
+"""
+
+import argparse
+import json
+import math
+import sys
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+BACKEND_DIR = Path(__file__).parent.parent / "backend"
+DATA_DIR = Path(__file__).parent.parent / "data"
+CORPUS_PATH = Path(__file__).parent / "benchmark_corpus.json"
+
+sys.path.insert(0, str(BACKEND_DIR))
+
+import database  # noqa: E402
+
+# Relative tolerance for floating point values: summation order differs between
+# engines, but anything coarser than double rounding (e.g. a 32-bit float) must fail
+FLOAT_TOLERANCE = 1e-9
+
+
+def values_equal(a: Any, b: Any) -> bool:
+    if isinstance(a, (int, float)) and isinstance(b, (int, float)) and not isinstance(a, bool):
+        return math.isclose(a, b, rel_tol=FLOAT_TOLERANCE, abs_tol=FLOAT_TOLERANCE)
+    return a == b
+
+
+def row_key(row: Tuple[Any, ...]) -> Tuple[Any, ...]:
+    """Sort key that orders mixed types and NULLs deterministically."""
+    return tuple((v is None, type(v).__name__, round(v, 6) if isinstance(v, float) else v) for v in row)
+
+
+def compare_results(expected: database.Execution, actual: database.Execution) -> str:
+    """
+    Compare two executions; returns "" if they match, else what differs.
+
+    Rows tied with the last expected row on every numeric column are ignored,
+    since ORDER BY ... LIMIT may keep any of them on either engine.
+    """
+    if expected.columns != actual.columns:
+        return f"columns differ: {expected.columns} vs {actual.columns}"
+    if len(expected.results) != len(actual.results):
+        return f"row counts differ: {len(expected.results)} vs {len(actual.results)}"
+
+    def rows(execution: database.Execution) -> List[Tuple[Any, ...]]:
+        return [tuple(r[c] for c in execution.columns) for r in execution.results]
+
+    left, right = rows(expected), rows(actual)
+    boundary = [v for v in left[-1] if isinstance(v, (int, float))] if left else []
+
+    def at_boundary(row: Tuple[Any, ...]) -> bool:
+        numbers = [v for v in row if isinstance(v, (int, float))]
+        return bool(boundary) and len(numbers) == len(boundary) and all(map(values_equal, numbers, boundary))
+
+    left = sorted((r for r in left if not at_boundary(r)), key=row_key)
+    right = sorted((r for r in right if not at_boundary(r)), key=row_key)
+    if len(left) != len(right):
+        return "rows differ at the LIMIT boundary"
+    for a, b in zip(left, right):
+        if not all(map(values_equal, a, b)):
+            return f"rows differ: {a} vs {b}"
+    return ""
+
+
+def timed(backend: database.ExecutionBackend, sql: str, repeat: int) -> database.Execution:
+    """Run a statement repeat times; returns the last execution with the best latency."""
+    best = None
+    for _ in range(repeat):
+        execution = backend.execute(sql, (), database.MAX_RESULT_ROWS)
+        if best is None or execution.latency_ms < best:
+            best = execution.latency_ms
+    execution.latency_ms = best
+    return execution
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Compare SQLite and DuckDB results on the benchmark corpus")
+    parser.add_argument("--db", type=Path, default=DATA_DIR / "linkedin_jobs.db", help="SQLite database")
+    parser.add_argument("--parquet", type=Path, default=DATA_DIR / "parquet", help="Parquet export of the database")
+    parser.add_argument("--corpus", type=Path, default=CORPUS_PATH, help="Benchmark corpus (JSON)")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per statement and engine (best time is reported)")
+    args = parser.parse_args()
+
+    if not args.db.exists():
+        print(f"ERROR: database not found: {args.db}")
+        return 1
+    database.DB_PATH = args.db
+    manifest = database.read_export_manifest(args.parquet)
+    if manifest is None:
+        print(f"ERROR: no Parquet export in {args.parquet} (run scripts/export_parquet.py)")
+        return 1
+    if manifest.get("source_fingerprint") != database.get_db_fingerprint():
+        print(f"ERROR: {args.parquet} was exported from a different build of {args.db}; re-run the export")
+        return 1
+    try:
+        duck = database.DuckDBBackend(args.parquet)
+    except ImportError:
+        print("ERROR: duckdb is not installed (pip install duckdb)")
+        return 1
+
+    with open(args.corpus) as f:
+        corpus = [entry["sql"] for entry in json.load(f)]
+
+    print(f"{'route':<8} {'sqlite ms':>10} {'duckdb ms':>10} {'speedup':>8}  result")
+    mismatches, fallbacks = 0, 0
+    totals: Dict[str, float] = {"sqlite": 0.0, "duckdb": 0.0}
+    for sql in corpus:
+        route = "duckdb" if database.is_analytic(sql) else "sqlite"
+        expected = timed(database.sqlite_backend, sql, args.repeat)
+        try:
+            actual = timed(duck, sql, args.repeat)
+        except Exception as e:
+            fallbacks += 1
+            print(f"{route:<8} {expected.latency_ms:>10.1f} {'-':>10} {'-':>8}  FALLBACK ({e})")
+            print(f"         {sql[:100]}")
+            continue
+
+        problem = compare_results(expected, actual)
+        if problem:
+            mismatches += 1
+        else:
+            totals["sqlite"] += expected.latency_ms
+            totals["duckdb"] += actual.latency_ms
+        speedup = expected.latency_ms / actual.latency_ms if actual.latency_ms else float("inf")
+        print(f"{route:<8} {expected.latency_ms:>10.1f} {actual.latency_ms:>10.1f} {speedup:>7.1f}x  "
+              f"{'MISMATCH: ' + problem if problem else 'ok'}")
+        print(f"         {sql[:100]}")
+
+    print()
+    print(f"{len(corpus)} statements: {len(corpus) - mismatches - fallbacks} match, "
+          f"{mismatches} mismatch, {fallbacks} fall back to SQLite")
+    if totals["duckdb"]:
+        print(f"Matching statements: SQLite {totals['sqlite']:.0f} ms, DuckDB {totals['duckdb']:.0f} ms "
+              f"({totals['sqlite'] / totals['duckdb']:.1f}x)")
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -3,11 +3,15 @@ Create SQLite database from LinkedIn job postings CSV files.
 Loads all 11 tables with proper types and creates indexes for query performance.
 """
 
+import re
 import sqlite3
 import pandas as pd
 from pathlib import Path
 import sys
 
+from db_indexes import create_indexes
+from export_parquet import export_if_installed
+
 # Paths
 DATA_DIR = Path(__file__).parent.parent / "data"
 DB_PATH = DATA_DIR / "linkedin_jobs.db"
@@ -67,26 +71,207 @@ TABLES = {
     },
 }
 
-# Indexes to create for query performance
-INDEXES = [
-    "CREATE INDEX IF NOT EXISTS idx_postings_job_id ON postings(job_id)",
-    "CREATE INDEX IF NOT EXISTS idx_postings_company_id ON postings(company_id)",
-    "CREATE INDEX IF NOT EXISTS idx_postings_title ON postings(title)",
-    "CREATE INDEX IF NOT EXISTS idx_postings_location ON postings(location)",
-    "CREATE INDEX IF NOT EXISTS idx_postings_experience ON postings(formatted_experience_level)",
-    "CREATE INDEX IF NOT EXISTS idx_postings_remote ON postings(remote_allowed)",
-    "CREATE INDEX IF NOT EXISTS idx_companies_company_id ON companies(company_id)",
-    "CREATE INDEX IF NOT EXISTS idx_companies_name ON companies(name)",
-    "CREATE INDEX IF NOT EXISTS idx_job_skills_job_id ON job_skills(job_id)",
-    "CREATE INDEX IF NOT EXISTS idx_job_skills_skill ON job_skills(skill_abr)",
-    "CREATE INDEX IF NOT EXISTS idx_job_industries_job_id ON job_industries(job_id)",
-    "CREATE INDEX IF NOT EXISTS idx_job_industries_industry ON job_industries(industry_id)",
-    "CREATE INDEX IF NOT EXISTS idx_salaries_job_id ON salaries(job_id)",
-    "CREATE INDEX IF NOT EXISTS idx_benefits_job_id ON benefits(job_id)",
-    "CREATE INDEX IF NOT EXISTS idx_employee_counts_company_id ON employee_counts(company_id)",
+# Wide text columns kept out of the hot tables. Each table is stored as
+# <name>_base (small numeric/categorical columns) plus <name>_text (keyed by id),
+# and a view named <name> restores the original shape so existing SQL keeps working.
+# The view reads text through correlated subqueries, which SQLite only evaluates
+# when a query actually selects those columns - scans and aggregates touch only _base.
+PARTITIONED_TABLES = {
+    "postings": {"key": "job_id", "text_columns": ["description", "skills_desc"]},
+    "companies": {"key": "company_id", "text_columns": ["description"]},
+}
+
+
+# Multipliers to convert a pay_period figure to a yearly figure
+# (2080 = 40 hours x 52 weeks, 260 = 5 days x 52 weeks)
+PAY_PERIOD_MULTIPLIERS = {
+    "HOURLY": 2080,
+    "DAILY": 260,
+    "WEEKLY": 52,
+    "BIWEEKLY": 26,
+    "MONTHLY": 12,
+    "YEARLY": 1,
+}
+
+# Integer codes for formatted_experience_level, ordered by seniority so
+# "mid-senior or above" is a simple range predicate
+EXPERIENCE_LEVELS = {
+    "Internship": 1,
+    "Entry level": 2,
+    "Associate": 3,
+    "Mid-Senior level": 4,
+    "Director": 5,
+    "Executive": 6,
+}
+
+# Integer codes for formatted_work_type
+WORK_TYPES = {
+    "Full-time": 1,
+    "Part-time": 2,
+    "Contract": 3,
+    "Temporary": 4,
+    "Internship": 5,
+    "Volunteer": 6,
+    "Other": 7,
+}
+
+# Abbreviations expanded when normalizing titles
+TITLE_ABBREVIATIONS = {
+    r"\bsr\b": "senior",
+    r"\bjr\b": "junior",
+    r"\bmgr\b": "manager",
+    r"\bengr?\b": "engineer",
+    r"\bdev\b": "developer",
+    r"\bassoc\b": "associate",
+    r"\basst\b": "assistant",
+    r"\brep\b": "representative",
+    r"\bspec\b": "specialist",
+    r"\badmin\b": "administrative",
+    r"\bfull stack\b": "fullstack",
+}
+
+# Title families: canonical name -> pattern matched against the normalized title.
+# Checked in order, so more specific families come first. Unmatched titles get NULL.
+TITLE_FAMILIES = [
+    ("machine learning engineer", r"\b(machine learning|ml|ai) engineer"),
+    ("data scientist", r"\bdata scien"),
+    ("data engineer", r"\bdata engineer"),
+    ("data analyst", r"\bdata analyst"),
+    ("business analyst", r"\bbusiness (intelligence )?analyst"),
+    ("financial analyst", r"\bfinancial analyst"),
+    ("devops engineer", r"\b(devops|site reliability|sre|cloud) engineer"),
+    ("software engineer", r"\b(software|backend|frontend|fullstack|web|mobile|ios|android|java|python|net) (engineer|developer)|\bprogrammer\b"),
+    ("mechanical engineer", r"\bmechanical engineer"),
+    ("electrical engineer", r"\belectrical engineer"),
+    ("civil engineer", r"\bcivil engineer"),
+    ("product manager", r"\bproduct (manager|owner)"),
+    ("project manager", r"\b(project|program) manager"),
+    ("registered nurse", r"\bregistered nurse|\brn\b"),
+    ("nurse practitioner", r"\bnurse practitioner"),
+    ("licensed practical nurse", r"\b(licensed practical|licensed vocational) nurse|\blpn\b|\blvn\b"),
+    ("nursing assistant", r"\b(certified )?nursing assistant|\bcna\b"),
+    ("medical assistant", r"\bmedical assistant"),
+    ("physical therapist", r"\bphysical therap"),
+    ("pharmacist", r"\bpharmacist"),
+    ("physician", r"\bphysician\b|\bhospitalist\b"),
+    ("accountant", r"\baccountant\b|\bcpa\b"),
+    ("account executive", r"\baccount executive"),
+    ("sales representative", r"\bsales (representative|associate|consultant|executive)"),
+    ("customer service representative", r"\bcustomer (service|support|success)"),
+    ("administrative assistant", r"\b(administrative|executive|office) assistant|\breceptionist\b"),
+    ("recruiter", r"\brecruit"),
+    ("human resources", r"\bhuman resources\b|\bhr\b"),
+    ("marketing manager", r"\bmarketing (manager|director|specialist|coordinator)"),
+    ("teacher", r"\bteacher\b|\binstructor\b"),
+    ("attorney", r"\battorney\b|\blawyer\b|\bcounsel\b"),
+    ("paralegal", r"\bparalegal"),
+    ("it support", r"\b(it|help desk|desktop|technical) support|\bhelp desk\b"),
+    ("truck driver", r"\b(truck|cdl|delivery) driver|\bdriver\b"),
+    ("warehouse associate", r"\bwarehouse|\bmaterial handler|\bforklift"),
+    ("cashier", r"\bcashier"),
+    ("store manager", r"\b(store|restaurant|shift) manager"),
 ]
 
 
+def normalize_title(titles: pd.Series) -> pd.Series:
+    """Lowercase titles, strip punctuation and expand common abbreviations."""
+    normalized = titles.fillna("").str.lower()
+    normalized = normalized.str.replace(r"\([^)]*\)", " ", regex=True)
+    normalized = normalized.str.replace(r"[^a-z0-9+#.]+", " ", regex=True)
+    normalized = normalized.str.replace(r"(?<![a-z])\.|\.(?![a-z])", " ", regex=True)
+    for pattern, replacement in TITLE_ABBREVIATIONS.items():
+        normalized = normalized.str.replace(pattern, replacement, regex=True)
+    normalized = normalized.str.replace(r"\s+", " ", regex=True).str.strip()
+    return normalized.mask(normalized == "")
+
+
+def title_family_ids(normalized_titles: pd.Series) -> pd.Series:
+    """Map normalized titles to title_family_id (1-based position in TITLE_FAMILIES)."""
+    # Match each distinct title once, then broadcast back to every row
+    unique_titles = normalized_titles.dropna().unique()
+    family_of = {}
+    for title in unique_titles:
+        for family_id, (_, pattern) in enumerate(TITLE_FAMILIES, 1):
+            if re.search(pattern, title):
+                family_of[title] = family_id
+                break
+    return normalized_titles.map(family_of).astype("Int64")
+
+
+def add_derived_posting_columns(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Add query-ready columns to postings so common questions don't need
+    per-row expressions in SQL.
+
+    - annual_min_salary / annual_med_salary / annual_max_salary: salary figures
+      converted to yearly using pay_period
+    - annual_salary: one representative yearly figure (median, else midpoint of min/max)
+    - normalized_title / title_family_id: canonical lowercase title and its family
+    - experience_level_code / work_type_code: integer codes for the formatted_* columns
+    """
+    multiplier = df["pay_period"].str.upper().map(PAY_PERIOD_MULTIPLIERS)
+    for column in ("min_salary", "med_salary", "max_salary"):
+        df[f"annual_{column}"] = (pd.to_numeric(df[column], errors="coerce") * multiplier).round(0)
+    midpoint = (df["annual_min_salary"] + df["annual_max_salary"]) / 2
+    df["annual_salary"] = df["annual_med_salary"].fillna(midpoint)
+
+    df["normalized_title"] = normalize_title(df["title"])
+    df["title_family_id"] = title_family_ids(df["normalized_title"])
+
+    df["experience_level_code"] = df["formatted_experience_level"].map(EXPERIENCE_LEVELS).astype("Int64")
+    df["work_type_code"] = df["formatted_work_type"].map(WORK_TYPES).astype("Int64")
+    return df
+
+
+def create_lookup_tables(conn: sqlite3.Connection):
+    """Create the dictionary tables behind the derived code columns."""
+    print("\nCreating lookup tables...")
+    lookups = {
+        "title_families": ("title_family_id", "title_family",
+                           [(i, name) for i, (name, _) in enumerate(TITLE_FAMILIES, 1)]),
+        "experience_levels": ("experience_level_code", "experience_level",
+                              [(code, name) for name, code in EXPERIENCE_LEVELS.items()]),
+        "work_types": ("work_type_code", "work_type",
+                       [(code, name) for name, code in WORK_TYPES.items()]),
+    }
+    cursor = conn.cursor()
+    for table, (key, label, rows) in lookups.items():
+        print(f"  {table} ({len(rows)} rows)")
+        cursor.execute(f"DROP TABLE IF EXISTS {table}")
+        cursor.execute(f"CREATE TABLE {table} ({key} INTEGER PRIMARY KEY, {label} TEXT NOT NULL)")
+        cursor.executemany(f"INSERT INTO {table} VALUES (?, ?)", rows)
+    conn.commit()
+
+
+def write_partitioned_table(table_name: str, df: pd.DataFrame, conn: sqlite3.Connection):
+    """Write a table as a hot _base table plus a _text side table, behind a compatibility view."""
+    config = PARTITIONED_TABLES[table_name]
+    key = config["key"]
+    text_columns = [c for c in config["text_columns"] if c in df.columns]
+    base_table, text_table = f"{table_name}_base", f"{table_name}_text"
+
+    df.drop(columns=text_columns).to_sql(base_table, conn, if_exists="replace", index=False)
+
+    # INTEGER PRIMARY KEY makes each text lookup a single rowid seek
+    cursor = conn.cursor()
+    cursor.execute(f"DROP TABLE IF EXISTS {text_table}")
+    cursor.execute(
+        f"CREATE TABLE {text_table} ({key} INTEGER PRIMARY KEY, "
+        + ", ".join(f"{c} TEXT" for c in text_columns) + ")"
+    )
+    text_df = df[[key] + text_columns].dropna(subset=[key]).drop_duplicates(subset=[key])
+    text_df.to_sql(text_table, conn, if_exists="append", index=False)
+
+    select_list = [
+        f"(SELECT {text_table}.{c} FROM {text_table} WHERE {text_table}.{key} = {base_table}.{key}) AS {c}"
+        if c in text_columns else f"{base_table}.{c}"
+        for c in df.columns
+    ]
+    cursor.execute(f"DROP VIEW IF EXISTS {table_name}")
+    cursor.execute(f"CREATE VIEW {table_name} AS SELECT {', '.join(select_list)} FROM {base_table}")
+    conn.commit()
+
+
 def load_csv_to_sqlite(table_name: str, config: dict, conn: sqlite3.Connection) -> int:
     """Load a CSV file into SQLite table."""
     csv_path = config["csv"]
@@ -97,25 +282,21 @@ def load_csv_to_sqlite(table_name: str, config: dict, conn: sqlite3.Connection)
     # Read CSV with pandas (handles quoted fields with newlines properly)
     df = pd.read_csv(csv_path, dtype=dtypes, low_memory=False)
 
-    # Write to SQLite
-    df.to_sql(table_name, conn, if_exists="replace", index=False)
+    # Add query-ready derived columns (annualized salary, canonical title, codes)
+    if table_name == "postings":
+        df = add_derived_posting_columns(df)
+
+    # Write to SQLite (wide tables are split into hot + text tables behind a view)
+    if table_name in PARTITIONED_TABLES:
+        write_partitioned_table(table_name, df, conn)
+    else:
+        df.to_sql(table_name, conn, if_exists="replace", index=False)
 
     row_count = len(df)
     print(f"{row_count:,} rows")
     return row_count
 
 
-def create_indexes(conn: sqlite3.Connection):
-    """Create indexes for query performance."""
-    print("\nCreating indexes...")
-    cursor = conn.cursor()
-    for idx_sql in INDEXES:
-        idx_name = idx_sql.split()[5]  # Extract index name
-        print(f"  {idx_name}")
-        cursor.execute(idx_sql)
-    conn.commit()
-
-
 def generate_schema_docs(conn: sqlite3.Connection) -> str:
     """Generate schema documentation for LLM prompt."""
     cursor = conn.cursor()
@@ -124,9 +305,13 @@ def generate_schema_docs(conn: sqlite3.Connection) -> str:
     schema_docs.append("DATABASE SCHEMA")
     schema_docs.append("=" * 50)
 
-    # Get all tables
-    cursor.execute("SELECT name FROM sqlite_master WHERE type='table' ORDER BY name")
-    tables = [row[0] for row in cursor.fetchall()]
+    # Get all tables, documenting partitioned tables through their compatibility views
+    internal = {f"{t}_{suffix}" for t in PARTITIONED_TABLES for suffix in ("base", "text")}
+    cursor.execute(
+        "SELECT name FROM sqlite_master WHERE type IN ('table', 'view') "
+        "AND name NOT LIKE 'sqlite_%' ORDER BY name"
+    )
+    tables = [row[0] for row in cursor.fetchall() if row[0] not in internal]
 
     for table in tables:
         cursor.execute(f"PRAGMA table_info({table})")
@@ -155,6 +340,29 @@ def generate_schema_docs(conn: sqlite3.Connection) -> str:
 - companies.company_id -> employee_counts.company_id
 - companies.company_id -> company_industries.company_id
 - companies.company_id -> company_specialities.company_id
+- postings.title_family_id -> title_families.title_family_id
+- postings.experience_level_code -> experience_levels.experience_level_code
+- postings.work_type_code -> work_types.work_type_code
+""")
+
+    # Document the derived columns added at ingest
+    schema_docs.append("=" * 50)
+    schema_docs.append("DERIVED COLUMNS (postings)")
+    schema_docs.append("=" * 50)
+    schema_docs.append("""
+- annual_min_salary, annual_med_salary, annual_max_salary (REAL) - salary converted to
+  yearly using pay_period (HOURLY x2080, WEEKLY x52, MONTHLY x12, ...). NULL if unknown.
+- annual_salary (REAL) - one yearly figure per posting (median, else midpoint of min/max).
+  Use AVG(annual_salary) for salary questions instead of converting pay periods by hand.
+- normalized_title (TEXT) - lowercase title without punctuation, abbreviations expanded
+- title_family_id (INTEGER) - canonical job family (join title_families); NULL if unmatched
+- experience_level_code (INTEGER) - 1 Internship, 2 Entry level, 3 Associate,
+  4 Mid-Senior level, 5 Director, 6 Executive (ordered by seniority)
+- work_type_code (INTEGER) - join work_types for the label
+
+Note: postings and companies are views. Their description text is stored in
+separate tables and only read when selected - avoid selecting description
+unless the question needs it.
 """)
 
     return "\n".join(schema_docs)
@@ -182,7 +390,8 @@ def main():
             print(f"ERROR: {e}")
             sys.exit(1)
 
-    # Create indexes
+    # Create lookup tables for the derived columns, then indexes
+    create_lookup_tables(conn)
     create_indexes(conn)
 
     # Generate and save schema documentation
@@ -202,6 +411,8 @@ def main():
     print(f"Database size: {db_size_mb:.1f} MB")
     print(f"Location: {DB_PATH}")
 
+    export_if_installed(DB_PATH)
+
 
 if __name__ == "__main__":
     main()
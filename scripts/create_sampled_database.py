@@ -6,6 +6,8 @@ Reduces the postings table to 30K rows to keep file size manageable.
 import sqlite3
 from pathlib import Path
 
+from db_indexes import create_indexes
+
 DATA_DIR = Path(__file__).parent.parent / "data"
 SOURCE_DB = DATA_DIR / "linkedin_jobs.db"
 SAMPLED_DB = DATA_DIR / "linkedin_jobs_sampled.db"
@@ -13,6 +15,15 @@ SAMPLED_DB = DATA_DIR / "linkedin_jobs_sampled.db"
 SAMPLE_SIZE = 15000  # Number of postings to keep (smaller for GitHub)
 
 
+def copy_text_table(source: sqlite3.Connection, table: str, key: str, ids_str: str):
+    """Copy a partitioned *_text table, keeping its INTEGER PRIMARY KEY (CREATE TABLE AS would drop it)."""
+    create_sql = source.execute(
+        "SELECT sql FROM main.sqlite_master WHERE type = 'table' AND name = ?", (table,)
+    ).fetchone()[0]
+    source.execute(create_sql.replace(f"CREATE TABLE {table}", f"CREATE TABLE dest.{table}", 1))
+    source.execute(f"INSERT INTO dest.{table} SELECT * FROM {table} WHERE {key} IN ({ids_str})")
+
+
 def create_sampled_db():
     print(f"Creating sampled database with {SAMPLE_SIZE} postings...")
 
@@ -38,9 +49,10 @@ def create_sampled_db():
     print("Copying sampled postings...")
     source.execute("ATTACH DATABASE ? AS dest", (str(SAMPLED_DB),))
     source.execute(f"""
-        CREATE TABLE dest.postings AS
-        SELECT * FROM postings WHERE job_id IN ({job_ids_str})
+        CREATE TABLE dest.postings_base AS
+        SELECT * FROM postings_base WHERE job_id IN ({job_ids_str})
     """)
+    copy_text_table(source, "postings_text", "job_id", job_ids_str)
 
     # Copy related tables (filtered by sampled job_ids)
     print("Copying related job tables...")
@@ -69,9 +81,10 @@ def create_sampled_db():
     # Copy company tables (filtered)
     print("Copying company tables...")
     source.execute(f"""
-        CREATE TABLE dest.companies AS
-        SELECT * FROM companies WHERE company_id IN ({company_ids_str})
+        CREATE TABLE dest.companies_base AS
+        SELECT * FROM companies_base WHERE company_id IN ({company_ids_str})
     """)
+    copy_text_table(source, "companies_text", "company_id", company_ids_str)
     source.execute(f"""
         CREATE TABLE dest.employee_counts AS
         SELECT * FROM employee_counts WHERE company_id IN ({company_ids_str})
@@ -89,25 +102,21 @@ def create_sampled_db():
     print("Copying reference tables...")
     source.execute("CREATE TABLE dest.skills AS SELECT * FROM skills")
     source.execute("CREATE TABLE dest.industries AS SELECT * FROM industries")
+    source.execute("CREATE TABLE dest.title_families AS SELECT * FROM title_families")
+    source.execute("CREATE TABLE dest.experience_levels AS SELECT * FROM experience_levels")
+    source.execute("CREATE TABLE dest.work_types AS SELECT * FROM work_types")
+
+    # Compatibility views (postings, companies) over the partitioned tables
+    views = [row[0] for row in source.execute("SELECT sql FROM main.sqlite_master WHERE type = 'view'")]
 
     source.commit()
     source.close()
 
-    # Create indexes on new database
-    print("Creating indexes...")
-    dest_cursor = dest.cursor()
-    indexes = [
-        "CREATE INDEX idx_postings_job_id ON postings(job_id)",
-        "CREATE INDEX idx_postings_company_id ON postings(company_id)",
-        "CREATE INDEX idx_postings_title ON postings(title)",
-        "CREATE INDEX idx_job_skills_job_id ON job_skills(job_id)",
-        "CREATE INDEX idx_job_skills_skill ON job_skills(skill_abr)",
-        "CREATE INDEX idx_job_industries_job_id ON job_industries(job_id)",
-        "CREATE INDEX idx_companies_company_id ON companies(company_id)",
-    ]
-    for idx in indexes:
-        dest_cursor.execute(idx)
-    dest.commit()
+    for view_sql in views:
+        dest.execute(view_sql)
+
+    # Same indexes as the full database
+    create_indexes(dest)
 
     # Vacuum to optimize file size
     print("Optimizing database...")
@@ -0,0 +1,50 @@
+"""
+Indexes shared by the database build scripts.
+
+create_database.py and create_sampled_database.py both build the same set, so
+the sampled deployment database is planned like the full one.
+"""
+
+import sqlite3
+
+# Indexes to create for query performance
+# Review against the real workload with: python scripts/index_advisor.py
+INDEXES = [
+    "CREATE INDEX IF NOT EXISTS idx_postings_job_id ON postings_base(job_id)",
+    "CREATE INDEX IF NOT EXISTS idx_postings_company_id ON postings_base(company_id)",
+    "CREATE INDEX IF NOT EXISTS idx_postings_title ON postings_base(title)",
+    "CREATE INDEX IF NOT EXISTS idx_postings_location ON postings_base(location)",
+    "CREATE INDEX IF NOT EXISTS idx_postings_experience ON postings_base(formatted_experience_level)",
+    "CREATE INDEX IF NOT EXISTS idx_postings_remote ON postings_base(remote_allowed)",
+    # Derived columns: salary/title aggregations become indexed GROUP BYs on compact columns
+    "CREATE INDEX IF NOT EXISTS idx_postings_title_family_salary ON postings_base(title_family_id, annual_salary)",
+    "CREATE INDEX IF NOT EXISTS idx_postings_normalized_title ON postings_base(normalized_title)",
+    "CREATE INDEX IF NOT EXISTS idx_postings_experience_code_salary ON postings_base(experience_level_code, annual_salary)",
+    "CREATE INDEX IF NOT EXISTS idx_postings_work_type_code ON postings_base(work_type_code)",
+    "CREATE INDEX IF NOT EXISTS idx_postings_annual_salary ON postings_base(annual_salary)",
+    "CREATE INDEX IF NOT EXISTS idx_companies_company_id ON companies_base(company_id)",
+    "CREATE INDEX IF NOT EXISTS idx_companies_name ON companies_base(name)",
+    "CREATE INDEX IF NOT EXISTS idx_job_skills_job_id ON job_skills(job_id)",
+    "CREATE INDEX IF NOT EXISTS idx_job_skills_skill ON job_skills(skill_abr)",
+    "CREATE INDEX IF NOT EXISTS idx_job_industries_job_id ON job_industries(job_id)",
+    # Covering index for industry joins/counts (industry_id -> job_id without touching the table)
+    "CREATE INDEX IF NOT EXISTS idx_job_industries_industry_job ON job_industries(industry_id, job_id)",
+    "CREATE INDEX IF NOT EXISTS idx_salaries_job_id ON salaries(job_id)",
+    "CREATE INDEX IF NOT EXISTS idx_benefits_job_id ON benefits(job_id)",
+    "CREATE INDEX IF NOT EXISTS idx_employee_counts_company_id ON employee_counts(company_id)",
+]
+
+
+def create_indexes(conn: sqlite3.Connection):
+    """Create indexes for query performance."""
+    print("\nCreating indexes...")
+    cursor = conn.cursor()
+    for idx_sql in INDEXES:
+        idx_name = idx_sql.split()[5]  # Extract index name
+        print(f"  {idx_name}")
+        cursor.execute(idx_sql)
+
+    # Collect planner statistics so SQLite can choose between the indexes above
+    print("  ANALYZE")
+    cursor.execute("ANALYZE")
+    conn.commit()
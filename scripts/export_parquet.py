@@ -0,0 +1,160 @@
+"""
+Export the SQLite database to Parquet for the backend's columnar engine.
+
+Writes one Parquet file per table the LLM queries (postings and companies as
+whole logical tables rather than their _base/_text partitions - a columnar
+engine only reads the columns a query uses anyway), plus a manifest.json with
+the source database's fingerprint. The backend only uses the export while that
+fingerprint matches its database, so re-run this after rebuilding or
+downloading linkedin_jobs.db. create_database.py and setup_data.py run it
+automatically when duckdb is installed.
+
+Rows are streamed through a temporary CSV file (no pandas/pyarrow needed) and
+converted by DuckDB with column types taken from the SQLite schema.
+
+Usage:
+    python scripts/export_parquet.py
+    python scripts/export_parquet.py --db data/linkedin_jobs_sampled.db --out /tmp/parquet
+"""
+
+import argparse
+import csv
+import json
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict
+
+DATA_DIR = Path(__file__).parent.parent / "data"
+DB_PATH = DATA_DIR / "linkedin_jobs.db"
+PARQUET_DIR = DATA_DIR / "parquet"
+
+# Marks NULL in the staging CSV (so empty strings stay empty strings)
+NULL_MARKER = "\\N"
+
+# SQLite declared type -> DuckDB column type
+TYPE_MAP = {"INTEGER": "BIGINT", "INT": "BIGINT", "REAL": "DOUBLE", "FLOAT": "DOUBLE", "NUMERIC": "DOUBLE"}
+
+
+def db_fingerprint(db_path: Path) -> str:
+    """Same identity as backend/database.get_db_fingerprint: file size and mtime."""
+    stat = db_path.stat()
+    return f"{stat.st_size:x}-{stat.st_mtime_ns:x}"
+
+
+def exported_tables(conn: sqlite3.Connection) -> list:
+    """Tables and views to export: skip partition halves (the views cover them) and SQLite internals."""
+    names = [r[0] for r in conn.execute(
+        "SELECT name FROM sqlite_master WHERE type IN ('table', 'view') ORDER BY name"
+    )]
+    return [
+        n for n in names
+        if not n.startswith("sqlite_") and not n.endswith("_base") and not n.endswith("_text")
+    ]
+
+
+def export_table(conn: sqlite3.Connection, duck, table: str, out_dir: Path, staging_dir: Path) -> int:
+    """Write one table to <out_dir>/<table>.parquet; returns the row count."""
+    types = {
+        name: TYPE_MAP.get((declared or "").upper(), "VARCHAR")
+        for _, name, declared, *_ in conn.execute(f"PRAGMA table_info({table})")
+    }
+    staging = staging_dir / f"{table}.csv"
+    rows = 0
+    cursor = conn.execute(f"SELECT * FROM {table}")
+    with open(staging, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        for batch in iter(lambda: cursor.fetchmany(10000), []):
+            writer.writerows([NULL_MARKER if v is None else v for v in row] for row in batch)
+            rows += len(batch)
+
+    columns = "{" + ", ".join(f"'{name}': '{kind}'" for name, kind in types.items()) + "}"
+    target = out_dir / f"{table}.parquet"
+    duck.execute(
+        f"COPY (SELECT * FROM read_csv('{staging.as_posix()}', auto_detect = false, header = false, "
+        f"columns = {columns}, delim = ',', quote = '\"', escape = '\"', nullstr = '{NULL_MARKER}', "
+        f"strict_mode = false)) "
+        f"TO '{target.as_posix()}' (FORMAT PARQUET)"
+    )
+    staging.unlink()
+    return rows
+
+
+def export_parquet(db_path: Path = DB_PATH, out_dir: Path = PARQUET_DIR) -> Dict[str, int]:
+    """
+    Export every queryable table of db_path to Parquet files in out_dir.
+
+    Returns:
+        Row count per exported table
+
+    Raises:
+        ImportError if duckdb is not installed
+    """
+    import duckdb
+
+    fingerprint = db_fingerprint(db_path)
+    # Build next to the destination and swap in, so the backend never sees a half-written export
+    building = out_dir.with_name(out_dir.name + ".building")
+    shutil.rmtree(building, ignore_errors=True)
+    building.mkdir(parents=True)
+
+    conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    duck = duckdb.connect()
+    counts = {}
+    try:
+        with tempfile.TemporaryDirectory() as staging_dir:
+            for table in exported_tables(conn):
+                start = time.perf_counter()
+                counts[table] = export_table(conn, duck, table, building, Path(staging_dir))
+                print(f"  {table}: {counts[table]:,} rows ({time.perf_counter() - start:.1f}s)")
+    finally:
+        conn.close()
+        duck.close()
+
+    (building / "manifest.json").write_text(json.dumps({
+        "source": db_path.name,
+        "source_fingerprint": fingerprint,
+        "exported_at": time.time(),
+        "tables": counts,
+    }, indent=2))
+    shutil.rmtree(out_dir, ignore_errors=True)
+    building.rename(out_dir)
+    return counts
+
+
+def export_if_installed(db_path: Path = DB_PATH, out_dir: Path = PARQUET_DIR) -> None:
+    """Export after building or downloading the database; skipped (with a note) without duckdb."""
+    try:
+        import duckdb  # noqa: F401
+    except ImportError:
+        print("\nSkipping Parquet export for the columnar engine (pip install duckdb to enable it)")
+        return
+    print(f"\nExporting Parquet files for the columnar engine to {out_dir}")
+    counts = export_parquet(db_path, out_dir)
+    print(f"Exported {len(counts)} tables, {sum(counts.values()):,} rows")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Export the SQLite database to Parquet for the columnar engine")
+    parser.add_argument("--db", type=Path, default=DB_PATH, help="SQLite database to export")
+    parser.add_argument("--out", type=Path, default=PARQUET_DIR, help="Output directory")
+    args = parser.parse_args()
+
+    if not args.db.exists():
+        print(f"ERROR: database not found: {args.db}")
+        return 1
+    print(f"Exporting {args.db} to {args.out}")
+    try:
+        counts = export_parquet(args.db, args.out)
+    except ImportError:
+        print("ERROR: duckdb is not installed (pip install duckdb)")
+        return 1
+    print(f"Exported {len(counts)} tables, {sum(counts.values()):,} rows")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
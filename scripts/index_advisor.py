@@ -0,0 +1,375 @@
+"""
+Workload-driven index advisor.
+
+Replays the query log written by the backend (data/query_log.db), looks for
+full table scans and temp B-tree sorts in EXPLAIN QUERY PLAN, and proposes
+composite/covering indexes plus ANALYZE statistics. Each proposal's benefit is
+estimated by re-running the logged workload against a scratch copy of the
+database with and without the index.
+
+Usage:
+    python scripts/index_advisor.py
+    python scripts/index_advisor.py --top 50 --repeat 5
+"""
+
+import argparse
+import json
+import re
+import sqlite3
+import sys
+import tempfile
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+DATA_DIR = Path(__file__).parent.parent / "data"
+DB_PATH = DATA_DIR / "linkedin_jobs.db"
+LOG_PATH = DATA_DIR / "query_log.db"
+
+# Abort any single replayed statement after this many seconds
+STATEMENT_TIMEOUT = 30.0
+
+# Don't suggest covering indexes wider than this many columns
+MAX_INDEX_COLUMNS = 6
+
+SQL_KEYWORDS = {
+    "WHERE", "JOIN", "LEFT", "RIGHT", "INNER", "OUTER", "CROSS", "ON", "GROUP",
+    "ORDER", "LIMIT", "HAVING", "UNION", "USING", "NATURAL", "AS", "SELECT",
+}
+
+TABLE_REF_RE = re.compile(r"\b(?:FROM|JOIN)\s+([A-Za-z_]\w*)(?:\s+(?:AS\s+)?([A-Za-z_]\w*))?", re.IGNORECASE)
+COLUMN_REF_RE = re.compile(r"\b(?:([A-Za-z_]\w*)\.)?([A-Za-z_]\w*)\b")
+SCAN_RE = re.compile(r"^SCAN (?:TABLE )?(\w+)(?: AS (\w+))?(.*)$")
+TEMP_BTREE_RE = re.compile(r"USE TEMP B-TREE FOR (?:RIGHT PART OF |LAST TERM OF )?(GROUP BY|ORDER BY|DISTINCT)")
+
+
+@dataclass
+class LoggedQuery:
+    """A distinct statement from the query log."""
+    sql: str
+    runs: int
+    avg_latency_ms: float
+    params: List[Any] = field(default_factory=list)  # a logged binding for templated statements
+
+
+@dataclass
+class Proposal:
+    """A suggested index (or ANALYZE) with the queries that motivated it."""
+    table: str
+    columns: Tuple[str, ...]
+    reasons: List[str] = field(default_factory=list)
+    statement: str = ""
+    baseline_ms: float = 0.0
+    with_index_ms: float = 0.0
+
+    @property
+    def name(self) -> str:
+        return f"idx_advisor_{self.table}_{'_'.join(self.columns)}"
+
+    @property
+    def create_sql(self) -> str:
+        if self.statement:
+            return self.statement
+        return f"CREATE INDEX IF NOT EXISTS {self.name} ON {self.table}({', '.join(self.columns)})"
+
+
+def load_workload(log_path: Path, top: int) -> List[LoggedQuery]:
+    """Load the most frequently executed successful statements from the log."""
+    conn = sqlite3.connect(log_path)
+    try:
+        # Logs written before templated queries have no params column
+        has_params = "params" in [row[1] for row in conn.execute("PRAGMA table_info(query_log)")]
+        rows = conn.execute(
+            f"""
+            SELECT sql, COUNT(*) AS runs, AVG(latency_ms), {"MAX(params)" if has_params else "NULL"}
+            FROM query_log
+            WHERE error IS NULL
+            GROUP BY sql
+            ORDER BY runs DESC, AVG(latency_ms) DESC
+            LIMIT ?
+            """,
+            (top,)
+        ).fetchall()
+    finally:
+        conn.close()
+    return [
+        LoggedQuery(sql=r[0], runs=r[1], avg_latency_ms=r[2] or 0.0, params=json.loads(r[3]) if r[3] else [])
+        for r in rows
+    ]
+
+
+def table_columns(conn: sqlite3.Connection) -> Dict[str, List[str]]:
+    """Map every table and view name to its column names."""
+    names = [r[0] for r in conn.execute("SELECT name FROM sqlite_master WHERE type IN ('table', 'view')")]
+    return {
+        name.lower(): [c[1] for c in conn.execute(f"PRAGMA table_info({name})")]
+        for name in names
+    }
+
+
+def view_base_tables(conn: sqlite3.Connection) -> Dict[str, str]:
+    """
+    Map each view to the table in its outermost FROM, so index proposals land on
+    real tables (e.g. the postings view -> postings_base).
+    """
+    mapping = {}
+    for name, sql in conn.execute("SELECT name, sql FROM sqlite_master WHERE type = 'view'"):
+        # Text columns come from correlated subqueries earlier in the select list,
+        # so the outermost FROM is the last one
+        matches = TABLE_REF_RE.findall(sql or "")
+        if matches:
+            mapping[name.lower()] = matches[-1][0].lower()
+    return mapping
+
+
+def clause(sql: str, start: str, stops: List[str]) -> str:
+    """Extract the text of a clause (e.g. WHERE ... up to GROUP BY)."""
+    match = re.search(rf"\b{start}\b", sql, re.IGNORECASE)
+    if not match:
+        return ""
+    rest = sql[match.end():]
+    end = len(rest)
+    for stop in stops:
+        stop_match = re.search(rf"\b{stop}\b", rest, re.IGNORECASE)
+        if stop_match:
+            end = min(end, stop_match.start())
+    return rest[:end]
+
+
+def table_aliases(sql: str, columns: Dict[str, List[str]]) -> Dict[str, str]:
+    """Map every table name and alias used in a statement to the table it refers to."""
+    aliases = {}
+    for table, alias in TABLE_REF_RE.findall(sql):
+        table = table.lower()
+        if table not in columns:
+            continue
+        aliases[table] = table
+        if alias and alias.upper() not in SQL_KEYWORDS:
+            aliases[alias.lower()] = table
+    return aliases
+
+
+def analyze_sql(sql: str, columns: Dict[str, List[str]]) -> Dict[str, Dict[str, List[str]]]:
+    """
+    Heuristically find which columns of each table a statement filters, groups,
+    sorts, and reads.
+
+    Returns:
+        {table: {"eq": [...], "range": [...], "group": [...], "order": [...], "read": [...]}}
+    """
+    aliases = table_aliases(sql, columns)
+    referenced = set(aliases.values())
+    usage = {t: {"eq": [], "range": [], "group": [], "order": [], "read": []} for t in referenced}
+
+    def resolve(qualifier: Optional[str], column: str) -> Optional[str]:
+        column = column.lower()
+        if qualifier:
+            table = aliases.get(qualifier.lower())
+            return table if table and column in (c.lower() for c in columns[table]) else None
+        for table in referenced:
+            if column in (c.lower() for c in columns[table]):
+                return table
+        return None
+
+    def collect(text: str, kind: str, pattern: Optional[str] = None):
+        for match in COLUMN_REF_RE.finditer(text):
+            qualifier, column = match.group(1), match.group(2)
+            table = resolve(qualifier, column)
+            if not table:
+                continue
+            if pattern and not re.match(pattern, text[match.end():], re.IGNORECASE):
+                continue
+            bucket = usage[table][kind]
+            if column.lower() not in bucket:
+                bucket.append(column.lower())
+
+    predicates = clause(sql, "WHERE", ["GROUP", "ORDER", "LIMIT", "HAVING"])
+    predicates += " " + " ".join(re.findall(r"\bON\b(.*?)(?=\b(?:LEFT|RIGHT|INNER|JOIN|WHERE|GROUP|ORDER|LIMIT)\b|$)", sql, re.IGNORECASE | re.DOTALL))
+    collect(predicates, "eq", r"\s*(=|IN\b|IS\s+NULL)")
+    collect(predicates, "range", r"\s*(<|>|BETWEEN\b|IS\s+NOT\s+NULL)")
+    collect(clause(sql, "GROUP BY", ["HAVING", "ORDER", "LIMIT"]), "group")
+    collect(clause(sql, "ORDER BY", ["LIMIT"]), "order")
+    collect(sql, "read")
+    return usage
+
+
+def propose_for_table(table: str, usage: Dict[str, List[str]]) -> List[Tuple[str, ...]]:
+    """Build a composite index and, if narrow enough, its covering variant."""
+    key = list(usage["eq"])
+    for col in usage["group"] or usage["order"]:
+        if col not in key:
+            key.append(col)
+    if not key and usage["range"]:
+        key.append(usage["range"][0])
+    elif usage["range"] and usage["range"][0] not in key:
+        key.append(usage["range"][0])
+    if not key:
+        return []
+
+    proposals = [tuple(key)]
+    covering = key + [c for c in usage["read"] if c not in key]
+    if len(covering) > len(key) and len(covering) <= MAX_INDEX_COLUMNS:
+        proposals.append(tuple(covering))
+    return proposals
+
+
+def find_proposals(conn: sqlite3.Connection, workload: List[LoggedQuery]) -> List[Proposal]:
+    """Inspect each logged statement's plan and collect index proposals."""
+    columns = table_columns(conn)
+    base_tables = view_base_tables(conn)
+    proposals: Dict[Tuple[str, Tuple[str, ...]], Proposal] = {}
+
+    for query in workload:
+        try:
+            plan = [row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN {query.sql}", query.params)]
+        except sqlite3.Error:
+            continue
+
+        aliases = table_aliases(query.sql, columns)
+        usage = analyze_sql(query.sql, columns)
+        problem_tables = set()
+        for detail in plan:
+            scan = SCAN_RE.match(detail)
+            if scan and "USING" not in scan.group(3):
+                name = scan.group(1).lower()
+                problem_tables.add(aliases.get(name, name))
+            sort = TEMP_BTREE_RE.search(detail)
+            if sort:
+                kind = "group" if sort.group(1) == "GROUP BY" else "order"
+                problem_tables.update(t for t, u in usage.items() if u[kind])
+
+        for table, table_usage in usage.items():
+            target = base_tables.get(table, table)
+            if table not in problem_tables and target not in problem_tables:
+                continue
+            for cols in propose_for_table(table, table_usage):
+                if target != table and not set(cols) <= {c.lower() for c in columns.get(target, [])}:
+                    continue
+                proposal = proposals.setdefault((target, cols), Proposal(table=target, columns=cols))
+                proposal.reasons.append(query.sql)
+
+    return list(proposals.values())
+
+
+def copy_to_scratch(db_path: Path, scratch_dir: Path) -> Path:
+    """Copy the database to a scratch file so proposals can be tried safely."""
+    scratch = scratch_dir / db_path.name
+    source = sqlite3.connect(db_path)
+    dest = sqlite3.connect(scratch)
+    try:
+        source.backup(dest)
+    finally:
+        source.close()
+        dest.close()
+    return scratch
+
+
+def run_workload(conn: sqlite3.Connection, workload: List[LoggedQuery], repeat: int) -> float:
+    """
+    Replay the workload and return its weighted cost in milliseconds.
+
+    Each statement is timed as the best of `repeat` runs and weighted by how
+    often it appears in the log.
+    """
+    total = 0.0
+    for query in workload:
+        best = None
+        for _ in range(repeat):
+            deadline = time.perf_counter() + STATEMENT_TIMEOUT
+            conn.set_progress_handler(lambda: int(time.perf_counter() > deadline), 10000)
+            start = time.perf_counter()
+            try:
+                conn.execute(query.sql, query.params).fetchmany(100)
+            except sqlite3.Error:
+                pass
+            finally:
+                conn.set_progress_handler(None, 0)
+            elapsed = (time.perf_counter() - start) * 1000
+            best = elapsed if best is None else min(best, elapsed)
+        total += (best or 0.0) * query.runs
+    return total
+
+
+def estimate_benefits(scratch: Path, workload: List[LoggedQuery], proposals: List[Proposal], repeat: int) -> float:
+    """Measure the workload on the scratch copy with each proposal applied in isolation."""
+    conn = sqlite3.connect(scratch)
+    try:
+        baseline = run_workload(conn, workload, repeat)
+        for proposal in proposals:
+            print(f"  trying {proposal.create_sql}")
+            conn.execute(proposal.create_sql)
+            proposal.baseline_ms = baseline
+            proposal.with_index_ms = run_workload(conn, workload, repeat)
+            if not proposal.statement:
+                conn.execute(f"DROP INDEX IF EXISTS {proposal.name}")
+        return baseline
+    finally:
+        conn.close()
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Propose indexes from the logged query workload.")
+    parser.add_argument("--db", type=Path, default=DB_PATH, help="database to analyze")
+    parser.add_argument("--log", type=Path, default=LOG_PATH, help="query log written by the backend")
+    parser.add_argument("--top", type=int, default=100, help="number of distinct statements to replay")
+    parser.add_argument("--repeat", type=int, default=3, help="timed runs per statement")
+    args = parser.parse_args()
+
+    if not args.db.exists():
+        print(f"ERROR: database not found: {args.db}")
+        return 1
+    if not args.log.exists():
+        print(f"ERROR: query log not found: {args.log}")
+        return 1
+
+    workload = load_workload(args.log, args.top)
+    if not workload:
+        print("Query log is empty - nothing to analyze.")
+        return 0
+    print(f"Loaded {len(workload)} distinct statements ({sum(q.runs for q in workload)} executions)")
+
+    conn = sqlite3.connect(args.db)
+    try:
+        proposals = find_proposals(conn, workload)
+        has_stats = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE name = 'sqlite_stat1'"
+        ).fetchone() is not None
+    finally:
+        conn.close()
+
+    # ANALYZE runs last so index proposals are measured against the current statistics
+    if not has_stats:
+        proposals.append(Proposal(table="*", columns=(), reasons=["no sqlite_stat1 statistics"], statement="ANALYZE"))
+
+    if not proposals:
+        print("No full scans or temp B-tree sorts found - current indexes cover the workload.")
+        return 0
+
+    print(f"\nEstimating benefit of {len(proposals)} proposals on a scratch copy...")
+    with tempfile.TemporaryDirectory() as scratch_dir:
+        scratch = copy_to_scratch(args.db, Path(scratch_dir))
+        baseline = estimate_benefits(scratch, workload, proposals, args.repeat)
+
+    proposals.sort(key=lambda p: p.with_index_ms - p.baseline_ms)
+
+    print(f"\n{'=' * 50}")
+    print(f"Baseline workload cost: {baseline:,.1f} ms")
+    print(f"{'=' * 50}")
+    for proposal in proposals:
+        saved = proposal.baseline_ms - proposal.with_index_ms
+        pct = saved / proposal.baseline_ms * 100 if proposal.baseline_ms else 0.0
+        print(f"\n{proposal.create_sql};")
+        print(f"  estimated saving: {saved:,.1f} ms ({pct:.1f}%) across {len(proposal.reasons)} statement(s)")
+
+    worthwhile = [p for p in proposals if p.baseline_ms - p.with_index_ms > 0]
+    if worthwhile:
+        print(f"\n{'=' * 50}")
+        print("Suggested statements (add to INDEXES in scripts/db_indexes.py):")
+        for proposal in worthwhile:
+            print(f"  {proposal.create_sql}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,304 @@
+"""
+Load generator for the /query endpoint.
+
+Sends questions from the benchmark corpus (scripts/benchmark_corpus.json) at a
+fixed concurrency (closed loop: each worker sends its next request when the
+previous one returns) or a fixed arrival rate (open loop: Poisson arrivals,
+latency measured from the scheduled send time so client-side queueing is not
+hidden). Reports throughput, latency percentiles, error rates, and a per-stage
+breakdown from the backend's /metrics endpoint.
+
+Run it against a backend that talks to scripts/mock_llm_server.py to measure
+the service itself rather than OpenAI. The answer cache hides most of the
+pipeline, so either start the backend with CACHE_BACKEND=none or pass
+--cache-bust. --cache-bust makes every question unique, which defeats the
+answer and SQL caches; the mock server then also makes each generated SQL
+unique, so the SQL result cache misses as well (with a real LLM, busted
+questions may still share results). /metrics is per worker, so run one worker to get a per-worker
+saturation point.
+
+Usage:
+    python scripts/load_test.py --concurrency 8 --duration 60
+    python scripts/load_test.py --rate 5 --duration 60
+    python scripts/load_test.py --sweep 1,2,4,8,16,32 --duration 30 --json results.json
+"""
+
+import argparse
+import json
+import random
+import sys
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, asdict
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+CORPUS_PATH = Path(__file__).parent / "benchmark_corpus.json"
+
+# Backend timings included in the per-stage breakdown
+STAGE_PREFIXES = ("admission.", "llm.", "db.", "query.")
+
+
+@dataclass
+class Sample:
+    """Outcome of one request."""
+    latency_ms: float
+    status: int          # HTTP status, or 0 for connection errors/timeouts
+    success: bool        # HTTP 200 and the pipeline reported success
+
+
+@dataclass
+class RunReport:
+    """Summary of one load level."""
+    mode: str
+    level: float
+    duration_s: float
+    requests: int
+    throughput_rps: float
+    success_rate: float
+    p50_ms: float
+    p90_ms: float
+    p95_ms: float
+    p99_ms: float
+    max_ms: float
+    statuses: Dict[str, int]
+    stages: Dict[str, Dict[str, float]]
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(pct / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+class LoadClient:
+    """Sends /query requests and collects samples."""
+
+    def __init__(self, base_url: str, questions: List[str], method: str, timeout: float, cache_bust: bool):
+        self.base_url = base_url.rstrip("/")
+        self.questions = questions
+        self.method = method
+        self.timeout = timeout
+        self.cache_bust = cache_bust
+        self.samples: List[Sample] = []
+        self._lock = threading.Lock()
+        self._sequence = 0
+
+    def _next_question(self) -> str:
+        with self._lock:
+            self._sequence += 1
+            sequence = self._sequence
+        question = random.choice(self.questions)
+        # A distinct suffix defeats the question/answer caches (normalization keeps digits);
+        # mock_llm_server.py recognizes it and varies the SQL, defeating the result cache
+        return f"{question} (request {sequence})" if self.cache_bust else question
+
+    def send(self, scheduled_at: Optional[float] = None):
+        """Send one request; latency counts from scheduled_at if given (open loop)."""
+        question = self._next_question()
+        if self.method == "get":
+            request = urllib.request.Request(
+                f"{self.base_url}/query?{urllib.parse.urlencode({'question': question})}"
+            )
+        else:
+            request = urllib.request.Request(
+                f"{self.base_url}/query",
+                data=json.dumps({"question": question}).encode("utf-8"),
+                headers={"Content-Type": "application/json"},
+                method="POST"
+            )
+
+        start = scheduled_at if scheduled_at is not None else time.perf_counter()
+        status, success = 0, False
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                status = response.status
+                success = bool(json.loads(response.read()).get("success"))
+        except urllib.error.HTTPError as e:
+            status = e.code
+        except (urllib.error.URLError, TimeoutError, OSError):
+            status = 0
+        sample = Sample((time.perf_counter() - start) * 1000, status, success)
+        with self._lock:
+            self.samples.append(sample)
+
+    def take_samples(self) -> List[Sample]:
+        with self._lock:
+            samples, self.samples = self.samples, []
+        return samples
+
+
+def run_closed_loop(client: LoadClient, concurrency: int, duration: float, max_requests: Optional[int]):
+    """`concurrency` workers each send back-to-back requests until the time or request budget runs out."""
+    deadline = time.perf_counter() + duration
+    sent = Counter()
+    lock = threading.Lock()
+
+    def worker():
+        while time.perf_counter() < deadline:
+            with lock:
+                if max_requests is not None and sent["n"] >= max_requests:
+                    return
+                sent["n"] += 1
+            client.send()
+
+    threads = [threading.Thread(target=worker, daemon=True) for _ in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+
+def run_open_loop(client: LoadClient, rate: float, duration: float, max_requests: Optional[int], max_in_flight: int):
+    """Poisson arrivals at `rate` requests/second; latency includes any wait for a free sender."""
+    start = time.perf_counter()
+    next_arrival = start
+    count = 0
+    with ThreadPoolExecutor(max_workers=max_in_flight) as pool:
+        while next_arrival < start + duration and (max_requests is None or count < max_requests):
+            delay = next_arrival - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            pool.submit(client.send, next_arrival)
+            count += 1
+            next_arrival += random.expovariate(rate)
+
+
+def fetch_metrics(base_url: str, timeout: float) -> Optional[Dict[str, Any]]:
+    """Backend /metrics snapshot, or None if unavailable."""
+    try:
+        with urllib.request.urlopen(f"{base_url.rstrip('/')}/metrics", timeout=timeout) as response:
+            return json.loads(response.read()).get("metrics")
+    except (urllib.error.URLError, OSError, ValueError):
+        return None
+
+
+def stage_breakdown(before: Optional[Dict[str, Any]], after: Optional[Dict[str, Any]]) -> Dict[str, Dict[str, float]]:
+    """Per-stage call counts during the run, with the backend's recent latency summary for each."""
+    if not after:
+        return {}
+    before_timings = (before or {}).get("timings", {})
+    stages = {}
+    for name, summary in sorted(after.get("timings", {}).items()):
+        if not name.startswith(STAGE_PREFIXES):
+            continue
+        calls = summary["count"] - before_timings.get(name, {}).get("count", 0)
+        if calls > 0:
+            stages[name] = {"calls": calls, "avg_ms": summary["avg_ms"],
+                            "p50_ms": summary["p50_ms"], "p95_ms": summary["p95_ms"]}
+    return stages
+
+
+def summarize(mode: str, level: float, elapsed: float, samples: List[Sample], stages) -> RunReport:
+    latencies = sorted(s.latency_ms for s in samples)
+    statuses = Counter("error" if s.status == 0 else str(s.status) for s in samples)
+    successes = sum(1 for s in samples if s.success)
+    return RunReport(
+        mode=mode,
+        level=level,
+        duration_s=round(elapsed, 2),
+        requests=len(samples),
+        throughput_rps=round(successes / elapsed, 2) if elapsed else 0.0,
+        success_rate=round(successes / len(samples), 4) if samples else 0.0,
+        p50_ms=round(percentile(latencies, 50), 1),
+        p90_ms=round(percentile(latencies, 90), 1),
+        p95_ms=round(percentile(latencies, 95), 1),
+        p99_ms=round(percentile(latencies, 99), 1),
+        max_ms=round(latencies[-1], 1) if latencies else 0.0,
+        statuses=dict(statuses),
+        stages=stages,
+    )
+
+
+def print_report(report: RunReport):
+    unit = "concurrency" if report.mode == "closed" else "req/s offered"
+    print(f"\n=== {report.level:g} {unit}: {report.requests} requests in {report.duration_s:.1f}s ===")
+    print(f"Throughput (successful): {report.throughput_rps:.2f} req/s")
+    print(f"Success rate: {report.success_rate:.1%}   Statuses: "
+          + ", ".join(f"{k}={v}" for k, v in sorted(report.statuses.items())))
+    print(f"Latency: p50 {report.p50_ms:.0f}ms, p90 {report.p90_ms:.0f}ms, p95 {report.p95_ms:.0f}ms, "
+          f"p99 {report.p99_ms:.0f}ms, max {report.max_ms:.0f}ms")
+    if report.stages:
+        print("Per-stage (backend /metrics; avg/p50/p95 over recent samples):")
+        for name, stage in report.stages.items():
+            print(f"  {name:<32} {stage['calls']:>6} calls  avg {stage['avg_ms']:>8.1f}ms  "
+                  f"p50 {stage['p50_ms']:>8.1f}ms  p95 {stage['p95_ms']:>8.1f}ms")
+
+
+def print_sweep(reports: List[RunReport]):
+    print("\n=== Sweep summary ===")
+    print(f"{'level':>8} {'req/s':>8} {'ok %':>7} {'p50':>8} {'p95':>8} {'p99':>8}")
+    best = max(reports, key=lambda r: r.throughput_rps)
+    for r in reports:
+        marker = "  <- peak throughput" if r is best else ""
+        print(f"{r.level:>8g} {r.throughput_rps:>8.2f} {r.success_rate * 100:>6.1f}% "
+              f"{r.p50_ms:>7.0f}ms {r.p95_ms:>7.0f}ms {r.p99_ms:>7.0f}ms{marker}")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Load test the /query endpoint")
+    parser.add_argument("--url", default="http://localhost:8000", help="Backend base URL")
+    parser.add_argument("--corpus", type=Path, default=CORPUS_PATH, help="Question corpus (JSON)")
+    parser.add_argument("--concurrency", type=int, default=4, help="Closed loop: concurrent clients")
+    parser.add_argument("--rate", type=float, help="Open loop: arrival rate in requests/second")
+    parser.add_argument("--max-in-flight", type=int, default=256, help="Open loop: sender threads")
+    parser.add_argument("--sweep", help="Comma-separated concurrencies (or rates with --rate) to step through")
+    parser.add_argument("--duration", type=float, default=30, help="Seconds per load level")
+    parser.add_argument("--requests", type=int, help="Stop each level after this many requests")
+    parser.add_argument("--method", choices=["post", "get"], default="post")
+    parser.add_argument("--cache-bust", action="store_true", help="Make every question unique")
+    parser.add_argument("--timeout", type=float, default=120, help="Per-request timeout in seconds")
+    parser.add_argument("--seed", type=int, help="Random seed for question choice and arrivals")
+    parser.add_argument("--json", type=Path, help="Write the reports to this file")
+    args = parser.parse_args()
+
+    if args.seed is not None:
+        random.seed(args.seed)
+    with open(args.corpus) as f:
+        questions = [entry["question"] for entry in json.load(f)]
+
+    open_loop = args.rate is not None
+    if args.sweep:
+        levels = [float(level) for level in args.sweep.split(",")]
+    else:
+        levels = [args.rate if open_loop else args.concurrency]
+
+    try:
+        urllib.request.urlopen(f"{args.url.rstrip('/')}/", timeout=args.timeout).close()
+    except (urllib.error.URLError, OSError) as e:
+        print(f"ERROR: backend not reachable at {args.url}: {e}")
+        return 1
+
+    client = LoadClient(args.url, questions, args.method, args.timeout, args.cache_bust)
+    reports = []
+    for level in levels:
+        before = fetch_metrics(args.url, args.timeout)
+        start = time.perf_counter()
+        if open_loop:
+            run_open_loop(client, level, args.duration, args.requests, args.max_in_flight)
+        else:
+            run_closed_loop(client, int(level), args.duration, args.requests)
+        elapsed = time.perf_counter() - start
+        stages = stage_breakdown(before, fetch_metrics(args.url, args.timeout))
+        report = summarize("open" if open_loop else "closed", level, elapsed, client.take_samples(), stages)
+        print_report(report)
+        reports.append(report)
+
+    if len(reports) > 1:
+        print_sweep(reports)
+    if args.json:
+        args.json.write_text(json.dumps([asdict(r) for r in reports], indent=2))
+        print(f"\nWrote {args.json}")
+
+    return 0 if all(r.requests for r in reports) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
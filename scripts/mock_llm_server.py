@@ -0,0 +1,289 @@
+"""
+Local stand-in for the OpenAI chat completions API, for load testing.
+
+Answers the two kinds of calls llm.py makes:
+- SQL generation: canned SQL from the benchmark corpus (scripts/benchmark_corpus.json),
+  matched to the question by word overlap. Questions made unique by
+  load_test.py --cache-bust ("... (request 17)") get the SQL with a matching
+  comment appended, so the backend's SQL result cache misses too
+- response formatting: a short canned summary
+
+Latency is sampled from a configurable distribution, and a fraction of requests
+can fail with 500 or 429 (with Retry-After) to exercise the backend's error
+paths. `"stream": true` requests get server-sent-event chunks like the real API.
+
+Point the backend at it with the OpenAI client's base URL variable:
+    OPENAI_BASE_URL=http://127.0.0.1:8100/v1 OPENAI_API_KEY=mock uvicorn main:app
+
+Usage:
+    python scripts/mock_llm_server.py
+    python scripts/mock_llm_server.py --latency lognormal --latency-ms 900 --error-rate 0.02 --rate-limit-rate 0.05
+"""
+
+import argparse
+import json
+import random
+import re
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, List, Optional
+
+CORPUS_PATH = Path(__file__).parent / "benchmark_corpus.json"
+
+UNANSWERABLE_SQL = "SELECT 'This question cannot be answered with the available data.' as message"
+
+# Minimum word overlap (Jaccard) for a question to match a corpus entry
+MIN_MATCH_SCORE = 0.3
+
+# Characters per streamed chunk
+STREAM_CHUNK_CHARS = 16
+
+# Suffix load_test.py --cache-bust adds to every question
+CACHE_BUST_RE = re.compile(r"\(request (\d+)\)")
+
+
+def load_corpus(path: Path) -> List[Dict[str, str]]:
+    """Load [{question, sql}, ...] entries."""
+    with open(path) as f:
+        return json.load(f)
+
+
+def _words(text: str) -> set:
+    return set(re.findall(r"[a-z0-9]+", text.lower()))
+
+
+class LatencyModel:
+    """Samples response latency (seconds) from a fixed, uniform or lognormal distribution."""
+
+    def __init__(self, distribution: str, median_ms: float, spread: float):
+        self.distribution = distribution
+        self.median_ms = median_ms
+        self.spread = spread
+
+    def sample(self) -> float:
+        if self.distribution == "fixed":
+            ms = self.median_ms
+        elif self.distribution == "uniform":
+            ms = random.uniform(self.median_ms * (1 - self.spread), self.median_ms * (1 + self.spread))
+        else:
+            # lognormal with the given median; spread is sigma of the underlying normal
+            ms = random.lognormvariate(0, self.spread) * self.median_ms
+        return max(ms, 0) / 1000
+
+
+class MockLLM:
+    """Chooses canned completions and injects latency and failures."""
+
+    def __init__(self, corpus: List[Dict[str, str]], latency: LatencyModel, error_rate: float,
+                 rate_limit_rate: float, retry_after: int, stream_delay: float):
+        self.corpus = [(_words(entry["question"]), entry) for entry in corpus]
+        self.latency = latency
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.retry_after = retry_after
+        self.stream_delay = stream_delay
+        self.stats: Counter = Counter()
+        self._lock = threading.Lock()
+
+    def count(self, name: str):
+        with self._lock:
+            self.stats[name] += 1
+
+    def match_sql(self, question: str) -> Optional[str]:
+        """SQL of the corpus entry whose question shares the most words with this one."""
+        words = _words(question)
+        best_score, best_sql = 0.0, None
+        for entry_words, entry in self.corpus:
+            score = len(words & entry_words) / (len(words | entry_words) or 1)
+            if score > best_score:
+                best_score, best_sql = score, entry["sql"]
+        return best_sql if best_score >= MIN_MATCH_SCORE else None
+
+    def completion_text(self, messages: List[Dict[str, str]]) -> str:
+        system = next((m.get("content", "") for m in messages if m.get("role") == "system"), "")
+        user = next((m.get("content", "") for m in reversed(messages) if m.get("role") == "user"), "")
+        if "SQL query generator" in system:
+            sql = self.match_sql(user)
+            self.count("sql.matched" if sql else "sql.unmatched")
+            bust = CACHE_BUST_RE.search(user)
+            if sql and bust:
+                # Distinct SQL text per request, so results aren't served from the result cache.
+                # No free-standing number, so sql_templates doesn't bind the question's number to it
+                sql = f"{sql} /* request_{bust.group(1)} */"
+            return sql or UNANSWERABLE_SQL
+
+        self.count("format")
+        total = re.search(r"Total rows: ([\d,]+)", user)
+        rows = total.group(1) if total else "several"
+        return f"Based on the data, there are {rows} results. The top entries are listed above."
+
+
+def make_handler(llm: MockLLM):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, format, *args):
+            pass
+
+        def _send_json(self, status: int, body: dict, headers: Optional[Dict[str, str]] = None):
+            payload = json.dumps(body).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def do_GET(self):
+            if self.path.rstrip("/").endswith("/models"):
+                self._send_json(200, {"object": "list", "data": [{"id": "mock", "object": "model"}]})
+            else:
+                self._send_json(404, {"error": {"message": "Not found", "type": "invalid_request_error"}})
+
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length", 0))
+            try:
+                request = json.loads(self.rfile.read(length) or b"{}")
+            except json.JSONDecodeError:
+                self._send_json(400, {"error": {"message": "Invalid JSON", "type": "invalid_request_error"}})
+                return
+            if not self.path.rstrip("/").endswith("/chat/completions"):
+                self._send_json(404, {"error": {"message": "Not found", "type": "invalid_request_error"}})
+                return
+
+            llm.count("requests")
+            roll = random.random()
+            if roll < llm.rate_limit_rate:
+                llm.count("injected.429")
+                self._send_json(
+                    429,
+                    {"error": {"message": "Rate limit reached (injected)", "type": "rate_limit_exceeded"}},
+                    {"Retry-After": str(llm.retry_after)}
+                )
+                return
+
+            time.sleep(llm.latency.sample())
+            if roll < llm.rate_limit_rate + llm.error_rate:
+                llm.count("injected.500")
+                self._send_json(500, {"error": {"message": "Internal server error (injected)", "type": "server_error"}})
+                return
+
+            text = llm.completion_text(request.get("messages", []))
+            model = request.get("model", "mock")
+            completion_id = f"chatcmpl-{uuid.uuid4().hex[:24]}"
+            prompt_tokens = sum(len(m.get("content", "")) for m in request.get("messages", [])) // 4
+            usage = {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": len(text) // 4,
+                "total_tokens": prompt_tokens + len(text) // 4,
+            }
+            if request.get("stream"):
+                include_usage = (request.get("stream_options") or {}).get("include_usage")
+                self._stream(completion_id, model, text, usage if include_usage else None)
+                return
+            self._send_json(200, {
+                "id": completion_id,
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": model,
+                "choices": [{
+                    "index": 0,
+                    "message": {"role": "assistant", "content": text},
+                    "finish_reason": "stop",
+                }],
+                "usage": usage,
+            })
+
+        def _stream(self, completion_id: str, model: str, text: str, usage: Optional[dict]):
+            """Send the completion as chat.completion.chunk server-sent events (usage in a final chunk if asked)."""
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Cache-Control", "no-cache")
+            self.send_header("Connection", "close")
+            self.end_headers()
+            self.close_connection = True
+
+            def send_chunk(choices: list, **extra):
+                chunk = {
+                    "id": completion_id,
+                    "object": "chat.completion.chunk",
+                    "created": int(time.time()),
+                    "model": model,
+                    "choices": choices,
+                    **extra,
+                }
+                self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode("utf-8"))
+                self.wfile.flush()
+
+            def event(delta: dict, finish_reason: Optional[str] = None):
+                send_chunk([{"index": 0, "delta": delta, "finish_reason": finish_reason}])
+
+            try:
+                event({"role": "assistant", "content": ""})
+                for i in range(0, len(text), STREAM_CHUNK_CHARS):
+                    time.sleep(llm.stream_delay)
+                    event({"content": text[i:i + STREAM_CHUNK_CHARS]})
+                event({}, "stop")
+                if usage is not None:
+                    send_chunk([], usage=usage)
+                self.wfile.write(b"data: [DONE]\n\n")
+                self.wfile.flush()
+            except (BrokenPipeError, ConnectionResetError):
+                llm.count("stream.disconnected")
+
+    return Handler
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Mock OpenAI chat completions server for load tests")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8100)
+    parser.add_argument("--corpus", type=Path, default=CORPUS_PATH, help="Question/SQL corpus (JSON)")
+    parser.add_argument("--latency", choices=["fixed", "uniform", "lognormal"], default="lognormal",
+                        help="Latency distribution (default: lognormal)")
+    parser.add_argument("--latency-ms", type=float, default=800, help="Median latency per call in ms")
+    parser.add_argument("--latency-spread", type=float, default=0.5,
+                        help="uniform: +/- fraction of the median; lognormal: sigma")
+    parser.add_argument("--stream-delay-ms", type=float, default=20, help="Delay between streamed chunks")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of calls that return 500")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="Fraction of calls that return 429")
+    parser.add_argument("--retry-after", type=int, default=1, help="Retry-After seconds sent with 429s")
+    parser.add_argument("--seed", type=int, help="Random seed for reproducible runs")
+    args = parser.parse_args()
+
+    if args.seed is not None:
+        random.seed(args.seed)
+
+    llm = MockLLM(
+        load_corpus(args.corpus),
+        LatencyModel(args.latency, args.latency_ms, args.latency_spread),
+        args.error_rate,
+        args.rate_limit_rate,
+        args.retry_after,
+        args.stream_delay_ms / 1000
+    )
+
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(llm))
+    server.daemon_threads = True
+    print(f"Mock LLM listening on http://{args.host}:{args.port}/v1 "
+          f"({len(llm.corpus)} canned queries, {args.latency} latency ~{args.latency_ms:.0f}ms)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print("\nRequests served:")
+        for name, count in sorted(llm.stats.items()):
+            print(f"  {name}: {count}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
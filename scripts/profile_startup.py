@@ -0,0 +1,120 @@
+"""
+Cold-start import profile for the backend.
+
+Imports the app module in fresh interpreters with `python -X importtime`
+and reports the import time and the slowest modules. The startup budget and
+the modules that must load lazily (the openai client and the query pipeline
+load on first use, not at startup) are enforced by backend/test_startup.py;
+use this script to find out where the time goes when that test fails.
+
+Usage:
+    python scripts/profile_startup.py
+    python scripts/profile_startup.py --runs 10 --top 25
+"""
+
+import argparse
+import statistics
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+BACKEND_DIR = Path(__file__).parent.parent / "backend"
+
+
+@dataclass
+class ImportRecord:
+    """One line of -X importtime output."""
+    module: str
+    self_us: int
+    cumulative_us: int
+    depth: int
+
+
+def parse_importtime(stderr: str) -> List[ImportRecord]:
+    """Parse `import time: self | cumulative | name` lines; nesting depth is the indent of the name."""
+    records = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        parts = line[len("import time:"):].split("|")
+        if len(parts) != 3 or not parts[0].strip().isdigit():
+            continue  # header line
+        name = parts[2].rstrip()
+        stripped = name.lstrip()
+        records.append(ImportRecord(
+            module=stripped,
+            self_us=int(parts[0]),
+            cumulative_us=int(parts[1]),
+            depth=(len(name) - len(stripped) - 1) // 2
+        ))
+    return records
+
+
+def profile_once(module: str) -> Tuple[float, List[ImportRecord]]:
+    """Import the module in a fresh interpreter; return (wall ms, import records)."""
+    start = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=BACKEND_DIR,
+        capture_output=True,
+        text=True
+    )
+    wall_ms = (time.perf_counter() - start) * 1000
+    if proc.returncode != 0:
+        error = proc.stderr.strip().splitlines()
+        raise RuntimeError(f"import {module} failed: {error[-1] if error else proc.returncode}")
+    return wall_ms, parse_importtime(proc.stderr)
+
+
+def report(records: List[ImportRecord], top: int):
+    """Print the slowest modules by cumulative time and the heaviest top-level packages by self time."""
+    print("\nSlowest imports (cumulative, one run):")
+    print(f"  {'cumulative':>12}  {'self':>10}  module")
+    for record in sorted(records, key=lambda r: r.cumulative_us, reverse=True)[:top]:
+        print(f"  {record.cumulative_us / 1000:>10.1f}ms  {record.self_us / 1000:>8.1f}ms  {record.module}")
+
+    by_package: Dict[str, int] = defaultdict(int)
+    for record in records:
+        by_package[record.module.split(".")[0]] += record.self_us
+    print("\nHeaviest packages (sum of self time):")
+    for package, self_us in sorted(by_package.items(), key=lambda p: p[1], reverse=True)[:top]:
+        print(f"  {self_us / 1000:>10.1f}ms  {package}")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Profile backend import time")
+    parser.add_argument("--module", default="main", help="Module to import from backend/ (default: main)")
+    parser.add_argument("--runs", type=int, default=5, help="Timed runs (the median is reported)")
+    parser.add_argument("--top", type=int, default=15, help="Modules to list in the report")
+    args = parser.parse_args()
+
+    # First run only warms the bytecode and OS file caches
+    try:
+        profile_once(args.module)
+        runs = [profile_once(args.module) for _ in range(max(args.runs, 1))]
+    except RuntimeError as e:
+        print(f"ERROR: {e}")
+        return 1
+
+    import_ms = []
+    for _, records in runs:
+        own = [r for r in records if r.module == args.module]
+        import_ms.append(own[-1].cumulative_us / 1000 if own else 0.0)
+    wall_ms = [wall for wall, _ in runs]
+    median_import = statistics.median(import_ms)
+
+    print(f"import {args.module}: median {median_import:.1f}ms, min {min(import_ms):.1f}ms, "
+          f"max {max(import_ms):.1f}ms over {len(runs)} runs")
+    print(f"interpreter start + import (wall): median {statistics.median(wall_ms):.1f}ms")
+
+    records = runs[len(runs) // 2][1]
+    report(records, args.top)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
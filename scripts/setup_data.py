@@ -2,6 +2,11 @@
 Setup script for downloading the LinkedIn job postings database.
 Downloads the pre-built SQLite database from GitHub Releases.
 
+The v1.0.0 release predates the derived columns, lookup tables and partitioned
+tables scripts/create_database.py now builds. The backend detects that and
+describes the database with data/schema_docs_legacy.txt; rebuild with
+create_database.py to get the derived columns.
+
 Usage:
     python scripts/setup_data.py
 """
@@ -11,6 +16,8 @@ import sys
 import urllib.request
 from pathlib import Path
 
+from export_parquet import export_if_installed
+
 DATA_DIR = Path(__file__).parent.parent / "data"
 DB_PATH = DATA_DIR / "linkedin_jobs.db"
 
@@ -69,6 +76,7 @@ def main():
         size_mb = DB_PATH.stat().st_size / (1024 * 1024)
         print(f"\nDatabase ready: {DB_PATH}")
         print(f"Size: {size_mb:.1f} MB")
+        export_if_installed(DB_PATH)
     else:
         print("ERROR: Database file not found after download")
         return 1